@@ -0,0 +1,111 @@
+import asyncio
+import time
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+
+from api.metrics import Histogram
+
+# Buckets for the two distributions we tune on
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024]
+WAIT_US_BUCKETS = [50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000]
+
+
+# ---------------------------------------------------------
+# MICRO-BATCHING SCHEDULER
+# ---------------------------------------------------------
+# Concurrent /predict calls park their feature row here. The queue is flushed
+# as ONE predict_fn(matrix, key) call per model key when either:
+#   - max_batch_size rows are waiting, or
+#   - the oldest row has waited max_wait_us microseconds.
+class MicroBatcher:
+    def __init__(self, predict_fn, max_batch_size=64, max_wait_us=2000):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_us = max_wait_us
+
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.wait_us = Histogram(WAIT_US_BUCKETS)
+
+        self._loop = None
+        self._pending = []
+        self._timer = None
+        self._tasks = set()
+
+    # key picks the model (e.g. the symbol); rows for different keys never share a call
+    async def submit(self, row, key=None):
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Queue state belongs to one event loop (e.g. a fresh TestClient portal)
+            self._loop = loop
+            self._pending = []
+            self._timer = None
+
+        future = loop.create_future()
+        self._pending.append((row, key, future, time.perf_counter()))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_us / 1e6, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        # Keep a reference so the task isn't garbage collected mid-flight
+        task = self._loop.create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch):
+        started = time.perf_counter()
+        for _, _, _, queued_at in batch:
+            self.wait_us.observe((started - queued_at) * 1e6)
+
+        groups = {}
+        for item in batch:
+            groups.setdefault(item[1], []).append(item)
+
+        for key, items in groups.items():
+            self.batch_sizes.observe(len(items))
+            features = np.array([row for row, _, _, _ in items], dtype=np.float64)
+            try:
+                # New requests keep queueing while this batch runs off the event loop
+                predictions = await run_in_threadpool(self.predict_fn, features, key)
+            except Exception as e:
+                if len(items) == 1:
+                    if not items[0][2].done():
+                        items[0][2].set_exception(e)
+                    continue
+                # One bad row must not fail its neighbours: score the rows one by one
+                predictions = []
+                for row, _, _, _ in items:
+                    try:
+                        value = await run_in_threadpool(self.predict_fn, np.array([row], dtype=np.float64), key)
+                        predictions.append(value[0])
+                    except Exception as row_error:
+                        predictions.append(row_error)
+
+            for (_, _, future, _), value in zip(items, predictions):
+                # The client may have gone away (cancelled future)
+                if future.done():
+                    continue
+                if isinstance(value, Exception):
+                    future.set_exception(value)
+                else:
+                    future.set_result(float(value))
+
+    def stats(self):
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_us": self.max_wait_us,
+            "batch_size": self.batch_sizes.snapshot(),
+            "wait_us": self.wait_us.snapshot(),
+        }
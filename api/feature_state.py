@@ -0,0 +1,192 @@
+import threading
+import numpy as np
+import pandas as pd
+
+# Same windows as DataTransformation.initiate_data_transformation
+SMA_SHORT_WINDOW = 10
+SMA_LONG_WINDOW = 50
+# Volatility reuses the 10-day running sum, so the two windows must stay equal
+VOLATILITY_WINDOW = SMA_SHORT_WINDOW
+
+# Running sums drift slightly over millions of add/remove steps,
+# so every N updates they are recomputed exactly from the buffer
+RESYNC_EVERY = 1000
+
+
+# ---------------------------------------------------------
+# ROLLING STATE FOR ONE SYMBOL
+# ---------------------------------------------------------
+# A ring buffer of the last 50 closes plus running sums, so each new close
+# updates SMA_10, SMA_50 and Volatility in O(1).
+class SymbolState:
+    __slots__ = ("closes", "pos", "count", "sum_short", "sum_long", "sumsq_vol", "updates", "last_time")
+
+    def __init__(self):
+        self.closes = np.zeros(SMA_LONG_WINDOW)
+        self.pos = 0          # where the next close is written
+        self.count = 0        # closes seen (capped at the buffer size)
+        self.sum_short = 0.0
+        self.sum_long = 0.0
+        self.sumsq_vol = 0.0
+        self.updates = 0
+        self.last_time = None  # bar time of the newest close (None if unknown)
+
+    # Close that is `lag` steps back (lag=0 is the newest)
+    def _back(self, lag):
+        return self.closes[(self.pos - 1 - lag) % SMA_LONG_WINDOW]
+
+    def push(self, close):
+        # Values that fall out of each window once this close is added
+        if self.count >= SMA_SHORT_WINDOW:
+            self.sum_short -= self._back(SMA_SHORT_WINDOW - 1)
+        if self.count >= VOLATILITY_WINDOW:
+            self.sumsq_vol -= self._back(VOLATILITY_WINDOW - 1) ** 2
+        if self.count >= SMA_LONG_WINDOW:
+            self.sum_long -= self._back(SMA_LONG_WINDOW - 1)
+
+        self.closes[self.pos] = close
+        self.pos = (self.pos + 1) % SMA_LONG_WINDOW
+        self.count = min(self.count + 1, SMA_LONG_WINDOW)
+
+        self.sum_short += close
+        self.sum_long += close
+        self.sumsq_vol += close * close
+
+        self.updates += 1
+        if self.updates % RESYNC_EVERY == 0:
+            self.resync()
+
+    # Swaps the newest close for a new value of the same bar (e.g. a refreshed intraday price)
+    def replace_last(self, close):
+        old = self._back(0)
+        self.closes[(self.pos - 1) % SMA_LONG_WINDOW] = close
+        # The newest close is inside every window, so each sum just swaps old for new
+        self.sum_short += close - old
+        self.sum_long += close - old
+        self.sumsq_vol += close * close - old * old
+
+    # Recompute the running sums exactly from the buffer
+    def resync(self):
+        recent = [self._back(lag) for lag in range(self.count)]
+        self.sum_short = float(np.sum(recent[:SMA_SHORT_WINDOW]))
+        self.sum_long = float(np.sum(recent[:SMA_LONG_WINDOW]))
+        self.sumsq_vol = float(np.sum(np.square(recent[:VOLATILITY_WINDOW])))
+
+    @classmethod
+    def from_closes(cls, closes, last_time=None):
+        state = cls()
+        state.last_time = last_time
+        tail = np.asarray(closes, dtype=np.float64)[-SMA_LONG_WINDOW:]
+        state.closes[:len(tail)] = tail
+        state.count = len(tail)
+        state.pos = len(tail) % SMA_LONG_WINDOW
+        state.resync()
+        return state
+
+    def closes_needed(self):
+        return SMA_LONG_WINDOW - self.count
+
+    # Features for the newest close, or None while the 50-day window is filling up
+    def features(self):
+        if self.count < SMA_LONG_WINDOW:
+            return None
+
+        n = VOLATILITY_WINDOW
+        mean = self.sum_short / SMA_SHORT_WINDOW
+        # Sample variance (ddof=1), same as pandas rolling().std()
+        variance = max((self.sumsq_vol - self.sum_short * self.sum_short / n) / (n - 1), 0.0)
+
+        return {
+            "Close": float(self._back(0)),
+            "SMA_10": mean,
+            "SMA_50": self.sum_long / SMA_LONG_WINDOW,
+            "Volatility": float(np.sqrt(variance)),
+        }
+
+
+# Bar times are compared as naive UTC timestamps (dates from the CSV have no time zone)
+def bar_time(value):
+    stamp = pd.Timestamp(value)
+    if stamp.tzinfo is not None:
+        stamp = stamp.tz_convert("UTC").tz_localize(None)
+    return stamp
+
+
+# ---------------------------------------------------------
+# STATE FOR ALL SYMBOLS
+# ---------------------------------------------------------
+# The state lives in this process only: every uvicorn worker keeps (and seeds) its
+# own copy, so run one worker, or route each symbol to one worker, if clients
+# rely on /predict/{symbol} seeing every close they posted.
+class FeatureStateStore:
+    def __init__(self, seed_fn=None):
+        # seed_fn() -> DataFrame with 'symbol' and 'Close' columns in date order
+        self.seed_fn = seed_fn
+        self.states = {}
+        self._lock = threading.Lock()
+        self._seed_lock = threading.Lock()
+        self._seeded = seed_fn is None
+
+    # Bulk seeding: one groupby over the history, only the last 50 closes are kept per symbol.
+    # With a Date column the newest bar time is kept too, so re-sent closes aren't appended again.
+    def seed_from_frame(self, df):
+        groups = df.groupby("symbol", sort=False)
+        tails = groups["Close"].apply(lambda s: s.to_numpy()[-SMA_LONG_WINDOW:])
+        last_times = groups["Date"].last() if "Date" in df.columns else None
+        with self._lock:
+            for symbol, closes in tails.items():
+                last_time = None if last_times is None else last_times.get(symbol)
+                last_time = None if last_time is None or pd.isna(last_time) else bar_time(last_time)
+                self.states[str(symbol).upper()] = SymbolState.from_closes(closes, last_time)
+        return len(tails)
+
+    def _ensure_seeded(self):
+        if self._seeded:
+            return
+        with self._seed_lock:
+            if self._seeded:
+                return
+            count = self.seed_from_frame(self.seed_fn())
+            self._seeded = True
+        print(f"Seeded rolling feature state for {count} symbol(s)")
+
+    # Applies the close of the bar at `time` and returns (features or None, closes still needed, action).
+    # Retries and repeated polls must not shift the windows, so only a newer bar is appended:
+    #   newer bar -> "appended", same bar -> "replaced" (latest price wins), older bar -> "ignored"
+    def update(self, symbol, close, time):
+        self._ensure_seeded()
+        symbol = symbol.upper()
+        time = bar_time(time)
+        with self._lock:
+            state = self.states.get(symbol)
+            if state is None:
+                state = self.states[symbol] = SymbolState()
+
+            if state.count == 0 or state.last_time is None or time > state.last_time:
+                state.push(close)
+                state.last_time = time
+                action = "appended"
+            elif time == state.last_time:
+                state.replace_last(close)
+                action = "replaced"
+            else:
+                action = "ignored"
+            return state.features(), state.closes_needed(), action
+
+    def __len__(self):
+        return len(self.states)
+
+
+# Reads the raw price history (data/data.csv has no symbol column -> default symbol)
+def load_seed_history(data_path, default_symbol):
+    df = pd.read_csv(data_path)
+    if "symbol" not in df.columns:
+        df["symbol"] = default_symbol
+
+    date_col = "Date" if "Date" in df.columns else "Datetime"
+    if date_col in df.columns:
+        df[date_col] = pd.to_datetime(df[date_col])
+        df = df.sort_values(["symbol", date_col], kind="stable")
+        return df[["symbol", "Close", date_col]].rename(columns={date_col: "Date"})
+
+    return df[["symbol", "Close"]]
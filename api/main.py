@@ -1,10 +1,23 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-import joblib
-import pandas as pd
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse
+from pydantic import BaseModel, ValidationError
+from typing import Optional
+from datetime import datetime
+import numpy as np
 import uvicorn
+import json
+import time
 import os
 
+from api.batching import MicroBatcher
+from api.feature_state import FeatureStateStore, load_seed_history
+from api.metrics import RequestMetricsMiddleware, observe_stage, render_histogram, render_prometheus, stage_timer
+from api.model_holder import ModelHolder
+from api.model_pool import ModelPool
+from api.prediction_cache import PredictionCache
+from api.request_log import RequestLogWriter
+
 # INITIALIZE APP
 app = FastAPI(
     title="Stock Prediction API",
@@ -12,22 +25,54 @@ app = FastAPI(
     version="1.0"
 )
 
+# REQUEST LOG + METRICS MIDDLEWARE
+# REQUEST_LOG_PATH (e.g. logs/requests.jsonl) turns on the request log. Records are
+# written by a background thread in batches and rotated by size, off the request path.
+request_log_path = os.getenv("REQUEST_LOG_PATH")
+request_log = None
+if request_log_path:
+    request_log = RequestLogWriter(
+        request_log_path,
+        max_bytes=int(os.getenv("REQUEST_LOG_MAX_BYTES", str(10 * 1024 * 1024))),
+        backup_count=int(os.getenv("REQUEST_LOG_BACKUPS", "5"))
+    )
+
+# Request counts, in-flight gauge and end-to-end latency for every route
+app.add_middleware(RequestMetricsMiddleware, request_log=request_log)
+
 # LOAD ARTIFACTS (Model & Scaler)
 curr_dir = os.path.dirname(os.path.realpath(__file__))
 
 # Going up one level from 'api/' to root, then into 'artifacts/'
 artifact_path = os.path.join(curr_dir, "..", "models")
 
-model_path = os.path.join(artifact_path, "model.pkl")
-scaler_path = os.path.join(artifact_path, "scaler.pkl")
+# The symbol the root models/ artifacts were trained on
+default_symbol = os.getenv("DEFAULT_SYMBOL", "GOOGL")
 
-# Fail fast if files are missing
-if not os.path.exists(model_path):
-    raise RuntimeError(f"Model not found at {model_path}. Did you train it?")
+holder_settings = {
+    "mmap_mode": os.getenv("MODEL_MMAP_MODE", "r") or None,
+    "reload_interval": float(os.getenv("MODEL_RELOAD_INTERVAL", "30")),
+    # sklearn's compiled tree loops beat the NumPy traversal on big batches,
+    # so batches larger than this go to model.pkl when it is available
+    "fused_max_rows": int(os.getenv("FUSED_MAX_ROWS", "500")),
+}
 
-print(f"Loading model from: {model_path}")
-model = joblib.load(model_path)
-scaler = joblib.load(scaler_path)
+# The holder loads the model on the first request (not at import), memory-maps the
+# fused predictor's arrays so uvicorn workers share them, and swaps in a retrained
+# model when models/VERSION (or the artifact files) change.
+model_holder = ModelHolder(artifact_path, **holder_settings)
+
+# Per-symbol models from models/<SYMBOL>/, loaded on first use and evicted (LRU)
+# once MODEL_POOL_BUDGET_MB is exceeded. Symbols without their own directory use
+# the default model unless MODEL_POOL_STRICT=1.
+model_pool = ModelPool(
+    artifact_path,
+    model_holder,
+    memory_budget_mb=float(os.getenv("MODEL_POOL_BUDGET_MB", "1024")),
+    strict=os.getenv("MODEL_POOL_STRICT", "0") == "1",
+    default_symbol=default_symbol,
+    **holder_settings
+)
 
 # DEFINE INPUT DATA SCHEMA
 # This forces the user to send exactly these 4 numbers
@@ -36,31 +81,362 @@ class StockRequest(BaseModel):
     SMA_10: float
     SMA_50: float
     Volatility: float
+    # Optional: routes the request to models/<symbol>/ instead of the default model
+    symbol: Optional[str] = None
+
+# Body for /predict/{symbol}: only the newest close, the server keeps the rolling window.
+# Date is the bar the close belongs to: re-sending a bar replaces its close instead of
+# appending it again, and closes of older bars are ignored.
+class PriceUpdate(BaseModel):
+    Close: float
+    Date: datetime
+
+# Column order the scaler was fitted with (also the layout of binary batch bodies)
+FEATURE_COLUMNS = ["Close", "SMA_10", "SMA_50", "Volatility"]
+
+# Upper bound on rows per /predict/batch call (protects the worker's memory)
+MAX_BATCH_ROWS = int(os.getenv("MAX_BATCH_ROWS", "100000"))
+# Body size that many rows can take, checked before anything is parsed:
+# 16 bytes per binary row, at most MAX_JSON_ROW_BYTES per JSON row
+MAX_JSON_ROW_BYTES = int(os.getenv("MAX_JSON_ROW_BYTES", "512"))
+
+
+def batch_too_large(detail):
+    return HTTPException(status_code=413, detail=f"Batch too large ({detail}, max {MAX_BATCH_ROWS} rows)")
+
+
+# Reads the request body, refusing it as soon as it is bigger than max_bytes
+# (from Content-Length when the client sent one, else while the chunks arrive)
+async def read_limited_body(request, max_bytes):
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > max_bytes:
+        raise batch_too_large(f"{declared} bytes")
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > max_bytes:
+            raise batch_too_large(f"more than {max_bytes} bytes")
+    return bytes(body)
+
+
+# Runs a (n_rows x 4) matrix through the currently loaded version of a model
+def predict_matrix(features, model_name="default"):
+    return model_pool.load(model_name).predict(features)
+
+
+# Model name for a symbol; malformed symbols are a 422, unknown symbols in strict mode a 404
+def resolve_model(symbol):
+    try:
+        return model_pool.resolve(symbol)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+
+
+# Time from the request arriving to the handler running (body read + JSON parse + pydantic)
+def observe_validation(request):
+    started_at = getattr(request.state, "started_at", None)
+    if started_at is not None:
+        observe_stage("validation", time.perf_counter() - started_at)
+
+
+# Builds the JSON response here (instead of in FastAPI) so encoding is timed as its own stage
+def respond(content):
+    with stage_timer("serialize"):
+        return JSONResponse(content)
+
+
+# Turns a JSON batch into a feature matrix, collecting errors per row instead of failing the batch
+def parse_json_rows(rows, default_symbol=None):
+    features = np.full((len(rows), len(FEATURE_COLUMNS)), np.nan)
+    symbols = [default_symbol] * len(rows)
+    errors = []
+
+    for i, row in enumerate(rows):
+        try:
+            if not isinstance(row, dict):
+                raise ValueError("Row must be a JSON object with Close, SMA_10, SMA_50 and Volatility")
+            item = StockRequest(**row)
+            features[i] = [getattr(item, col) for col in FEATURE_COLUMNS]
+            if item.symbol:
+                symbols[i] = item.symbol
+        except ValidationError as e:
+            errors.append({"index": i, "detail": e.errors(include_url=False)})
+        except ValueError as e:
+            errors.append({"index": i, "detail": str(e)})
+
+    return features, errors, symbols
+
+
+# Decodes a raw little-endian float32 body laid out row by row in FEATURE_COLUMNS order
+def parse_binary_rows(body):
+    row_bytes = 4 * len(FEATURE_COLUMNS)
+    if len(body) % row_bytes != 0:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Binary body must be a multiple of {row_bytes} bytes (float32 x {len(FEATURE_COLUMNS)} per row)"
+        )
+
+    features = np.frombuffer(body, dtype="<f4").reshape(-1, len(FEATURE_COLUMNS)).astype(np.float64)
+    return features, [], None
+
+# OPTIONAL MICRO-BATCHING
+# MICROBATCH_ENABLED=1 queues concurrent /predict calls and scores them with ONE
+# predict_matrix call, flushed after MICROBATCH_MAX_WAIT_US or at MICROBATCH_MAX_SIZE rows.
+batcher = None
+if os.getenv("MICROBATCH_ENABLED", "0") == "1":
+    batcher = MicroBatcher(
+        predict_matrix,
+        max_batch_size=int(os.getenv("MICROBATCH_MAX_SIZE", "64")),
+        max_wait_us=int(os.getenv("MICROBATCH_MAX_WAIT_US", "2000"))
+    )
+    print(f"Micro-batching enabled (max {batcher.max_batch_size} rows / {batcher.max_wait_us} us)")
+
+# ROLLING FEATURE STATE (for /predict/{symbol})
+# Per-symbol ring buffers of recent closes, seeded in bulk from the raw history
+# (FEATURE_STATE_SEED_PATH, default data/data.csv) the first time they are used.
+seed_path = os.getenv("FEATURE_STATE_SEED_PATH", os.path.join(curr_dir, "..", "data", "data.csv"))
+feature_state = FeatureStateStore(
+    seed_fn=(lambda: load_seed_history(seed_path, default_symbol)) if os.path.exists(seed_path) else None
+)
+
+
+# PREDICTION CACHE
+# Repeated feature tuples skip the model. PREDICTION_CACHE_SIZE=0 turns it off;
+# PREDICTION_CACHE_DECIMALS rounds features so near-identical inputs share an entry.
+cache_size = int(os.getenv("PREDICTION_CACHE_SIZE", "10000"))
+cache_decimals = os.getenv("PREDICTION_CACHE_DECIMALS")
+prediction_cache = None
+if cache_size > 0:
+    prediction_cache = PredictionCache(
+        max_entries=cache_size,
+        ttl_seconds=float(os.getenv("PREDICTION_CACHE_TTL", "60")),
+        decimals=int(cache_decimals) if cache_decimals else None
+    )
+
+
+# Scores one feature row with a model (cache first, then the micro-batcher when it is enabled)
+async def predict_row(row, model_name="default"):
+    version = None
+    if prediction_cache is not None:
+        # The model version is part of the key, so a hot-reload invalidates the cache
+        bundle = model_pool.current_bundle(model_name) or await run_in_threadpool(model_pool.load, model_name)
+        version = bundle.version
+        cached = prediction_cache.get(version, row, model=model_name)
+        if cached is not None:
+            return cached
+
+    # Scale + Predict (fused predictor, or scaler.transform -> model.predict)
+    if batcher is not None:
+        prediction = await batcher.submit(row, key=model_name)
+    else:
+        prediction = float((await run_in_threadpool(predict_matrix, np.array([row]), model_name))[0])
+
+    if prediction_cache is not None:
+        prediction_cache.put(version, row, prediction, model=model_name)
+    return prediction
 
 # PREDICTION ENDPOINT
 @app.post("/predict")
-def predict(data: StockRequest):
+async def predict(data: StockRequest, request: Request):
+    observe_validation(request)
+    # Convert JSON input to a single feature row
+    with stage_timer("build"):
+        row = [getattr(data, col) for col in FEATURE_COLUMNS]
+    # Pydantic accepts NaN/inf; one such row would fail every request sharing its micro-batch
+    if not np.isfinite(row).all():
+        raise HTTPException(status_code=422, detail="All features must be finite numbers")
+    model_name = resolve_model(data.symbol)
     try:
-        # Convert JSON input to DataFrame
-        df = pd.DataFrame([data.dict()])
-        
-        # Scale the data (Critical step!)
-        scaled_data = scaler.transform(df)
-        
-        # Predict
-        prediction = model.predict(scaled_data)
+        prediction = await predict_row(row, model_name)
         
-        return {
-            "predicted_price": float(prediction[0]),
+        return respond({
+            "predicted_price": float(prediction),
             "status": "success"
+        })
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# BATCH PREDICTION ENDPOINT
+# Accepts either JSON ({"rows": [...]} or a bare list of StockRequest objects)
+# or a compact application/octet-stream body of float32 values.
+# Rows are routed by their own "symbol", else {"symbol": ...} / ?symbol=... for the whole batch.
+@app.post("/predict/batch")
+async def predict_batch(request: Request):
+    content_type = request.headers.get("content-type", "")
+    binary = content_type.startswith("application/octet-stream")
+    row_bytes = 4 * len(FEATURE_COLUMNS)
+    body = await read_limited_body(request, MAX_BATCH_ROWS * (row_bytes if binary else MAX_JSON_ROW_BYTES))
+    batch_symbol = request.query_params.get("symbol")
+
+    # Decoding + per-row checks + building the matrix all count as validation here
+    with stage_timer("validation"):
+        if binary:
+            if len(body) // row_bytes > MAX_BATCH_ROWS:
+                raise batch_too_large(f"{len(body) // row_bytes} rows")
+            features, errors, symbols = parse_binary_rows(body)
+            symbols = [batch_symbol] * len(features)
+        else:
+            try:
+                payload = json.loads(body)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Body is not valid JSON")
+
+            rows = payload.get("rows") if isinstance(payload, dict) else payload
+            if not isinstance(rows, list):
+                raise HTTPException(status_code=422, detail="Expected a list of rows or {\"rows\": [...]}")
+
+            if len(rows) > MAX_BATCH_ROWS:
+                raise batch_too_large(f"{len(rows)} rows")
+
+            if isinstance(payload, dict) and payload.get("symbol"):
+                batch_symbol = str(payload["symbol"])
+            features, errors, symbols = parse_json_rows(rows, batch_symbol)
+
+    # NaN/inf would poison the model output, so report them as row errors too
+    bad_rows = {e["index"] for e in errors}
+    for i in np.flatnonzero(~np.isfinite(features).all(axis=1)):
+        if int(i) not in bad_rows:
+            errors.append({"index": int(i), "detail": "All features must be finite numbers"})
+    errors.sort(key=lambda e: e["index"])
+
+    valid = np.isfinite(features).all(axis=1)
+    predictions = [None] * len(features)
+
+    # Group the valid rows by the model that serves them
+    groups = {}
+    for i in np.flatnonzero(valid):
+        try:
+            model_name = model_pool.resolve(symbols[i])
+        except (KeyError, ValueError) as e:
+            errors.append({"index": int(i), "detail": str(e.args[0])})
+            continue
+        groups.setdefault(model_name, []).append(int(i))
+    errors.sort(key=lambda e: e["index"])
+
+    try:
+        for model_name, indices in groups.items():
+            # One scaler.transform + one model.predict per model (off the event loop)
+            preds = await run_in_threadpool(predict_matrix, features[indices], model_name)
+            for i, value in zip(indices, preds.tolist()):
+                predictions[i] = value
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return respond({
+        "predictions": predictions,
+        "errors": errors,
+        "count": len(predictions),
+        "status": "success"
+    })
+
+# PREDICT FROM THE LATEST PRICE ONLY
+# The client posts just today's Close; SMA_10, SMA_50 and Volatility are
+# computed server-side with the same windows as the training pipeline.
+@app.post("/predict/{symbol}")
+async def predict_symbol(symbol: str, data: PriceUpdate, request: Request):
+    observe_validation(request)
+    if not np.isfinite(data.Close):
+        raise HTTPException(status_code=422, detail="Close must be a finite number")
+    model_name = resolve_model(symbol)
+
+    # Updating the rolling window is this route's "build" step
+    with stage_timer("build"):
+        features, closes_needed, action = await run_in_threadpool(feature_state.update, symbol, data.Close, data.Date)
+
+    # Not enough history yet for the 50-day average
+    if features is None:
+        return {
+            "symbol": symbol.upper(),
+            "predicted_price": None,
+            "closes_needed": closes_needed,
+            "update": action,
+            "status": "warming_up"
         }
+
+    try:
+        prediction = await predict_row([features[col] for col in FEATURE_COLUMNS], model_name)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    return respond({
+        "symbol": symbol.upper(),
+        "features": features,
+        "predicted_price": float(prediction),
+        "update": action,
+        "status": "success"
+    })
+
+# MICRO-BATCHING STATS (batch-size and queue-wait distributions for tuning)
+@app.get("/stats/batching")
+def batching_stats():
+    if batcher is None:
+        return {"enabled": False}
+    return {"enabled": True, **batcher.stats()}
+
+# PREDICTION CACHE STATS (hits, misses, evictions, memory)
+@app.get("/stats/cache")
+def cache_stats():
+    if prediction_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **prediction_cache.stats()}
+
+# MODEL POOL STATS (resident models, memory per model, load latency)
+@app.get("/stats/models")
+def model_stats():
+    return {"default": model_holder.health(), **model_pool.stats()}
+
+# PROMETHEUS METRICS
+# Per-stage latency histograms, request counts, in-flight gauge, plus the
+# micro-batcher, prediction cache, request log and model state.
+@app.get("/metrics")
+def metrics():
+    lines = []
+
+    if batcher is not None:
+        lines += ["# HELP api_microbatch_size Rows scored per micro-batch.", "# TYPE api_microbatch_size histogram"]
+        lines += render_histogram("api_microbatch_size", batcher.batch_sizes)
+        lines += ["# HELP api_microbatch_wait_microseconds Queue wait before a row is scored.",
+                  "# TYPE api_microbatch_wait_microseconds histogram"]
+        lines += render_histogram("api_microbatch_wait_microseconds", batcher.wait_us)
+
+    if prediction_cache is not None:
+        cache = prediction_cache.stats()
+        for key in ("hits", "misses", "evictions", "expirations", "invalidations"):
+            lines += [f"# TYPE api_prediction_cache_{key}_total counter", f"api_prediction_cache_{key}_total {cache[key]}"]
+        lines += ["# TYPE api_prediction_cache_entries gauge", f"api_prediction_cache_entries {cache['size']}"]
+        lines += ["# TYPE api_prediction_cache_memory_bytes gauge", f"api_prediction_cache_memory_bytes {cache['memory_bytes']}"]
+
+    if request_log is not None:
+        log_stats = request_log.stats()
+        lines += ["# TYPE api_request_log_written_total counter", f"api_request_log_written_total {log_stats['written']}"]
+        lines += ["# TYPE api_request_log_dropped_total counter", f"api_request_log_dropped_total {log_stats['dropped']}"]
+        lines += ["# TYPE api_request_log_queued gauge", f"api_request_log_queued {log_stats['queued']}"]
+
+    pool = model_pool.stats()
+    lines += ["# TYPE api_model_pool_resident_bytes gauge",
+              f"api_model_pool_resident_bytes {pool['resident_mb'] * 1024 * 1024:.0f}"]
+    lines += ["# TYPE api_model_pool_evictions_total counter", f"api_model_pool_evictions_total {pool['evictions']}"]
+    lines += ["# TYPE api_model_memory_bytes gauge"]
+    lines += [f'api_model_memory_bytes{{symbol="{m["symbol"]}"}} {m["memory_mb"] * 1024 * 1024:.0f}' for m in pool["models"]]
+    lines += ["# TYPE api_model_load_seconds gauge"]
+    lines += [f'api_model_load_seconds{{symbol="{m["symbol"]}"}} {m["load_seconds"]}'
+              for m in pool["models"] if m["load_seconds"] is not None]
+
+    model_info = model_holder.health()
+    lines += ["# TYPE api_model_loaded gauge", f"api_model_loaded {int(model_info['loaded'])}"]
+    lines += ["# TYPE api_model_reloads_total counter", f"api_model_reloads_total {model_info['reloads']}"]
+    if "rss_mb" in model_info["memory"]:
+        lines += ["# TYPE process_resident_memory_bytes gauge",
+                  f"process_resident_memory_bytes {model_info['memory']['rss_mb'] * 1024 * 1024:.0f}"]
+
+    return PlainTextResponse(render_prometheus(lines), media_type="text/plain; version=0.0.4")
+
 # HEALTH CHECK (For Railway/Docker)
 @app.get("/")
 def health_check():
-    return {"status": "ok", "message": "Stock API is running"}
+    return {"status": "ok", "message": "Stock API is running", "model": model_holder.health()}
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
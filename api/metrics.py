@@ -0,0 +1,239 @@
+import bisect
+import threading
+import time
+
+# ---------------------------------------------------------
+# SMALL IN-PROCESS METRICS
+# ---------------------------------------------------------
+# Fixed-bucket histograms, counters and gauges (Prometheus style) so we can look
+# at distributions without pulling in an extra dependency. render_prometheus()
+# turns everything registered here into the text format served on /metrics.
+
+# Seconds: 25us ... 2.5s (covers fused predictor calls up to big sklearn batches)
+LATENCY_BUCKETS_SECONDS = [0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025,
+                           0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5]
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = sorted(buckets)
+        # One counter per bucket + one for "+Inf"
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        # First bucket whose upper bound holds the value
+        index = bisect.bisect_left(self.buckets, value)
+
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    # Estimated quantile: upper bound of the bucket that holds it
+    def quantile(self, q, counts=None, total=None):
+        counts = self.counts if counts is None else counts
+        total = self.count if total is None else total
+        if total == 0:
+            return None
+
+        rank = q * total
+        running = 0
+        for bound, n in zip(self.buckets + [float("inf")], counts):
+            running += n
+            if running >= rank:
+                return bound
+        return float("inf")
+
+    def snapshot(self):
+        with self._lock:
+            counts = list(self.counts)
+            total = self.count
+            value_sum = self.sum
+
+        # Cumulative counts per upper bound, like Prometheus "le" buckets
+        cumulative = {}
+        running = 0
+        for bound, n in zip(self.buckets, counts):
+            running += n
+            cumulative[str(bound)] = running
+        cumulative["+Inf"] = total
+
+        return {
+            "count": total,
+            "sum": value_sum,
+            "mean": value_sum / total if total else None,
+            "p50": self.quantile(0.50, counts, total),
+            "p90": self.quantile(0.90, counts, total),
+            "p99": self.quantile(0.99, counts, total),
+            "buckets": cumulative,
+        }
+
+
+# A metric with labels: one child value per distinct label combination
+class MetricFamily:
+    def __init__(self, name, help_text, kind, label_names=(), buckets=None):
+        self.name = name
+        self.help_text = help_text
+        self.kind = kind  # "counter" | "gauge" | "histogram"
+        self.label_names = tuple(label_names)
+        self.buckets = buckets
+        self.children = {}
+        self._lock = threading.Lock()
+
+    def _child(self, labels):
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        child = self.children.get(key)
+        if child is None:
+            with self._lock:
+                child = self.children.get(key)
+                if child is None:
+                    child = Histogram(self.buckets) if self.kind == "histogram" else [0.0]
+                    self.children[key] = child
+        return child
+
+    def inc(self, amount=1, **labels):
+        child = self._child(labels)
+        with self._lock:
+            child[0] += amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        child = self._child(labels)
+        with self._lock:
+            child[0] = value
+
+    def observe(self, value, **labels):
+        self._child(labels).observe(value)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in list(self.children.items()):
+            labels = dict(zip(self.label_names, key))
+            if self.kind == "histogram":
+                lines.extend(render_histogram(self.name, child, labels))
+            else:
+                lines.append(f"{self.name}{format_labels(labels)} {child[0]}")
+        return lines
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    parts = []
+    for name, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{name}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def render_histogram(name, histogram, labels=None):
+    labels = labels or {}
+    snapshot = histogram.snapshot()
+    lines = []
+    for bound, count in snapshot["buckets"].items():
+        lines.append(f"{name}_bucket{format_labels({**labels, 'le': bound})} {count}")
+    lines.append(f"{name}_sum{format_labels(labels)} {snapshot['sum']}")
+    lines.append(f"{name}_count{format_labels(labels)} {snapshot['count']}")
+    return lines
+
+
+# ---------------------------------------------------------
+# API METRICS
+# ---------------------------------------------------------
+REQUESTS_TOTAL = MetricFamily(
+    "api_requests_total", "HTTP requests by route and status.", "counter", ("method", "path", "status"))
+REQUESTS_IN_FLIGHT = MetricFamily(
+    "api_requests_in_flight", "HTTP requests currently being handled.", "gauge")
+REQUEST_DURATION = MetricFamily(
+    "api_request_duration_seconds", "End-to-end request latency.", "histogram", ("path",),
+    buckets=LATENCY_BUCKETS_SECONDS)
+# stage: validation | build | scale | predict | serialize
+# engine: "fused" (scale + trees in one call, recorded as predict) or "sklearn"
+STAGE_DURATION = MetricFamily(
+    "api_stage_duration_seconds", "Latency of each step of a prediction.", "histogram", ("stage", "engine"),
+    buckets=LATENCY_BUCKETS_SECONDS)
+
+REGISTRY = [REQUESTS_TOTAL, REQUESTS_IN_FLIGHT, REQUEST_DURATION, STAGE_DURATION]
+
+
+def observe_stage(stage, seconds, engine=""):
+    STAGE_DURATION.observe(seconds, stage=stage, engine=engine)
+
+
+# Times a block:  with stage_timer("scale", "sklearn"): ...
+class stage_timer:
+    __slots__ = ("stage", "engine", "started")
+
+    def __init__(self, stage, engine=""):
+        self.stage = stage
+        self.engine = engine
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe_stage(self.stage, time.perf_counter() - self.started, self.engine)
+        return False
+
+
+def render_prometheus(extra_lines=()):
+    lines = []
+    for family in REGISTRY:
+        lines.extend(family.render())
+    lines.extend(extra_lines)
+    return "\n".join(lines) + "\n"
+
+
+# ---------------------------------------------------------
+# ASGI MIDDLEWARE: request counts, in-flight gauge, latency, request log
+# ---------------------------------------------------------
+# Plain ASGI (not BaseHTTPMiddleware) so it adds almost nothing to the request path.
+class RequestMetricsMiddleware:
+    def __init__(self, app, request_log=None):
+        self.app = app
+        self.request_log = request_log
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        # Handlers read this as request.state.started_at to time validation
+        scope.setdefault("state", {})["started_at"] = started
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            elapsed = time.perf_counter() - started
+
+            # Use the route template (/predict/{symbol}) to keep label cardinality low
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+
+            REQUESTS_TOTAL.inc(method=scope["method"], path=path, status=status["code"])
+            REQUEST_DURATION.observe(elapsed, path=path)
+
+            if self.request_log is not None:
+                self.request_log.write({
+                    "ts": time.time(),
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "route": path,
+                    "status": status["code"],
+                    "duration_ms": round(elapsed * 1000, 3),
+                })
@@ -0,0 +1,246 @@
+import os
+import sys
+import threading
+import time
+import joblib
+import pandas as pd
+
+from api.metrics import stage_timer
+from src.fused_predictor import FusedPredictor
+
+
+# ---------------------------------------------------------
+# PROCESS MEMORY (for the health endpoint)
+# ---------------------------------------------------------
+def process_memory_mb():
+    # Linux: split resident memory into private (anon) and file-backed pages.
+    # File-backed pages include memory-mapped model arrays shared by all workers.
+    try:
+        memory = {}
+        with open("/proc/self/status") as status:
+            for line in status:
+                key, _, value = line.partition(":")
+                if key in ("VmRSS", "RssAnon", "RssFile"):
+                    memory[key] = int(value.split()[0]) / 1024
+        return {
+            "rss_mb": round(memory.get("VmRSS", 0.0), 2),
+            "rss_private_mb": round(memory.get("RssAnon", 0.0), 2),
+            "rss_file_backed_mb": round(memory.get("RssFile", 0.0), 2),
+        }
+    except OSError:
+        # Other platforms: only the peak is available
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # macOS reports bytes, Linux reports KB
+        peak_mb = peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+        return {"peak_rss_mb": round(peak_mb, 2)}
+
+
+# (inode, mtime, size) of a file; os.replace() during a retrain changes all three
+def file_stamp(path):
+    try:
+        stat = os.stat(path)
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return None
+
+
+# ---------------------------------------------------------
+# ONE LOADED VERSION OF THE MODEL
+# ---------------------------------------------------------
+# A bundle is never mutated after a swap is published (except for the lazy sklearn
+# fallback), so in-flight requests keep using the bundle they started with.
+# sklearn_stamps: file stamps of model.pkl / scaler.pkl when the bundle was built
+# (None = no sklearn model for this version). The lazy load only uses files that still match.
+class ModelBundle:
+    def __init__(self, version, predictor, model_path, scaler_path, mmap_mode, fused_max_rows, load_seconds,
+                 sklearn_stamps=None):
+        self.version = version
+        self.predictor = predictor
+        self.model_path = model_path
+        self.scaler_path = scaler_path
+        self.mmap_mode = mmap_mode
+        self.fused_max_rows = fused_max_rows
+        self.load_seconds = load_seconds
+        self.loaded_at = time.time()
+
+        self.sklearn_stamps = sklearn_stamps
+
+        self.model = None
+        self.scaler = None
+        self._sklearn_lock = threading.Lock()
+
+    def _current_stamps(self):
+        return (file_stamp(self.model_path), file_stamp(self.scaler_path))
+
+    # Loads scaler.pkl + model.pkl on first use (this is what imports sklearn/xgboost).
+    # Returns (None, None) if the files were rewritten since the bundle was built: a retrain
+    # is under way, and they may not belong to this version (or to each other).
+    def load_sklearn_model(self):
+        with self._sklearn_lock:
+            if self.model is None and self.sklearn_stamps is not None:
+                print(f"Loading model from: {self.model_path}")
+                before = self._current_stamps()
+                scaler = joblib.load(self.scaler_path, mmap_mode=self.mmap_mode)
+                model = joblib.load(self.model_path, mmap_mode=self.mmap_mode)
+                if before == self.sklearn_stamps and self._current_stamps() == self.sklearn_stamps:
+                    self.model, self.scaler = model, scaler
+                else:
+                    print(f"Model files changed since version {self.version} was loaded, staying on the fused predictor.")
+                    self.sklearn_stamps = None
+        return self.model, self.scaler
+
+    # Approximate resident size: fused arrays exactly, pickled ensemble by its file size
+    def memory_bytes(self):
+        total = 0
+        if self.predictor is not None:
+            total += sum(getattr(value, "nbytes", 0) for value in self.predictor.arrays.values())
+        if self.model is not None:
+            total += os.path.getsize(self.model_path) if os.path.exists(self.model_path) else 0
+        return total
+
+    # Runs a (n_rows x 4) matrix through the scaler and the ensemble in ONE call each
+    def predict(self, features):
+        # sklearn's compiled tree loops beat the NumPy traversal on big batches,
+        # so large batches go to model.pkl when this version has one
+        model = scaler = None
+        if self.predictor is None or len(features) > self.fused_max_rows:
+            model, scaler = self.load_sklearn_model()
+        if model is None:
+            # Scaling and all trees happen in one call, so it is timed as one stage
+            with stage_timer("predict", "fused"):
+                return self.predictor.predict(features)
+
+        # Keep the column names so the scaler sees the same schema it was fitted on
+        with stage_timer("build", "sklearn"):
+            if hasattr(scaler, "feature_names_in_"):
+                features = pd.DataFrame(features, columns=list(scaler.feature_names_in_))
+        with stage_timer("scale", "sklearn"):
+            scaled_data = scaler.transform(features)
+        with stage_timer("predict", "sklearn"):
+            return model.predict(scaled_data)
+
+
+# ---------------------------------------------------------
+# MODEL HOLDER (lazy load + hot reload)
+# ---------------------------------------------------------
+class ModelHolder:
+    def __init__(self, artifact_path, mmap_mode="r", reload_interval=30.0, fused_max_rows=500):
+        self.artifact_path = artifact_path
+        self.model_path = os.path.join(artifact_path, "model.pkl")
+        self.scaler_path = os.path.join(artifact_path, "scaler.pkl")
+        self.fused_model_path = os.path.join(artifact_path, "fused_model.joblib")
+        # Written last by the trainer, so a change here means a complete new model
+        self.version_path = os.path.join(artifact_path, "VERSION")
+
+        self.mmap_mode = mmap_mode
+        self.reload_interval = reload_interval
+        self.fused_max_rows = fused_max_rows
+
+        self.bundle = None
+        self.cold_start_seconds = None
+        self.reloads = 0
+        self.last_reload_error = None
+
+        self._load_lock = threading.Lock()
+        self._watcher = None
+        self._stop = threading.Event()
+
+    # Version of what is on disk: VERSION file if the trainer wrote one, else file stamps
+    def disk_version(self):
+        if os.path.exists(self.version_path):
+            with open(self.version_path) as file_obj:
+                return file_obj.read().strip()
+
+        stamps = []
+        for path in (self.fused_model_path, self.model_path, self.scaler_path):
+            if os.path.exists(path):
+                stat = os.stat(path)
+                stamps.append(f"{os.path.basename(path)}:{stat.st_mtime_ns}:{stat.st_size}")
+        return "|".join(stamps)
+
+    def _load_bundle(self, version):
+        if not os.path.exists(self.fused_model_path) and not os.path.exists(self.model_path):
+            raise RuntimeError(f"Model not found at {self.model_path}. Did you train it?")
+
+        start = time.perf_counter()
+        predictor = None
+        if os.path.exists(self.fused_model_path):
+            print(f"Loading fused predictor from: {self.fused_model_path}")
+            predictor = FusedPredictor.load(self.fused_model_path, mmap_mode=self.mmap_mode)
+
+        # Stamped now, while the files match this version (the trainer writes VERSION last)
+        stamps = (file_stamp(self.model_path), file_stamp(self.scaler_path))
+        bundle = ModelBundle(version, predictor, self.model_path, self.scaler_path,
+                             self.mmap_mode, self.fused_max_rows, load_seconds=0.0,
+                             sklearn_stamps=None if None in stamps else stamps)
+        if predictor is None:
+            bundle.load_sklearn_model()
+            if bundle.model is None:
+                raise RuntimeError(f"Model files changed while loading {self.model_path}, try again")
+
+        bundle.load_seconds = time.perf_counter() - start
+        return bundle
+
+    # Returns the current bundle, loading it on first use
+    def get(self):
+        bundle = self.bundle
+        if bundle is not None:
+            return bundle
+
+        with self._load_lock:
+            if self.bundle is None:
+                self.bundle = self._load_bundle(self.disk_version())
+                # Time the first request waited for the model to become ready
+                self.cold_start_seconds = self.bundle.load_seconds
+                self.start_watcher()
+            return self.bundle
+
+    # Loads the new version next to the old one, then swaps the reference in one step
+    def reload_if_changed(self):
+        version = self.disk_version()
+        if self.bundle is not None and version == self.bundle.version:
+            return False
+
+        with self._load_lock:
+            try:
+                new_bundle = self._load_bundle(version)
+            except Exception as e:
+                # Keep serving the old model if the new files are broken or half-written
+                self.last_reload_error = str(e)
+                print(f"Model reload failed, keeping version {self.bundle.version if self.bundle else None}: {e}")
+                return False
+
+            self.bundle = new_bundle
+            self.reloads += 1
+            self.last_reload_error = None
+            print(f"Model swapped to version: {version}")
+            return True
+
+    def start_watcher(self):
+        if self.reload_interval <= 0 or self._watcher is not None:
+            return
+
+        def watch():
+            # wait() returns True once stop() is called (e.g. the model was evicted from the pool)
+            while not self._stop.wait(self.reload_interval):
+                self.reload_if_changed()
+
+        self._watcher = threading.Thread(target=watch, name="model-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def health(self):
+        bundle = self.bundle
+        return {
+            "loaded": bundle is not None,
+            "version": bundle.version if bundle else None,
+            "engine": None if bundle is None else ("fused" if bundle.predictor is not None else "sklearn"),
+            "cold_start_seconds": self.cold_start_seconds,
+            "load_seconds": bundle.load_seconds if bundle else None,
+            "reloads": self.reloads,
+            "last_reload_error": self.last_reload_error,
+            "memory": process_memory_mb(),
+        }
@@ -0,0 +1,127 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from api.model_holder import ModelHolder
+
+DEFAULT_MODEL = "default"
+MB = 1024 * 1024
+# Ticker-shaped names only (AAPL, BRK.B, RDS-A): no separators, no "." or ".."
+SYMBOL_PATTERN = re.compile(r"^[A-Z0-9][A-Z0-9.\-]{0,14}$")
+
+
+# ---------------------------------------------------------
+# MULTI-SYMBOL MODEL POOL
+# ---------------------------------------------------------
+# Per-symbol artifacts live in models/<SYMBOL>/ (model.pkl, scaler.pkl,
+# fused_model.joblib, VERSION). Each symbol gets its own ModelHolder, loaded on
+# first use; the holder's lock makes concurrent first requests share ONE load.
+# When the resident models exceed the memory budget, the least recently used
+# ones are evicted (requests already holding their bundle still finish).
+class ModelPool:
+    def __init__(self, artifact_path, default_holder, memory_budget_mb=1024,
+                 strict=False, default_symbol=None, **holder_kwargs):
+        self.artifact_path = artifact_path
+        self.default_holder = default_holder
+        self.memory_budget_bytes = memory_budget_mb * MB
+        # strict: unknown symbols are an error instead of using the default model
+        self.strict = strict
+        # The symbol the default (root models/) model was trained on
+        self.default_symbol = default_symbol.upper() if default_symbol else None
+        self.holder_kwargs = holder_kwargs
+
+        self._holders = OrderedDict()
+        self._last_used = {}
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    # models/<SYMBOL>/ for a validated symbol. The symbol comes from the client and the
+    # directory is unpickled, so it must never point outside artifact_path.
+    def _symbol_dir(self, symbol):
+        if not SYMBOL_PATTERN.match(symbol) or os.sep in symbol or symbol in (".", ".."):
+            raise ValueError(f"Invalid symbol '{symbol}'")
+        root = os.path.realpath(self.artifact_path)
+        path = os.path.realpath(os.path.join(root, symbol))
+        if path == root or os.path.commonpath([root, path]) != root:
+            raise ValueError(f"Invalid symbol '{symbol}'")
+        return path
+
+    # Which model serves this symbol: its own directory, or the default one.
+    # ValueError for names that aren't ticker-shaped, KeyError for unknown symbols in strict mode.
+    def resolve(self, symbol):
+        if not symbol:
+            return DEFAULT_MODEL
+        symbol = symbol.upper()
+        # Checked before any filesystem access
+        symbol_dir = self._symbol_dir(symbol)
+        if symbol in self._holders or os.path.isdir(symbol_dir):
+            return symbol
+        if symbol == self.default_symbol or not self.strict:
+            return DEFAULT_MODEL
+        raise KeyError(f"No model trained for symbol '{symbol}'")
+
+    def _holder(self, name):
+        if name == DEFAULT_MODEL:
+            return self.default_holder
+
+        with self._lock:
+            holder = self._holders.get(name)
+            if holder is None:
+                holder = ModelHolder(self._symbol_dir(name), **self.holder_kwargs)
+                self._holders[name] = holder
+            self._holders.move_to_end(name)
+            self._last_used[name] = time.time()
+        return holder
+
+    # Returns the bundle of a resolved model name, loading it on first use
+    def load(self, name):
+        bundle = self._holder(name).get()
+        if name != DEFAULT_MODEL:
+            self._enforce_budget(keep=name)
+        return bundle
+
+    # Already-loaded bundle (no I/O), or None
+    def current_bundle(self, name):
+        holder = self.default_holder if name == DEFAULT_MODEL else self._holders.get(name)
+        return holder.bundle if holder is not None else None
+
+    def resident_bytes(self):
+        total = 0
+        for holder in list(self._holders.values()):
+            if holder.bundle is not None:
+                total += holder.bundle.memory_bytes()
+        return total
+
+    def _enforce_budget(self, keep):
+        with self._lock:
+            while len(self._holders) > 1 and self.resident_bytes() > self.memory_budget_bytes:
+                name, holder = next(iter(self._holders.items()))
+                if name == keep:
+                    break
+                del self._holders[name]
+                self._last_used.pop(name, None)
+                holder.stop()
+                self.evictions += 1
+                print(f"Evicted model for {name} (memory budget {self.memory_budget_bytes / MB:.0f} MB)")
+
+    def stats(self):
+        models = []
+        for name, holder in list(self._holders.items()):
+            bundle = holder.bundle
+            models.append({
+                "symbol": name,
+                "loaded": bundle is not None,
+                "version": bundle.version if bundle else None,
+                "memory_mb": round(bundle.memory_bytes() / MB, 3) if bundle else 0.0,
+                "load_seconds": bundle.load_seconds if bundle else None,
+                "last_used": self._last_used.get(name),
+            })
+        return {
+            "resident_models": len(models),
+            "resident_mb": round(self.resident_bytes() / MB, 3),
+            "memory_budget_mb": round(self.memory_budget_bytes / MB, 3),
+            "evictions": self.evictions,
+            "models": models,
+        }
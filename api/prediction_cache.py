@@ -0,0 +1,114 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+
+# ---------------------------------------------------------
+# PREDICTION CACHE (LRU + TTL)
+# ---------------------------------------------------------
+# Dashboards keep sending the same (Close, SMA_10, SMA_50, Volatility) tuple.
+# Entries are keyed on the model + the (optionally rounded) features, and a
+# model's entries are dropped as soon as a new version of that model shows up.
+class PredictionCache:
+    def __init__(self, max_entries=10000, ttl_seconds=60.0, decimals=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # e.g. decimals=2 -> 100.004 and 100.001 share one entry
+        self.decimals = decimals
+
+        self._entries = OrderedDict()
+        # model name -> version its cached entries belong to
+        self._versions = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def make_key(self, model, row):
+        if self.decimals is None:
+            return (model,) + tuple(float(v) for v in row)
+        return (model,) + tuple(round(float(v), self.decimals) for v in row)
+
+    # Drops everything cached for an older version of this model
+    def _check_version(self, model, version):
+        known = self._versions.get(model)
+        if known == version:
+            return
+        if known is not None:
+            stale = [key for key in self._entries if key[0] == model]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += 1
+        self._versions[model] = version
+
+    def get(self, version, row, model="default"):
+        key = self.make_key(model, row)
+        with self._lock:
+            self._check_version(model, version)
+
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, version, row, value, model="default"):
+        key = self.make_key(model, row)
+        with self._lock:
+            self._check_version(model, version)
+
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+
+            # Evict least-recently-used entries past the size bound
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    # Rough memory use: one sample entry's size times the entry count
+    def memory_bytes(self):
+        with self._lock:
+            size = len(self._entries)
+            if size == 0:
+                return sys.getsizeof(self._entries)
+            key, entry = next(iter(self._entries.items()))
+
+        per_entry = (sys.getsizeof(key) + sum(sys.getsizeof(v) for v in key)
+                     + sys.getsizeof(entry) + sum(sys.getsizeof(v) for v in entry)
+                     + 100)  # OrderedDict node + hash slot
+        return sys.getsizeof(self._entries) + size * per_entry
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "decimals": self.decimals,
+            "model_versions": dict(self._versions),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "memory_bytes": self.memory_bytes(),
+        }
@@ -0,0 +1,105 @@
+import json
+import os
+import queue
+import threading
+import time
+
+
+# ---------------------------------------------------------
+# NON-BLOCKING REQUEST LOG
+# ---------------------------------------------------------
+# Requests only do a queue.put_nowait(); a background thread batches the records,
+# appends them as JSON lines and rotates the file by size
+# (requests.jsonl -> requests.jsonl.1 -> ... -> requests.jsonl.N).
+class RequestLogWriter:
+    def __init__(self, file_path, max_bytes=10 * 1024 * 1024, backup_count=5,
+                 batch_size=256, flush_interval=1.0, queue_size=10000):
+        self.file_path = file_path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self.written = 0
+        self.dropped = 0
+        self.rotations = 0
+
+        dir_path = os.path.dirname(file_path)
+        if dir_path:
+            os.makedirs(dir_path, exist_ok=True)
+
+        self._thread = threading.Thread(target=self._run, name="request-log-writer", daemon=True)
+        self._thread.start()
+
+    # Called on the request path: never blocks, drops the record if the writer is behind
+    def write(self, record):
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+
+            # Gather more records until the batch is full or the flush interval passes
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                # Logging must never take the API down
+                self.dropped += len(batch)
+                print(f"Request log write failed: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write_batch(self, batch):
+        data = "".join(json.dumps(record, default=str) + "\n" for record in batch)
+
+        if self._needs_rotation(len(data)):
+            self._rotate()
+
+        with open(self.file_path, "a") as file_obj:
+            file_obj.write(data)
+        self.written += len(batch)
+
+    def _needs_rotation(self, incoming_bytes):
+        try:
+            size = os.path.getsize(self.file_path)
+        except OSError:
+            return False
+        return size > 0 and size + incoming_bytes > self.max_bytes
+
+    def _rotate(self):
+        if self.backup_count <= 0:
+            os.remove(self.file_path)
+        else:
+            for i in range(self.backup_count - 1, 0, -1):
+                src = f"{self.file_path}.{i}"
+                if os.path.exists(src):
+                    os.replace(src, f"{self.file_path}.{i + 1}")
+            os.replace(self.file_path, f"{self.file_path}.1")
+        self.rotations += 1
+
+    # Blocks until everything queued so far is on disk (used by tests / shutdown)
+    def flush(self):
+        self._queue.join()
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "rotations": self.rotations,
+        }
@@ -0,0 +1,29 @@
+import os
+import sys
+import pandas as pd
+
+# Run from the repo root:  python benchmarks/bench_backtest.py [n_folds]
+# Walk-forward backtest over data/data.csv: model reuse between folds vs a full refit per fold.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.feature_engine import compute_features
+from src.components.backtest import BacktestConfig, run_backtest
+
+
+if __name__ == "__main__":
+    n_folds = int(sys.argv[1]) if len(sys.argv) > 1 else 250
+
+    raw = pd.read_csv(os.path.join("data", "data.csv"), parse_dates=["Date"])
+    raw["symbol"] = os.getenv("DEFAULT_SYMBOL", "GOOGL")
+    df = compute_features(raw).dropna()
+
+    window, horizon = 500, 3
+    step = max(1, (len(df) - window - horizon) // (n_folds - 1))
+
+    print(f"{len(df)} rows, window={window} step={step} horizon={horizon}, {os.cpu_count()} core(s)")
+    print(f"{'':<12} | {'folds':>6} | {'refits':>6} | {'wall (s)':>9} | {'MAE':>7} | {'worst fold':>10}")
+    for label, reuse in (("reuse", True), ("full refit", False)):
+        config = BacktestConfig(window=window, step=step, horizon=horizon, reuse=reuse)
+        _, summary = run_backtest(df, config=config)
+        print(f"{label:<12} | {summary['folds']:>6} | {summary['full_refits']:>6} | "
+              f"{summary['wall_seconds']:>9.1f} | {summary['mae']:>7.3f} | {summary['mae_worst_fold']:>10.3f}")
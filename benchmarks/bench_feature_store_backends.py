@@ -0,0 +1,77 @@
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+import pandas as pd
+import pymongo
+
+# Run from the repo root:  python benchmarks/bench_feature_store_backends.py [n_rows]
+# Always runs the SQLite backend; MongoDB is added when MONGO_URL (or localhost) answers.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.feature_store import MongoFeatureStore, SQLiteFeatureStore
+from src.utils import DB_NAME, get_mongo_uri
+
+COLUMNS = ["Date", "symbol", "Close", "SMA_10", "SMA_50", "Volatility", "Target"]
+
+
+def make_rows(n_rows, n_symbols=20):
+    rng = np.random.default_rng(0)
+    per_symbol = n_rows // n_symbols
+    dates = pd.bdate_range("1990-01-01", periods=per_symbol)
+    frames = []
+    for i in range(n_symbols):
+        close = 100 + rng.standard_normal(per_symbol).cumsum()
+        frames.append(pd.DataFrame({
+            "Date": dates, "symbol": f"SYM{i:03d}", "Close": close, "Volume": rng.integers(1_000, 1_000_000, per_symbol),
+            "SMA_10": close, "SMA_50": close, "Volatility": 1.0, "Target": close,
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def run(store, df):
+    day = df["Date"].iloc[len(df) // 40]
+    appended = df.copy()
+    appended["Target"] += 1  # every row changed -> full rewrite through the upsert path
+    return {
+        "write (new)": timed(lambda: store.write(df)),
+        "write (unchanged)": timed(lambda: store.write(df)),
+        "write (all changed)": timed(lambda: store.write(appended)),
+        "read all": timed(lambda: store.read(columns=COLUMNS)),
+        "read 1 symbol": timed(lambda: store.read(symbol="SYM007", columns=COLUMNS)),
+        "read 1 symbol, 1 year": timed(lambda: store.read(
+            symbol="SYM007", start=day, end=day + pd.DateOffset(years=1), columns=COLUMNS)),
+        "version": timed(store.version),
+    }
+
+
+if __name__ == "__main__":
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    df = make_rows(n_rows)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        results["sqlite"] = run(SQLiteFeatureStore(os.path.join(tmp_dir, "features.db")), df)
+
+    try:
+        client = pymongo.MongoClient(get_mongo_uri(), serverSelectionTimeoutMS=2000)
+        client.admin.command("ping")
+        collection = client[DB_NAME]["features_backend_bench"]
+        collection.drop()
+        results["mongo"] = run(MongoFeatureStore(collection), df)
+        collection.drop()
+    except pymongo.errors.PyMongoError as e:
+        print(f"Skipping MongoDB: {e.__class__.__name__}")
+
+    print(f"\n{n_rows} rows (seconds)")
+    backends = list(results)
+    print(f"{'operation':<24} | " + " | ".join(f"{name:>8}" for name in backends))
+    for operation in results["sqlite"]:
+        print(f"{operation:<24} | " + " | ".join(f"{results[name][operation]:>8.3f}" for name in backends))
@@ -0,0 +1,102 @@
+import os
+import sys
+import time
+import tracemalloc
+import numpy as np
+import bson
+import pandas as pd
+
+# Run from the repo root (needs a reachable MongoDB, see MONGO_URL):
+#   python benchmarks/bench_feature_store_pull.py [n_rows]
+# Seeds a scratch collection, then compares the full pull with the columnar pull.
+#
+# Without a server, --decode-only compares just the client-side decode of the same
+# raw BSON batches: pymongoarrow (straight into columns) vs decode_all (dicts per batch).
+#   python benchmarks/bench_feature_store_pull.py 1000000 --decode-only
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import src.utils as utils
+from src.utils import (DB_NAME, ensure_feature_index, get_mongo_client, pull_feature_columns,
+                       pull_from_feature_store, push_to_feature_store)
+
+BENCH_COLLECTION = "features_bench"
+COLUMNS = ["Date", "Close", "SMA_10", "SMA_50", "Volatility", "Target"]
+
+
+def make_rows(n_rows, n_symbols=100):
+    rng = np.random.default_rng(0)
+    per_symbol = n_rows // n_symbols
+    dates = pd.bdate_range("1990-01-01", periods=per_symbol)
+    frames = []
+    for i in range(n_symbols):
+        close = 100 + rng.standard_normal(per_symbol).cumsum()
+        frames.append(pd.DataFrame({
+            "Date": dates, "symbol": f"SYM{i:03d}", "Open": close, "High": close + 1, "Low": close - 1,
+            "Close": close, "Volume": rng.integers(1_000, 1_000_000, per_symbol),
+            "SMA_10": close, "SMA_50": close, "Volatility": 1.0, "Target": close,
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    df = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1024 / 1024, df.memory_usage(deep=True).sum() / 1024 / 1024, len(df)
+
+
+# Serves pre-encoded raw batches, so only the decode is measured
+class EncodedBatches:
+    def __init__(self, df, batch_size=50_000):
+        docs = df[COLUMNS].assign(Date=df["Date"].dt.to_pydatetime()).to_dict("records")
+        self.batches = [b"".join(bson.encode(doc) for doc in docs[i:i + batch_size])
+                        for i in range(0, len(docs), batch_size)]
+
+    def find_raw_batches(self, query, projection, sort=None, batch_size=None):
+        return iter(self.batches)
+
+
+def bench_decode(n_rows):
+    collection = EncodedBatches(make_rows(n_rows))
+    arrow_context = utils.PyMongoArrowContext
+    cases = [("decode_all (dicts per batch)", None)]
+    if arrow_context is not None:
+        cases.append(("pymongoarrow (columnar)", arrow_context))
+
+    print(f"{'decode':<28} | {'rows':>9} | {'time (s)':>8} | {'peak (MB)':>9} | {'frame (MB)':>10}")
+    for name, context in cases:
+        utils.PyMongoArrowContext = context
+        elapsed, peak_mb, frame_mb, rows = measure(lambda: pull_feature_columns(columns=COLUMNS, collection=collection))
+        print(f"{name:<28} | {rows:>9} | {elapsed:>8.2f} | {peak_mb:>9.1f} | {frame_mb:>10.1f}")
+    utils.PyMongoArrowContext = arrow_context
+
+
+if __name__ == "__main__":
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    if "--decode-only" in sys.argv:
+        bench_decode(n_rows)
+        sys.exit(0)
+    collection = get_mongo_client()[DB_NAME][BENCH_COLLECTION]
+
+    if collection.estimated_document_count() != n_rows:
+        print(f"Seeding {n_rows} rows into {DB_NAME}.{BENCH_COLLECTION}...")
+        collection.drop()
+        ensure_feature_index(collection)
+        push_to_feature_store(make_rows(n_rows), collection=collection)
+
+    year = pd.Timestamp("2000-01-01")
+    cases = [
+        ("full pull (list of dicts)", lambda: pull_from_feature_store(collection=collection)),
+        ("columnar, all rows", lambda: pull_feature_columns(columns=COLUMNS, collection=collection)),
+        ("columnar, 1 symbol", lambda: pull_feature_columns(symbol="SYM007", columns=COLUMNS, collection=collection)),
+        ("columnar, 1 symbol, 1 year", lambda: pull_feature_columns(
+            symbol="SYM007", start=year, end=year + pd.DateOffset(years=1), columns=COLUMNS, collection=collection)),
+    ]
+
+    print(f"{'case':<28} | {'rows':>9} | {'time (s)':>8} | {'peak (MB)':>9} | {'frame (MB)':>10}")
+    for name, fn in cases:
+        elapsed, peak_mb, frame_mb, rows = measure(fn)
+        print(f"{name:<28} | {rows:>9} | {elapsed:>8.2f} | {peak_mb:>9.1f} | {frame_mb:>10.1f}")
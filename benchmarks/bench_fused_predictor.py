@@ -0,0 +1,43 @@
+import os
+import sys
+import time
+import joblib
+import numpy as np
+import pandas as pd
+
+# Run from the repo root:  python benchmarks/bench_fused_predictor.py
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.components.model_export import compile_ensemble
+from src.fused_predictor import FusedPredictor
+
+FEATURES = ["Close", "SMA_10", "SMA_50", "Volatility"]
+
+
+def time_per_call(fn, repeats):
+    fn()  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats
+
+
+if __name__ == "__main__":
+    model = joblib.load(os.path.join("models", "model.pkl"))
+    scaler = joblib.load(os.path.join("models", "scaler.pkl"))
+    predictor = FusedPredictor(compile_ensemble(model, scaler))
+
+    rng = np.random.default_rng(0)
+    close = rng.uniform(50, 200, 10_000)
+    X = np.column_stack([close, close * 1.01, close * 0.98, rng.uniform(0.5, 8, 10_000)])
+
+    print(f"{'rows':>8} | {'sklearn (ms)':>12} | {'fused (ms)':>10} | {'speed-up':>8}")
+    for n_rows in [1, 10, 100, 1_000, 10_000]:
+        batch = X[:n_rows]
+        repeats = max(3, 2_000 // n_rows)
+
+        sklearn_time = time_per_call(
+            lambda: model.predict(scaler.transform(pd.DataFrame(batch, columns=FEATURES))), repeats)
+        fused_time = time_per_call(lambda: predictor.predict(batch), repeats)
+
+        print(f"{n_rows:>8} | {sklearn_time * 1e3:>12.3f} | {fused_time * 1e3:>10.3f} | {sklearn_time / fused_time:>7.1f}x")
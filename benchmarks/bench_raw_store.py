@@ -0,0 +1,65 @@
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+import pandas as pd
+
+# Run from the repo root:  python benchmarks/bench_raw_store.py [n_symbols]
+# Compares disk size and load time of per-symbol CSVs against the Parquet raw store.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.raw_store import RawStore
+
+
+def make_bars(n_days, rng):
+    close = 100 + rng.standard_normal(n_days).cumsum()
+    return pd.DataFrame({"Date": pd.bdate_range("2000-01-03", periods=n_days), "Close": close,
+                         "High": close + 1, "Low": close - 1, "Open": close,
+                         "Volume": rng.integers(1_000_000, 50_000_000, n_days)})
+
+
+def dir_bytes(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+if __name__ == "__main__":
+    n_symbols = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    rng = np.random.default_rng(0)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_dir = os.path.join(tmp_dir, "csv")
+        os.makedirs(csv_dir)
+        store = RawStore(os.path.join(tmp_dir, "raw_store"))
+
+        symbols = [f"SYM{i:04d}" for i in range(n_symbols)]
+        for symbol in symbols:
+            bars = make_bars(6000, rng)  # ~24 years of daily bars
+            bars.to_csv(os.path.join(csv_dir, f"{symbol}.csv"), index=False)
+            store.write(bars, symbol)
+
+        def read_csvs():
+            return pd.concat([pd.read_csv(os.path.join(csv_dir, f"{s}.csv"), parse_dates=["Date"]) for s in symbols])
+
+        def read_csvs_last_year():
+            df = read_csvs()
+            return df[df["Date"] >= "2022-01-01"]
+
+        csv_all, rows = timed(read_csvs)
+        csv_range, _ = timed(read_csvs_last_year)
+        store_all, _ = timed(store.read)
+        store_range, _ = timed(lambda: store.read(start="2022-01-01"))
+        store_one, _ = timed(lambda: store.read(symbols="SYM0007", start="2022-01-01"))
+
+        print(f"{n_symbols} symbols, {len(rows)} rows")
+        print(f"{'':<28} | {'CSV':>10} | {'Parquet':>10}")
+        print(f"{'disk (MB)':<28} | {dir_bytes(csv_dir) / 1e6:>10.1f} | {dir_bytes(store.root) / 1e6:>10.1f}")
+        print(f"{'load all (s)':<28} | {csv_all:>10.2f} | {store_all:>10.2f}")
+        print(f"{'load since 2022 (s)':<28} | {csv_range:>10.2f} | {store_range:>10.2f}")
+        print(f"{'1 symbol since 2022 (s)':<28} | {'-':>10} | {store_one:>10.3f}")
@@ -0,0 +1,63 @@
+import os
+import sys
+import time
+import resource
+import subprocess
+import tempfile
+import numpy as np
+import pandas as pd
+
+# Run from the repo root:  python benchmarks/bench_streaming_transformation.py [n_rows]
+# Writes a multi-symbol minute-bar CSV, then runs the full (read_csv -> build_features) path
+# and the streaming path in separate processes so each one's peak RSS is measured on its own.
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+
+def write_bars(path, n_rows, n_symbols=50):
+    rng = np.random.default_rng(0)
+    per_symbol = n_rows // n_symbols
+    times = pd.date_range("2015-01-02 09:30", periods=per_symbol, freq="min")
+    with open(path, "w") as file_obj:
+        file_obj.write("Datetime,symbol,Open,High,Low,Close,Volume\n")
+    for i in range(n_symbols):
+        close = 100 + rng.standard_normal(per_symbol).cumsum() * 0.05
+        pd.DataFrame({"Datetime": times, "symbol": f"SYM{i:03d}", "Open": close, "High": close + 0.1,
+                      "Low": close - 0.1, "Close": close, "Volume": rng.integers(100, 10_000, per_symbol)}
+                     ).to_csv(path, mode="a", header=False, index=False)
+
+
+def run_child(mode, csv_path):
+    from src.components.data_transformation import DataTransformation
+
+    transformation = DataTransformation()
+    start = time.perf_counter()
+    if mode == "full":
+        df = transformation.build_features(pd.read_csv(csv_path, parse_dates=["Datetime"]).set_index("Datetime"))
+        rows = len(df)
+    else:
+        # Features are computed and discarded, so only the transformation is measured
+        rows = transformation.initiate_streaming_transformation(csv_path, write_fn=lambda df: None)["rows_written"]
+    elapsed = time.perf_counter() - start
+
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"RESULT {rows} {elapsed} {peak_mb}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] in ("full", "stream"):
+        run_child(sys.argv[1], sys.argv[2])
+        sys.exit(0)
+
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = os.path.join(tmp_dir, "bars.csv")
+        print(f"Writing {n_rows} minute bars...")
+        write_bars(csv_path, n_rows)
+
+        print(f"{'path':<8} | {'rows/s':>10} | {'time (s)':>8} | {'peak RSS (MB)':>13}")
+        for mode in ("full", "stream"):
+            output = subprocess.run([sys.executable, __file__, mode, csv_path], cwd=ROOT,
+                                    capture_output=True, text=True, check=True).stdout
+            _, rows, elapsed, peak_mb = output.strip().splitlines()[-1].split()
+            print(f"{mode:<8} | {int(rows) / float(elapsed):>10.0f} | {float(elapsed):>8.2f} | {float(peak_mb):>13.0f}")
@@ -1,5 +1,11 @@
+import os
+import threading
+import numpy as np
+import pandas as pd
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Setup the Page
 st.set_page_config(page_title="Stock Price Predictor", page_icon="📈")
@@ -9,6 +15,107 @@ st.markdown("Enter the stock details below to get a next-day price prediction.")
 st.caption("Built with FastAPI + XGBoost/RF/Linear ensemble · Deployed on Railway (serverless) · CI/CD via GitHub Actions")
 
 
+# ---------------------------------------------------------
+# API SETTINGS
+# ---------------------------------------------------------
+DEFAULT_API_URL = "https://stockpredictionmlops-production-83a6.up.railway.app"
+
+
+def read_api_url():
+    # API_URL env var first, then .streamlit/secrets.toml, then the Railway deployment.
+    # Local server: API_URL=http://localhost:8000 streamlit run frontend/app.py
+    url = os.getenv("API_URL")
+    if not url:
+        try:
+            url = st.secrets.get("API_URL")
+        except Exception:
+            # No secrets file at all
+            url = None
+    return (url or DEFAULT_API_URL).rstrip("/")
+
+
+API_URL = read_api_url()
+# (connect, read) seconds: a sleeping Railway container can take a while to answer
+REQUEST_TIMEOUT = (5, float(os.getenv("API_TIMEOUT", "60")))
+# How long a prediction is reused for the same inputs (the API hot-reloads new models)
+CACHE_TTL = int(os.getenv("PREDICTION_CACHE_TTL", "600"))
+
+
+# ---------------------------------------------------------
+# KEEP-ALIVE HTTP SESSION
+# ---------------------------------------------------------
+# One session for the whole app process: the TCP + TLS connection to the API is
+# opened once and reused by every click, instead of a new handshake per request.
+@st.cache_resource
+def get_http_session():
+    session = requests.Session()
+    # Retry connection errors and "waking up" gateway errors a couple of times
+    retries = Retry(total=2, backoff_factor=0.5, status_forcelist=[502, 503, 504],
+                    allowed_methods=["GET", "POST"])
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retries)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+# ---------------------------------------------------------
+# BACKGROUND WARM-UP
+# ---------------------------------------------------------
+# Pings the health check once per browser session while the user is still typing,
+# so the container (and the model) is already awake when they click Predict.
+def start_warm_up():
+    if "warm_up" in st.session_state:
+        return st.session_state["warm_up"]
+
+    status = {"done": False, "ok": False}
+    st.session_state["warm_up"] = status
+
+    def ping():
+        try:
+            response = get_http_session().get(f"{API_URL}/", timeout=REQUEST_TIMEOUT)
+            status["ok"] = response.status_code == 200
+        except requests.RequestException:
+            status["ok"] = False
+        finally:
+            status["done"] = True
+
+    threading.Thread(target=ping, name="api-warm-up", daemon=True).start()
+    return status
+
+
+warm_up = start_warm_up()
+
+
+# ---------------------------------------------------------
+# CACHED API CALLS
+# ---------------------------------------------------------
+# The same inputs return the stored answer instantly (no round trip).
+# Failed calls raise, and Streamlit never caches an exception.
+@st.cache_data(ttl=CACHE_TTL, max_entries=256, show_spinner=False)
+def predict_one(api_url, close_price, sma_10, sma_50, volatility):
+    payload = {"Close": close_price, "SMA_10": sma_10, "SMA_50": sma_50, "Volatility": volatility}
+    response = get_http_session().post(f"{api_url}/predict", json=payload, timeout=REQUEST_TIMEOUT)
+    if response.status_code != 200:
+        raise RuntimeError(f"Error: {response.text}")
+    return float(response.json()["predicted_price"])
+
+
+# All grid points go out in ONE /predict/batch call instead of one request per point
+@st.cache_data(ttl=CACHE_TTL, max_entries=64, show_spinner=False)
+def predict_grid(api_url, rows):
+    payload = {"rows": [dict(row) for row in rows]}
+    response = get_http_session().post(f"{api_url}/predict/batch", json=payload, timeout=REQUEST_TIMEOUT)
+    if response.status_code != 200:
+        raise RuntimeError(f"Error: {response.text}")
+    return response.json()
+
+
+def spinner_text():
+    if warm_up["done"]:
+        return "Calculating..."
+    return "Waking up the model... (first request may take a few seconds)"
+
+
 # User Inputs
 col1, col2 = st.columns(2)
 
@@ -16,28 +123,48 @@ col1, col2 = st.columns(2)
 # columns for input fields
 with col1:
     close_price = st.number_input(
-        "Current Price ($)", 
+        "Current Price ($)",
         value=100.0,
         help="The price the stock closed at yesterday."
     )
     sma_10 = st.number_input(
-        "Short-Term Trend (10 Days)", 
+        "Short-Term Trend (10 Days)",
         value=100.0,
         help="The average price over the last 10 days. (Technical: SMA_10)"
     )
 
 with col2:
     sma_50 = st.number_input(
-        "Long-Term Trend (50 Days)", 
+        "Long-Term Trend (50 Days)",
         value=100.0,
         help="The average price over the last 50 days. (Technical: SMA_50)"
     )
     volatility = st.number_input(
-        "Market Risk / Volatility", 
+        "Market Risk / Volatility",
         value=2.5,
         help="How much the price is jumping up and down. Higher numbers mean more risk."
     )
 
+inputs = {"Close": close_price, "SMA_10": sma_10, "SMA_50": sma_50, "Volatility": volatility}
+
+# Single prediction, or a curve of predictions while one input moves over a range
+mode = st.radio("Mode", ["Single prediction", "What-if"], horizontal=True)
+
+if mode == "What-if":
+    labels = {"Volatility": "Market Risk / Volatility", "Close": "Current Price ($)",
+              "SMA_10": "Short-Term Trend (10 Days)", "SMA_50": "Long-Term Trend (50 Days)"}
+    sweep_column = st.selectbox("Input to vary", list(labels), format_func=labels.get)
+
+    # Default range: 0 .. 2x the current value (e.g. volatility 0 to 5)
+    current = float(inputs[sweep_column])
+    w1, w2, w3 = st.columns(3)
+    with w1:
+        low = st.number_input("From", value=0.0 if sweep_column == "Volatility" else current * 0.5)
+    with w2:
+        high = st.number_input("To", value=max(current * 2, 1.0))
+    with w3:
+        points = st.number_input("Points", min_value=2, max_value=200, value=25, step=1)
+
 
 # The Centered "Predict" Button
 # create 3 columns: [Empty space] [Button] [Empty space]
@@ -47,35 +174,35 @@ c1, c2, c3 = st.columns([1, 2, 1])
 with c2:
     # use_container_width=True makes the button fill the middle column
     predict_btn = st.button("Analyze & Predict Price", use_container_width=True)
-    
+
 # The "Predict" Button
-if predict_btn:
-    # Prepare the data payload 
-    payload = {
-        "Close": close_price,
-        "SMA_10": sma_10,
-        "SMA_50": sma_50,
-        "Volatility": volatility
-    }
-
-    # Define API URL
-    API_URL = "https://stockpredictionmlops-production-83a6.up.railway.app/predict"  
+if predict_btn and mode == "Single prediction":
+    try:
+        with st.spinner(spinner_text()):
+            prediction = predict_one(API_URL, close_price, sma_10, sma_50, volatility)
+        st.success(f"💰 Predicted Price: ${prediction:.2f}")
+    except RuntimeError as e:
+        st.error(str(e))
+    except Exception as e:
+        st.error(f"Connection Failed: {e}")
+
+elif predict_btn and mode == "What-if":
+    grid = np.linspace(low, high, int(points))
+    # Tuples of (column, value) pairs so the whole grid can be the cache key
+    rows = tuple(tuple({**inputs, sweep_column: float(value)}.items()) for value in grid)
 
     try:
-        # Send the request
-        # with st.spinner("Calculating..."):
-        #     response = requests.post(API_URL, json=payload)
-        with st.spinner("Waking up the model... (first request may take a few seconds)"):
-         response = requests.post(API_URL, json=payload)
-            
-        # Handle the response
-        if response.status_code == 200:
-            data = response.json()
-            prediction = data["predicted_price"]
-            st.success(f"💰 Predicted Price: ${prediction:.2f}")
-        else:
-            st.error(f"Error: {response.text}")
-            
+        with st.spinner(spinner_text()):
+            data = predict_grid(API_URL, rows)
+
+        curve = pd.DataFrame({sweep_column: grid, "Predicted Price": data["predictions"]})
+        # Rows the API rejected come back as None: drop them instead of failing the chart
+        curve = curve.dropna()
+        st.line_chart(curve, x=sweep_column, y="Predicted Price")
+        if data.get("errors"):
+            st.warning(f"{len(data['errors'])} grid points were rejected: {data['errors'][0]['detail']}")
+    except RuntimeError as e:
+        st.error(str(e))
     except Exception as e:
         st.error(f"Connection Failed: {e}")
 
@@ -90,4 +217,4 @@ st.markdown(
     </div>
     """,
     unsafe_allow_html=True
-)
\ No newline at end of file
+)
@@ -0,0 +1,302 @@
+import os
+import json
+import math
+import time
+import multiprocessing
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+
+from src.utils import save_text
+from src.components.ensemble_training import (DEFAULT_ENSEMBLE_PARAMS, ENSEMBLE_MEMBERS, FEATURE_COLUMNS,
+                                              TARGET_COLUMN, LinearSufficientStats, build_member,
+                                              continue_boosting, refresh_forest)
+
+
+@dataclass
+class BacktestConfig:
+    # Sizes are in trading days: train on `window` days, predict the next `horizon`, move by `step`
+    window: int = int(os.getenv("BACKTEST_WINDOW", "500"))
+    step: int = int(os.getenv("BACKTEST_STEP", "5"))
+    horizon: int = int(os.getenv("BACKTEST_HORIZON", "5"))
+    # BACKTEST_EXPANDING=1: every fold trains on all days before its test days
+    expanding: bool = os.getenv("BACKTEST_EXPANDING", "0") == "1"
+
+    # Worker processes (each runs a chunk of consecutive folds)
+    n_jobs: int = int(os.getenv("BACKTEST_JOBS", "0")) or os.cpu_count()
+    # Every fold is refitted from scratch by default (exactly what ModelTrainer ships).
+    # BACKTEST_REUSE=1 updates the previous fold's models instead: much faster, but the
+    # scores are approximate (pessimistic) and the summary is flagged as such
+    reuse: bool = os.getenv("BACKTEST_REUSE", "0") == "1"
+    # Full refit every N folds; the folds in between update the previous fold's models
+    refit_every: int = int(os.getenv("BACKTEST_REFIT_EVERY", "10"))
+    # Per update: share of the RF trees refitted on the new window, and extra XGB
+    # rounds as a share of xgb n_estimators (smaller = faster but staler models)
+    rf_refresh_share: float = float(os.getenv("BACKTEST_RF_REFRESH", "0.25"))
+    xgb_rounds_share: float = float(os.getenv("BACKTEST_XGB_ROUNDS", "0.25"))
+
+    report_file_path: str = os.path.join("data", "backtest", "folds.csv")
+    summary_file_path: str = os.path.join("data", "backtest", "summary.json")
+
+
+# ---------------------------------------------------------
+# FOLDS
+# ---------------------------------------------------------
+# Each fold is (train_start, train_end, test_start, test_end) in day positions, end exclusive.
+def make_folds(n_periods, window, step, horizon, expanding=False):
+    if window <= 0 or step <= 0 or horizon <= 0:
+        raise ValueError("window, step and horizon must be positive")
+
+    folds = []
+    train_end = window
+    while train_end + horizon <= n_periods:
+        train_start = 0 if expanding else train_end - window
+        folds.append((train_start, train_end, train_end, train_end + horizon))
+        train_end += step
+    return folds
+
+
+# Row where each day starts (rows are sorted by date; several symbols can share a day)
+def period_bounds(dates):
+    dates = np.asarray(dates)
+    starts = np.flatnonzero(np.r_[True, dates[1:] != dates[:-1]])
+    return np.r_[starts, len(dates)]
+
+
+# ---------------------------------------------------------
+# ENSEMBLE THAT CAN MOVE WITH THE WINDOW
+# ---------------------------------------------------------
+# fit():    full refit of the scaler + LR + RF + XGB on the window (same as ModelTrainer)
+# update(): carries the previous fold's models forward to the new window:
+#   - LR: sufficient statistics, exact for the new window
+#   - RF: warm start adds `rf_refresh` trees fitted on the new window and drops the oldest
+#   - XGB: `xgb_rounds` more boosting rounds on the new window from the previous booster
+#   - scaler: kept from the last full refit (every member is invariant to feature scaling)
+class WalkForwardEnsemble:
+    def __init__(self, params, n_jobs=1, rf_refresh=1, xgb_rounds=1, seed=42):
+        self.params = params
+        self.n_jobs = n_jobs
+        self.rf_refresh = rf_refresh
+        self.xgb_rounds = xgb_rounds
+        self.seed = seed
+        self.updates = 0
+
+    def _scale(self, X):
+        return (X - self.mean) / self.scale
+
+    def fit(self, X, y):
+        # Same statistics as StandardScaler (population std, zero std -> 1)
+        self.mean = X.mean(axis=0)
+        scale = X.std(axis=0)
+        self.scale = np.where(scale == 0, 1.0, scale)
+        Xs = self._scale(X)
+
+        self.lr_stats = LinearSufficientStats(X.shape[1])
+        self.lr_stats.add(Xs, y)
+        self.rf = build_member("rf", self.params.get("rf"), self.n_jobs).fit(Xs, y)
+        self.xgb = build_member("xgb", self.params.get("xgb"), self.n_jobs).fit(Xs, y)
+        self.updates = 0
+        return self
+
+    def update(self, X, y, X_added, y_added, X_removed, y_removed):
+        Xs = self._scale(X)
+        self.updates += 1
+
+        self.lr_stats.add(self._scale(X_added), y_added)
+        if len(X_removed):
+            self.lr_stats.remove(self._scale(X_removed), y_removed)
+
+        if self.rf_refresh > 0:
+            self.rf = refresh_forest(self.rf, Xs, y, self.rf_refresh, seed=self.seed + self.updates)
+        if self.xgb_rounds > 0:
+            self.xgb = continue_boosting(self.xgb, Xs, y, self.xgb_rounds, self.params.get("xgb"), self.n_jobs)
+        return self
+
+    def predict_members(self, X):
+        Xs = self._scale(X)
+        coef, intercept = self.lr_stats.solve()
+        return {
+            "lr": Xs @ coef + intercept,
+            "rf": self.rf.predict(Xs),
+            "xgb": self.xgb.predict(Xs),
+        }
+
+
+def fold_metrics(y_true, y_pred):
+    error = y_pred - y_true
+    metrics = {
+        "mae": float(np.mean(np.abs(error))),
+        "rmse": float(np.sqrt(np.mean(error ** 2))),
+        "r2": float("nan"),
+    }
+    # R2 needs some spread in the test days
+    total = np.sum((y_true - y_true.mean()) ** 2)
+    if len(y_true) > 1 and total > 0:
+        metrics["r2"] = float(1 - np.sum(error ** 2) / total)
+    return metrics
+
+
+# ---------------------------------------------------------
+# ONE CHUNK OF CONSECUTIVE FOLDS (runs in a worker process)
+# ---------------------------------------------------------
+# `folds` are row ranges into X/y. The first fold is a full fit; the rest update
+# the previous fold's models unless reuse is off.
+def run_fold_chunk(X, y, folds, fold_ids, params, reuse=True, rf_refresh=1, xgb_rounds=1, n_jobs=1):
+    model = WalkForwardEnsemble(params, n_jobs=n_jobs, rf_refresh=rf_refresh, xgb_rounds=xgb_rounds,
+                                seed=42 + fold_ids[0])
+    results = []
+    previous = None
+
+    for fold_id, (train_start, train_end, test_start, test_end) in zip(fold_ids, folds):
+        X_train, y_train = X[train_start:train_end], y[train_start:train_end]
+
+        started = time.perf_counter()
+        if reuse and previous is not None:
+            prev_start, prev_end = previous
+            # Rows that entered and left the window since the previous fold
+            model.update(X_train, y_train,
+                         X[prev_end:train_end], y[prev_end:train_end],
+                         X[prev_start:train_start], y[prev_start:train_start])
+            mode = "update"
+        else:
+            model.fit(X_train, y_train)
+            mode = "full"
+        fit_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        y_test = y[test_start:test_end]
+        member_preds = model.predict_members(X[test_start:test_end])
+        # Equal-weight average, like VotingRegressor
+        preds = np.mean([member_preds[name] for name in ENSEMBLE_MEMBERS], axis=0)
+        predict_seconds = time.perf_counter() - started
+
+        row = {"fold": fold_id, "mode": mode, "train_rows": train_end - train_start,
+               "test_rows": test_end - test_start, **fold_metrics(y_test, preds)}
+        for name in ENSEMBLE_MEMBERS:
+            row[f"mae_{name}"] = float(np.mean(np.abs(member_preds[name] - y_test)))
+        row["fit_seconds"] = round(fit_seconds, 4)
+        row["predict_seconds"] = round(predict_seconds, 4)
+        results.append(row)
+        previous = (train_start, train_end)
+
+    return results
+
+
+def _run_fold_chunk_task(args):
+    return run_fold_chunk(*args)
+
+
+# ---------------------------------------------------------
+# WALK-FORWARD BACKTEST
+# ---------------------------------------------------------
+# Returns (one row per fold as a DataFrame, summary dict).
+def run_backtest(df, params=None, config=None, feature_columns=FEATURE_COLUMNS, target_column=TARGET_COLUMN):
+    config = config or BacktestConfig()
+    params = params or DEFAULT_ENSEMBLE_PARAMS
+    started = time.perf_counter()
+
+    # Walk forward in date order (all symbols of a day stay on the same side of a split)
+    date_col = "Date" if "Date" in df.columns else None
+    if date_col is not None:
+        df = df.sort_values(date_col, kind="stable")
+    df = df.dropna(subset=list(feature_columns) + [target_column])
+    X = df[list(feature_columns)].to_numpy(dtype=np.float64)
+    y = df[target_column].to_numpy(dtype=np.float64)
+    bounds = period_bounds(df[date_col].to_numpy()) if date_col else np.arange(len(df) + 1)
+
+    day_folds = make_folds(len(bounds) - 1, config.window, config.step, config.horizon, config.expanding)
+    if not day_folds:
+        raise ValueError(f"Not enough data for one fold: {len(bounds) - 1} days, "
+                         f"window={config.window}, horizon={config.horizon}")
+    row_folds = [tuple(int(bounds[i]) for i in fold) for fold in day_folds]
+
+    # Chunks of consecutive folds; each chunk starts with a full refit, so when reusing
+    # models the chunk size is the refit interval and parallelism costs no extra refits
+    n_jobs = max(1, config.n_jobs)
+    if config.reuse:
+        chunk_size = max(1, config.refit_every)
+    else:
+        chunk_size = max(1, math.ceil(len(row_folds) / (n_jobs * 4)))
+
+    rf_refresh = max(1, round(params.get("rf", {}).get("n_estimators", 100) * config.rf_refresh_share))
+    xgb_rounds = max(1, round(params.get("xgb", {}).get("n_estimators", 100) * config.xgb_rounds_share))
+
+    tasks = []
+    for first in range(0, len(row_folds), chunk_size):
+        chunk = row_folds[first:first + chunk_size]
+        # Ship only the rows this chunk touches
+        lo, hi = chunk[0][0], chunk[-1][3]
+        local = [tuple(position - lo for position in fold) for fold in chunk]
+        fold_ids = list(range(first, first + len(chunk)))
+        tasks.append((X[lo:hi], y[lo:hi], local, fold_ids, params, config.reuse, rf_refresh, xgb_rounds, 1))
+
+    if n_jobs > 1 and len(tasks) > 1:
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(tasks)), mp_context=context) as pool:
+            chunks = list(pool.map(_run_fold_chunk_task, tasks))
+    else:
+        chunks = [run_fold_chunk(*task) for task in tasks]
+
+    folds = pd.DataFrame([row for chunk in chunks for row in chunk])
+    # First training day and first/last test day of each fold (easier to read than row numbers)
+    dates = df[date_col].to_numpy() if date_col else np.arange(len(df))
+    folds["train_start"] = [dates[fold[0]] for fold in row_folds]
+    folds["test_start"] = [dates[fold[2]] for fold in row_folds]
+    folds["test_end"] = [dates[fold[3] - 1] for fold in row_folds]
+
+    # Pooled errors weigh every test row the same, whatever the fold size
+    weights = folds["test_rows"]
+    summary = {
+        "folds": len(folds),
+        "window": config.window,
+        "step": config.step,
+        "horizon": config.horizon,
+        "expanding": config.expanding,
+        "reuse": config.reuse,
+        # Scores of updated (not refitted) models don't measure the model that ships
+        "approximate": config.reuse and int((folds["mode"] != "full").sum()) > 0,
+        "full_refits": int((folds["mode"] == "full").sum()),
+        "mae": float(np.average(folds["mae"], weights=weights)),
+        "rmse": float(np.sqrt(np.average(folds["rmse"] ** 2, weights=weights))),
+        "mae_median_fold": float(folds["mae"].median()),
+        "mae_worst_fold": float(folds["mae"].max()),
+        "fit_seconds": float(folds["fit_seconds"].sum()),
+        "wall_seconds": round(time.perf_counter() - started, 3),
+    }
+    for name in ENSEMBLE_MEMBERS:
+        summary[f"mae_{name}"] = float(np.average(folds[f"mae_{name}"], weights=weights))
+    return folds, summary
+
+
+class Backtester:
+    def __init__(self, config=None):
+        self.backtest_config = config or BacktestConfig()
+
+    def initiate_backtest(self, df=None, params=None):
+        print("Starting Walk-Forward Backtest...")
+        try:
+            if df is None:
+                from src.feature_cache import load_training_features
+                df = load_training_features()
+
+            folds, summary = run_backtest(df, params, self.backtest_config)
+
+            # Per-fold report + summary (written through a temp file like every other artifact)
+            save_text(self.backtest_config.report_file_path, folds.to_csv(index=False))
+            save_text(self.backtest_config.summary_file_path, json.dumps(summary, indent=2, default=str))
+
+            print(f"   {summary['folds']} folds ({summary['full_refits']} full refits) in "
+                  f"{summary['wall_seconds']:.1f}s -> MAE: {summary['mae']:.2f} | "
+                  f"worst fold: {summary['mae_worst_fold']:.2f}")
+            if summary["approximate"]:
+                print("   (approximate: most folds updated the previous models instead of refitting; "
+                      "BACKTEST_REUSE=0 for exact scores)")
+            return folds, summary
+
+        except Exception as e:
+            raise Exception(f"Error in Backtest: {e}")
+
+
+if __name__ == "__main__":
+    Backtester().initiate_backtest()
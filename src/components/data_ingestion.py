@@ -1,51 +1,242 @@
 import os
 import sys
+import json
+import shutil
+import time
 import pandas as pd
-import yfinance as yf
 from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from src.raw_store import RawStore
+from src.price_sources import PRICE_COLUMNS, TokenBucket, create_price_fetcher, retry_with_backoff
+from src.utils import save_text
 
 @dataclass
 class DataIngestionConfig:
     # Where to save the raw data
     raw_data_path: str = os.path.join('data', 'data.csv')
+    symbol: str = os.getenv("DEFAULT_SYMBOL", "GOOGL")
+    # History fetched by a full run
+    period: str = "5y"
+
+    # RAW_STORE_PATH=data/raw_store: write bars into the partitioned Parquet store instead of CSV
+    raw_store_path: str = os.getenv("RAW_STORE_PATH", "")
+
+    # Multi-symbol mode: one CSV per symbol + a per-symbol report
+    raw_dir: str = os.path.join('data', 'raw')
+    report_path: str = os.path.join('data', 'raw', 'ingestion_report.json')
+    max_workers: int = int(os.getenv("INGESTION_MAX_WORKERS", "8"))
+    # Requests per second across ALL threads (token bucket), and its burst size
+    rate_per_second: float = float(os.getenv("INGESTION_RATE_PER_SEC", "5"))
+    burst: int = int(os.getenv("INGESTION_BURST", "5"))
+    retries: int = int(os.getenv("INGESTION_RETRIES", "3"))
+    retry_base_delay: float = float(os.getenv("INGESTION_RETRY_DELAY", "1.0"))
 
 class DataIngestion:
-    def __init__(self):
+    def __init__(self, fetcher=None):
         self.ingestion_config = DataIngestionConfig()
+        # yfinance by default; PRICE_SOURCE=fixture (or a fetcher passed in) for offline runs / tests
+        self.fetcher = fetcher or create_price_fetcher()
+        self.last_run = {}
 
-    def initiate_data_ingestion(self):
-        print("Starting Data Ingestion for Retraining...")
-        
+        raw_store_path = self.ingestion_config.raw_store_path
+        self.raw_store = RawStore(raw_store_path) if raw_store_path else None
 
+    # (header, last line, byte offset where the last line starts), read from the end of the file
+    def _last_line(self, path):
+        with open(path, "rb") as file_obj:
+            header = file_obj.readline().decode().strip().split(",")
+            file_obj.seek(0, os.SEEK_END)
+            end = file_obj.tell()
+            # Read backwards until the last complete line is in the buffer
+            block = b""
+            position = end
+            while position > 0 and block.rstrip(b"\n").count(b"\n") < 1:
+                step = min(4096, position)
+                position -= step
+                file_obj.seek(position)
+                block = file_obj.read(step) + block
 
-        try:
-            print("Downloading latest data from Yahoo Finance...")
-            
-           
-            # This get data up to TODAY, forever.
-            df = yf.download("GOOGL", period="5y", interval="1d")
-            
-            # Formatting checks (MultiIndex handling)
-            if isinstance(df.columns, pd.MultiIndex):
-                df.columns = df.columns.get_level_values(0)
-            
-            # Reset index so 'Date' becomes a column (Critical for Prophet/XGBoost)
-            df.reset_index(inplace=True)
-
-            # Create folder if missing
-            os.makedirs(os.path.dirname(self.ingestion_config.raw_data_path), exist_ok=True)
-            
+        body = block.rstrip(b"\n")
+        start = body.rfind(b"\n") + 1
+        return header, body[start:].decode().strip(), position + start
+
+    # Last date in a raw CSV, read from the end of the file (no full read)
+    def last_stored_date(self, path=None):
+        path = path or self.ingestion_config.raw_data_path
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return None
+
+        header, last_line, _ = self._last_line(path)
+        if not last_line or last_line.split(",") == header:
+            return None
+        return pd.Timestamp(last_line.split(",")[header.index("Date")])
+
+    # Appends rows by writing a copy + rename, so readers never see a half-appended file.
+    # replace_last=True drops the file's last bar first (the new rows carry its fresh version).
+    def append_rows(self, new_rows, path=None, replace_last=False):
+        path = path or self.ingestion_config.raw_data_path
+        header, _, last_offset = self._last_line(path)
+
+        tmp_path = f"{path}.tmp"
+        shutil.copyfile(path, tmp_path)
+        with open(tmp_path, "rb+") as file_obj:
+            if replace_last:
+                file_obj.truncate(last_offset)
+            # Make sure the existing last line ends with a newline
+            file_obj.seek(-1, os.SEEK_END)
+            needs_newline = file_obj.read(1) != b"\n"
+        with open(tmp_path, "a") as file_obj:
+            if needs_newline:
+                file_obj.write("\n")
+            new_rows.reindex(columns=header).to_csv(file_obj, header=False, index=False, date_format="%Y-%m-%d")
+        os.replace(tmp_path, path)
+
+    # Overwrites a raw CSV via temp file + rename
+    def write_rows(self, df, path=None):
+        path = path or self.ingestion_config.raw_data_path
+        dir_path = os.path.dirname(path)
+        if dir_path:
+            os.makedirs(dir_path, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        df[PRICE_COLUMNS].to_csv(tmp_path, index=False, date_format="%Y-%m-%d")
+        os.replace(tmp_path, path)
+
+    # Fetches one symbol into `path` (only the missing bars when incremental and the file exists).
+    # With a raw store configured, the bars go into its Parquet partitions instead.
+    def ingest_symbol(self, symbol, path, incremental=False, fetch=None):
+        fetch = fetch or self.fetcher.fetch_with_stats
+        store = self.raw_store
+        if incremental:
+            last_date = store.last_date(symbol) if store is not None else self.last_stored_date(path)
+        else:
+            last_date = None
+
+        if last_date is not None:
+            # The last stored bar is fetched again: if it was taken during the trading day
+            # it was partial, and its final version replaces it
+            df, stats = fetch(symbol, start=last_date)
+            # Dedupe: providers can return bars we already have (e.g. a wider range than asked)
+            df = df[df["Date"] >= last_date].drop_duplicates(subset="Date", keep="last")
+            if len(df):
+                if store is not None:
+                    # The store merges by Date, the newest version wins
+                    store.write(df, symbol)
+                else:
+                    self.append_rows(df, path, replace_last=bool((df["Date"] == last_date).any()))
+            df = df[df["Date"] > last_date]
+        else:
+            df, stats = fetch(symbol, period=self.ingestion_config.period)
+            if df.empty:
+                raise Exception(f"No data returned for {symbol}")
             # Save Raw Data (Overwriting the old one)
-            df.to_csv(self.ingestion_config.raw_data_path, index=False)
-            
-            print(f"Download complete! Fetched data up to {df['Date'].max()}")
-            print(f"Saved to {self.ingestion_config.raw_data_path}")
-            
-            return self.ingestion_config.raw_data_path
+            if store is not None:
+                store.write(df, symbol)
+            else:
+                self.write_rows(df, path)
+
+        return {**stats, "new_rows": len(df), "incremental": last_date is not None,
+                "last_date": str(df["Date"].max().date()) if len(df) else (str(last_date.date()) if last_date is not None else None)}
+
+    # incremental=True: fetch from the last stored date on, refresh that bar and append the newer ones
+    def initiate_data_ingestion(self, incremental=False):
+        print("Starting Data Ingestion for Retraining...")
+        started = time.perf_counter()
+
+        try:
+            symbol = self.ingestion_config.symbol
+            print(f"Downloading {symbol} from {self.fetcher.name}...")
+            self.last_run = self.ingest_symbol(symbol, self.ingestion_config.raw_data_path, incremental)
+            self.last_run["wall_seconds"] = time.perf_counter() - started
+
+            print(f"Download complete! {self.last_run['new_rows']} new bars, data up to {self.last_run['last_date']}")
+            print(f"Saved to {self.ingestion_config.raw_store_path or self.ingestion_config.raw_data_path} "
+                  f"({self.last_run['bytes']} bytes fetched in {self.last_run['wall_seconds']:.2f}s)")
+
+            return self.ingestion_config.raw_store_path or self.ingestion_config.raw_data_path
 
         except Exception as e:
             raise Exception(f"Data Ingestion Failed: {e}")
 
+    # ---------------------------------------------------------
+    # MULTI-SYMBOL MODE
+    # ---------------------------------------------------------
+    # Downloads a universe of tickers on a thread pool. All threads share one token
+    # bucket (rate limit); failed downloads are retried with exponential backoff.
+    # Each symbol is written to data/raw/<SYMBOL>.csv as soon as it completes, so
+    # nothing is held in memory, and one failing symbol never stops the others.
+    def initiate_multi_symbol_ingestion(self, symbols, incremental=True):
+        config = self.ingestion_config
+        symbols = list(dict.fromkeys(s.strip().upper() for s in symbols if s.strip()))
+        print(f"Starting ingestion of {len(symbols)} symbols "
+              f"({config.max_workers} threads, {config.rate_per_second}/s)...")
+
+        started = time.perf_counter()
+        bucket = TokenBucket(config.rate_per_second, capacity=config.burst)
+
+        def rate_limited_fetch(symbol, **kwargs):
+            bucket.acquire()
+            return self.fetcher.fetch_with_stats(symbol, **kwargs)
+
+        def work(symbol):
+            path = os.path.join(config.raw_dir, f"{symbol}.csv")
+            task_started = time.perf_counter()
+            attempts = {"count": 0}
+
+            def attempt():
+                attempts["count"] += 1
+                return self.ingest_symbol(symbol, path, incremental, fetch=rate_limited_fetch)
+
+            try:
+                result, _ = retry_with_backoff(attempt, retries=config.retries, base_delay=config.retry_base_delay)
+                return {**result, "status": "success", "attempts": attempts["count"], "path": path,
+                        "seconds": time.perf_counter() - task_started}
+            except Exception as e:
+                return {"symbol": symbol, "status": "failed", "attempts": attempts["count"], "error": str(e),
+                        "seconds": time.perf_counter() - task_started}
+
+        report = []
+        with ThreadPoolExecutor(max_workers=config.max_workers) as pool:
+            futures = {pool.submit(work, symbol): symbol for symbol in symbols}
+            for future in as_completed(futures):
+                result = future.result()
+                report.append(result)
+                if result["status"] == "success":
+                    print(f"   {result['symbol']}: {result['new_rows']} new bars ({result['attempts']} attempt(s))")
+                else:
+                    print(f"   {result['symbol']}: FAILED after {result['attempts']} attempt(s): {result['error']}")
+
+        report.sort(key=lambda r: r["symbol"])
+        summary = {
+            "symbols": len(symbols),
+            "succeeded": sum(r["status"] == "success" for r in report),
+            "failed": sum(r["status"] == "failed" for r in report),
+            "new_rows": sum(r.get("new_rows", 0) for r in report),
+            "bytes": sum(r.get("bytes", 0) for r in report),
+            "rate_limit_wait_seconds": round(bucket.waited_seconds, 3),
+            "wall_seconds": round(time.perf_counter() - started, 3),
+            "results": report,
+        }
+        save_text(config.report_path, json.dumps(summary, indent=2, default=str))
+        print(f"Ingestion finished: {summary['succeeded']} ok, {summary['failed']} failed. "
+              f"Report: {config.report_path}")
+        return summary
+
+
+# Universe from INGESTION_SYMBOLS (comma separated) or INGESTION_UNIVERSE_PATH (one ticker per line)
+def load_universe():
+    if os.getenv("INGESTION_SYMBOLS"):
+        return os.getenv("INGESTION_SYMBOLS").split(",")
+    path = os.getenv("INGESTION_UNIVERSE_PATH")
+    if path:
+        with open(path) as file_obj:
+            return [line.strip() for line in file_obj if line.strip() and not line.startswith("#")]
+    return []
+
 if __name__ == "__main__":
     obj = DataIngestion()
-    obj.initiate_data_ingestion()
\ No newline at end of file
+    universe = load_universe()
+    if universe:
+        obj.initiate_multi_symbol_ingestion(universe)
+    else:
+        obj.initiate_data_ingestion(incremental=os.getenv("INCREMENTAL_INGESTION", "0") == "1")
@@ -1,42 +1,196 @@
 import sys
 import os
+import numpy as np
 import pandas as pd
-from src.utils import push_to_feature_store  # Import our Mongo function
+from dataclasses import dataclass
+from src.feature_store import get_feature_store  # MongoDB or local SQLite (FEATURE_STORE_BACKEND)
+from src.feature_engine import DEFAULT_FEATURES, compute_features, configured_features, streaming_lookback
+from src.raw_store import RawStore, is_raw_store
+from src.rolling_features import RollingFeatureState
+from src.utils import DEFAULT_SYMBOL, save_text
+
+
+# Raw price columns are read as float32 in streaming mode (half the memory of float64)
+STREAMING_DTYPES = {"Open": np.float32, "High": np.float32, "Low": np.float32, "Close": np.float32,
+                    "Adj Close": np.float32}
+
+
+@dataclass
+class DataTransformationConfig:
+    # Rolling-window state after the last processed bar (used by incremental runs)
+    state_file_path: str = os.path.join('data', 'transformation_state.json')
+    # Features to compute (names from the feature registry) and worker processes for many symbols
+    features: tuple = tuple(configured_features())
+    n_jobs: int = int(os.getenv("FEATURE_ENGINE_JOBS", "1"))
+    # Streaming mode: raw rows read (and features written) per chunk
+    chunk_rows: int = int(os.getenv("TRANSFORM_CHUNK_ROWS", "500000"))
+
 
 class DataTransformation:
-    def initiate_data_transformation(self, data_path):
+    def __init__(self):
+        self.transformation_config = DataTransformationConfig()
+
+    # Reads the raw data (a CSV, or the partitioned Parquet raw store) with the date as a sorted index
+    def read_raw_data(self, data_path, start=None, end=None):
+        if is_raw_store(data_path):
+            # Typed columns straight from Parquet; the date range is pushed down to the reader
+            df = RawStore(data_path).read(start=start, end=end)
+            df["symbol"] = df["symbol"].astype(str)
+            return df.set_index("Date")
+
+        df = pd.read_csv(data_path)
+
+        # Ensure Date parsing (Handle Yahoo's format)
+        if 'Date' in df.columns:
+            df['Date'] = pd.to_datetime(df['Date'])
+            df.set_index('Date', inplace=True)
+        elif 'Datetime' in df.columns:
+             df['Datetime'] = pd.to_datetime(df['Datetime'])
+             df.set_index('Datetime', inplace=True)
+
+        return df.sort_index()
+
+    # Apply Feature Engineering (The Recipe) over the whole history.
+    # The recipe lives in the feature registry (src/feature_engine.py); the default set is
+    # SMA_10, SMA_50, Volatility and Target, and FEATURE_SET adds more (RSI_14, MACD, ATR_14, ...)
+    def build_features(self, df, features=None):
+        features = features or self.transformation_config.features
+        date_col = df.index.name or "Date"
+
+        frame = df.reset_index()
+        has_symbol = "symbol" in frame.columns
+        if not has_symbol:
+            frame["symbol"] = DEFAULT_SYMBOL
+
+        # One vectorized pass over the (bar x symbol) panel; rows with NaNs from the windows are dropped
+        frame = compute_features(frame, features, date_col=date_col, n_jobs=self.transformation_config.n_jobs)
+
+        if not has_symbol:
+            frame = frame.drop(columns="symbol")
+        return frame.set_index(date_col)
+
+    def save_state(self, state):
+        save_text(self.transformation_config.state_file_path, state.dumps())
+
+    def load_state(self):
+        path = self.transformation_config.state_file_path
+        if not os.path.exists(path):
+            return None
+        with open(path) as file_obj:
+            return RollingFeatureState.loads(file_obj.read())
+
+    # ---------------------------------------------------------
+    # STREAMING MODE (files bigger than memory, e.g. years of minute bars)
+    # ---------------------------------------------------------
+    # Chunks of raw rows in date order per symbol: CSV chunks read as float32, or the raw
+    # store's partitions (already float32) in batches of the same size
+    def _raw_chunks(self, data_path):
+        chunk_rows = self.transformation_config.chunk_rows
+        if is_raw_store(data_path):
+            return RawStore(data_path).iter_batches(chunk_rows)
+        return pd.read_csv(data_path, chunksize=chunk_rows, dtype=STREAMING_DTYPES)
+
+    # Reads the raw data in chunks and carries the last `lookback` rows of every
+    # symbol into the next chunk, so rolling windows (and yesterday's Target) continue
+    # across chunk boundaries. Each chunk's finished rows are written straight to the store.
+    def initiate_streaming_transformation(self, data_path, write_fn=None):
+        print("Starting Streaming Feature Engineering...")
+        try:
+            features = list(self.transformation_config.features)
+            lookback = streaming_lookback(features)
+            write_fn = write_fn or get_feature_store().write
+
+            carried = None            # tail rows of the previous chunk
+            last_emitted = {}         # symbol -> sequence number of the last row written
+            seq_start = 0
+            total_rows, total_written, n_chunks = 0, 0, 0
+
+            for chunk in self._raw_chunks(data_path):
+                date_col = "Datetime" if "Datetime" in chunk.columns else "Date"
+                chunk[date_col] = pd.to_datetime(chunk[date_col])
+                has_symbol = "symbol" in chunk.columns
+                if not has_symbol:
+                    chunk["symbol"] = DEFAULT_SYMBOL
+                # Row sequence numbers tell new rows from carried ones
+                chunk["_seq"] = np.arange(seq_start, seq_start + len(chunk))
+                seq_start += len(chunk)
+                total_rows += len(chunk)
+
+                # Only the tails of symbols present in this chunk join the computation;
+                # the others are carried along untouched (keeps the bar x symbol panel small)
+                idle = None
+                if carried is not None:
+                    active = carried["symbol"].isin(chunk["symbol"].unique())
+                    idle = carried[~active]
+                    frame = pd.concat([carried[active], chunk], ignore_index=True)
+                else:
+                    frame = chunk
+                out = compute_features(frame, features, date_col=date_col)
+
+                # Only rows not written yet (the last carried row of each symbol gets its Target now)
+                done = out["symbol"].map(last_emitted).fillna(-1).to_numpy()
+                out = out[out["_seq"].to_numpy() > done]
+
+                if len(out):
+                    last_emitted.update(out.groupby("symbol")["_seq"].max().to_dict())
+                    float_cols = out.select_dtypes("float64").columns
+                    out = out.astype({col: np.float32 for col in float_cols})
+                    if not has_symbol:
+                        out = out.drop(columns="symbol")
+                    write_fn(out.drop(columns="_seq").set_index(date_col))
+                    total_written += len(out)
+
+                carried = pd.concat([idle, frame.groupby("symbol", sort=False).tail(lookback)], ignore_index=True)
+                n_chunks += 1
+                print(f"   chunk {n_chunks}: {total_rows} rows read, {total_written} feature rows written")
+
+            print("Streaming Data Transformation & Feature Store Push Complete.")
+            return {"rows_read": total_rows, "rows_written": total_written, "chunks": n_chunks}
+
+        except Exception as e:
+            raise Exception(e)
+
+    # incremental=True: only bars newer than the saved state are turned into features
+    # and appended to the store (falls back to the full recompute if there is no state yet)
+    # streaming=True: chunked, bounded-memory run (see initiate_streaming_transformation)
+    def initiate_data_transformation(self, data_path, incremental=False, streaming=False):
+        if streaming:
+            return self.initiate_streaming_transformation(data_path)
+
         print("Starting Feature Engineering...")
         try:
             # Read Raw Data
-            df = pd.read_csv(data_path)
-            
-            # Ensure Date parsing (Handle Yahoo's format)
-            if 'Date' in df.columns:
-                df['Date'] = pd.to_datetime(df['Date'])
-                df.set_index('Date', inplace=True)
-            elif 'Datetime' in df.columns:
-                 df['Datetime'] = pd.to_datetime(df['Datetime'])
-                 df.set_index('Datetime', inplace=True)
-
-            # Apply Feature Engineering (The Recipe)
-            # Create Moving Averages
-            df['SMA_10'] = df['Close'].rolling(window=10).mean()
-            df['SMA_50'] = df['Close'].rolling(window=50).mean()
-            
-            # Create Volatility
-            df['Volatility'] = df['Close'].rolling(window=10).std()
-            
-            # Create Target (Tomorrow's Price)
-            df['Target'] = df['Close'].shift(-1)
-            
-            # Drop NaNs created by rolling windows
-            df.dropna(inplace=True)
-
-            # Push to MongoDB (Feature Store)
+            raw_df = self.read_raw_data(data_path)
+
+            # The O(1) rolling state only knows the default features
+            if incremental and list(self.transformation_config.features) != DEFAULT_FEATURES:
+                print("Incremental mode only supports the default feature set, running the full recompute.")
+                incremental = False
+
+            if incremental and "symbol" in raw_df.columns and raw_df["symbol"].nunique() > 1:
+                print("Incremental mode only supports a single symbol, running the full recompute.")
+                incremental = False
+
+            state = self.load_state() if incremental else None
+            if state is not None:
+                # The newest processed bar (ingestion may have refreshed it) plus the new ones;
+                # rows whose Target changed are upserted again
+                df = state.update(raw_df[raw_df.index >= state.last_date])
+                print(f"Incremental run: {len(df)} new feature rows.")
+            else:
+                df = self.build_features(raw_df)
+                state = RollingFeatureState.from_history(raw_df)
+
+            # Push to the Feature Store (MongoDB by default)
             # We push the CLEAN data so the Trainer can pull it later
-            push_to_feature_store(df)
-            
+            if len(df):
+                get_feature_store().write(df)
+
+            # Saved AFTER the push: if the push fails, the next run redoes these bars
+            self.save_state(state)
+
             print("Data Transformation & Feature Store Push Complete.")
+            return df
 
         except Exception as e:
-            raise Exception(e)
\ No newline at end of file
+            raise Exception(e)
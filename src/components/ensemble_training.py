@@ -0,0 +1,252 @@
+import os
+import sys
+import copy
+import time
+import threading
+import multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+from sklearn.linear_model import LinearRegression
+from sklearn.ensemble import RandomForestRegressor, VotingRegressor
+from sklearn.utils import Bunch
+from xgboost import XGBRegressor
+
+# Model inputs and label (what ModelTrainer, the backtest and the sweep train on)
+FEATURE_COLUMNS = ['Close', 'SMA_10', 'SMA_50', 'Volatility']
+TARGET_COLUMN = 'Target'
+
+# Member order matters: it is the order of VotingRegressor.estimators
+ENSEMBLE_MEMBERS = ("lr", "rf", "xgb")
+
+# The hyperparameters ModelTrainer has always used
+DEFAULT_ENSEMBLE_PARAMS = {
+    "lr": {},
+    "rf": {"n_estimators": 200, "max_depth": 10, "random_state": 42},
+    "xgb": {"n_estimators": 200, "learning_rate": 0.2, "random_state": 42},
+}
+
+
+def build_member(name, params=None, n_jobs=1):
+    params = dict(params or {})
+    if name == "lr":
+        return LinearRegression(**params)
+    if name == "rf":
+        return RandomForestRegressor(n_jobs=n_jobs, **params)
+    if name == "xgb":
+        return XGBRegressor(n_jobs=n_jobs, **params)
+    raise ValueError(f"Unknown ensemble member '{name}'")
+
+
+# Fitted in the training process itself, before the workers start: LR takes milliseconds,
+# so its own worker would cost more to spawn than the fit and then leave a core idle
+IN_PROCESS_MEMBERS = ("lr",)
+
+# Below this many rows the tree fits are shorter than starting the worker processes
+# (each one imports sklearn + xgboost), so the members are fitted one after another
+PARALLEL_MIN_ROWS = int(os.getenv("TRAIN_PARALLEL_MIN_ROWS", "20000"))
+
+
+# Splits a core budget between the tree members fitted side by side in worker processes,
+# by their tree count. In-process members run alone before them, single-threaded.
+# The worker shares always add up to the budget, so it needs one core per worker.
+def allocate_cores(core_budget, params=None, members=ENSEMBLE_MEMBERS):
+    params = params or DEFAULT_ENSEMBLE_PARAMS
+    workers = [name for name in members if name not in IN_PROCESS_MEMBERS]
+    if core_budget < len(workers):
+        raise ValueError(f"{len(workers)} members can't share {core_budget} core(s) without oversubscribing")
+
+    cores = {name: 1 for name in members if name in IN_PROCESS_MEMBERS}
+    if len(workers) == 1:
+        cores[workers[0]] = core_budget
+    elif workers:
+        rf_trees = params.get("rf", {}).get("n_estimators", 100)
+        xgb_trees = params.get("xgb", {}).get("n_estimators", 100)
+        rf_cores = min(core_budget - 1, max(1, round(core_budget * rf_trees / (rf_trees + xgb_trees))))
+        cores["rf"], cores["xgb"] = rf_cores, core_budget - rf_cores
+    return cores
+
+
+# ---------------------------------------------------------
+# LINEAR REGRESSION FROM SUFFICIENT STATISTICS
+# ---------------------------------------------------------
+# X'X and X'y (with an intercept column) are updated by adding the rows that enter
+# the window and subtracting the rows that leave it, so an update costs O(new rows), not O(history).
+class LinearSufficientStats:
+    def __init__(self, n_features):
+        self.gram = np.zeros((n_features + 1, n_features + 1))
+        self.xty = np.zeros(n_features + 1)
+        self.n_rows = 0
+
+    @staticmethod
+    def _augment(X):
+        return np.hstack([np.ones((len(X), 1)), X])
+
+    def add(self, X, y, sign=1.0):
+        A = self._augment(X)
+        self.gram += sign * (A.T @ A)
+        self.xty += sign * (A.T @ y)
+        self.n_rows += int(sign) * len(X)
+
+    def remove(self, X, y):
+        self.add(X, y, sign=-1.0)
+
+    # Least squares (lstsq copes with collinear inputs such as Close vs SMA_10)
+    def solve(self):
+        beta = np.linalg.lstsq(self.gram, self.xty, rcond=None)[0]
+        return beta[1:], beta[0]
+
+
+# LinearRegression with the solved weights (what VotingRegressor and the exporter expect)
+def linear_from_stats(stats):
+    coef, intercept = stats.solve()
+    lr = LinearRegression()
+    lr.coef_ = coef
+    lr.intercept_ = float(intercept)
+    lr.n_features_in_ = len(coef)
+    return lr
+
+
+# ---------------------------------------------------------
+# WARM-START TREE UPDATES
+# ---------------------------------------------------------
+# RF: fit `n_trees` new trees on (X, y) with warm start, then drop the same number of
+# the oldest trees, so the forest keeps its size and slowly moves to recent data.
+def refresh_forest(rf, X, y, n_trees, seed=42):
+    total = len(rf.estimators_)
+    n_trees = min(n_trees, total)
+    rf.set_params(warm_start=True, n_estimators=total + n_trees, random_state=seed)
+    rf.fit(X, y)
+    rf.estimators_ = rf.estimators_[n_trees:]
+    rf.set_params(n_estimators=total)
+    return rf
+
+
+# XGB: `rounds` more boosting rounds on (X, y), starting from the previous booster
+def continue_boosting(xgb, X, y, rounds, params=None, n_jobs=1):
+    continued = build_member("xgb", dict(params or {}, n_estimators=rounds), n_jobs)
+    return continued.fit(X, y, xgb_model=xgb.get_booster())
+
+
+# ---------------------------------------------------------
+# MEMORY SAMPLING
+# ---------------------------------------------------------
+# Tree libraries allocate in C, so tracemalloc can't see them: a background thread
+# samples the process RSS instead and keeps the peak above the starting point.
+def current_rss_mb():
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except OSError:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class PeakMemorySampler:
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.start_mb = 0.0
+        self.peak_mb = 0.0
+        self._stop = threading.Event()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak_mb = max(self.peak_mb, current_rss_mb())
+
+    def __enter__(self):
+        self.start_mb = self.peak_mb = current_rss_mb()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, current_rss_mb())
+        return False
+
+    @property
+    def increase_mb(self):
+        return self.peak_mb - self.start_mb
+
+
+def fit_member(name, params, n_jobs, X, y):
+    estimator = build_member(name, params, n_jobs)
+    with PeakMemorySampler() as memory:
+        start = time.perf_counter()
+        estimator.fit(X, y)
+        fit_seconds = time.perf_counter() - start
+    return name, estimator, {
+        "fit_seconds": round(fit_seconds, 4),
+        "peak_rss_mb": round(memory.peak_mb, 1),
+        "peak_memory_increase_mb": round(memory.increase_mb, 1),
+        "n_jobs": n_jobs,
+    }
+
+
+def _fit_member_task(args):
+    return fit_member(*args)
+
+
+# ---------------------------------------------------------
+# FIT ALL MEMBERS
+# ---------------------------------------------------------
+# parallel=True: the tree members are fitted at the same time, each in its own (fresh)
+# process, with the core budget split between them; LR is fitted here first.
+# Returns ({name: fitted}, stats).
+def fit_members(X, y, params=None, parallel=True, core_budget=None, members=ENSEMBLE_MEMBERS,
+                min_parallel_rows=None):
+    params = copy.deepcopy(params or DEFAULT_ENSEMBLE_PARAMS)
+    core_budget = core_budget or os.cpu_count() or 1
+    min_parallel_rows = PARALLEL_MIN_ROWS if min_parallel_rows is None else min_parallel_rows
+    workers = [name for name in members if name not in IN_PROCESS_MEMBERS]
+    # One tree member alone (e.g. the others came from the training cache) gets the whole budget.
+    # With fewer cores than workers, or too few rows to pay for spawning them, members are
+    # fitted one after another, each with the whole budget.
+    parallel = (parallel and len(workers) > 1 and core_budget >= len(workers)
+                and len(X) >= min_parallel_rows)
+    cores = allocate_cores(core_budget, params, members) if parallel else {name: core_budget for name in members}
+
+    tasks = [(name, params.get(name, {}), cores[name], X, y) for name in members]
+    started = time.perf_counter()
+
+    if parallel:
+        results = [fit_member(*task) for task in tasks if task[0] in IN_PROCESS_MEMBERS]
+        # spawn + one task per process: clean thread pools and a per-member memory peak
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=len(workers), mp_context=context, max_tasks_per_child=1) as pool:
+            results += pool.map(_fit_member_task, [task for task in tasks if task[0] not in IN_PROCESS_MEMBERS])
+    else:
+        results = [fit_member(*task) for task in tasks]
+
+    fitted = {name: estimator for name, estimator, _ in results}
+    stats = {name: member_stats for name, _, member_stats in results}
+    stats["total"] = {
+        "wall_seconds": round(time.perf_counter() - started, 4),
+        "core_budget": core_budget,
+        "parallel": parallel,
+    }
+    return fitted, stats
+
+
+# Wraps already-fitted members in a VotingRegressor (same object the trainer used to fit itself)
+def assemble_ensemble(fitted, params=None, members=ENSEMBLE_MEMBERS):
+    params = params or DEFAULT_ENSEMBLE_PARAMS
+    ensemble = VotingRegressor(estimators=[(name, build_member(name, params.get(name))) for name in members])
+    ensemble.estimators_ = [fitted[name] for name in members]
+    ensemble.named_estimators_ = Bunch(**{name: fitted[name] for name in members})
+    return ensemble
+
+
+# Flat {"fit_seconds/rf": ..., "train_wall_seconds": ...} dict for wandb.log
+def fit_stats_to_metrics(stats):
+    metrics = {}
+    for name, member_stats in stats.items():
+        if name == "total":
+            metrics["train_wall_seconds"] = member_stats["wall_seconds"]
+            metrics["train_core_budget"] = member_stats["core_budget"]
+            continue
+        for key, value in member_stats.items():
+            metrics[f"{key}/{name}"] = value
+    return metrics
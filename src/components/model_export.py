@@ -0,0 +1,189 @@
+import os
+import json
+import numpy as np
+from dataclasses import dataclass
+
+from sklearn.linear_model import LinearRegression
+from sklearn.ensemble import RandomForestRegressor
+from xgboost import XGBRegressor
+
+from src.fused_predictor import FusedPredictor
+
+
+@dataclass
+class ModelExportConfig:
+    # Array-backed copy of scaler + ensemble that the API loads instead of model.pkl
+    fused_model_file_path: str = os.path.join("models", "fused_model.joblib")
+
+
+# Largest float32 that is <= each float64 value
+def _float32_floor(values):
+    rounded = np.asarray(values, dtype=np.float64).astype(np.float32)
+    too_big = rounded.astype(np.float64) > values
+    return np.where(too_big, np.nextafter(rounded, np.float32(-np.inf)), rounded)
+
+
+# Re-numbers one tree breadth-first so the two children of a node are always adjacent
+def _layout_tree(left, right, feature, threshold, value, offset):
+    n_nodes = len(left)
+    order = [0]
+    new_id = np.zeros(n_nodes, dtype=np.int64)
+    new_left = np.zeros(n_nodes, dtype=np.int64)
+    depth = np.zeros(n_nodes, dtype=np.int64)
+    next_id = 1
+
+    for node in order:
+        if left[node] < 0:
+            new_left[new_id[node]] = new_id[node]  # leaf -> itself
+            continue
+        new_id[left[node]], new_id[right[node]] = next_id, next_id + 1
+        depth[left[node]] = depth[right[node]] = depth[node] + 1
+        new_left[new_id[node]] = next_id
+        next_id += 2
+        order.extend([left[node], right[node]])
+
+    old_for_new = np.empty(n_nodes, dtype=np.int64)
+    old_for_new[new_id] = np.arange(n_nodes)
+    is_leaf = left[old_for_new] < 0
+
+    return {
+        "feature": np.where(is_leaf, 0, feature[old_for_new]),
+        # +inf on leaves so "x > threshold" never moves off a leaf
+        "threshold": np.where(is_leaf, np.float32(np.inf), threshold[old_for_new]),
+        "left": new_left + offset,
+        "value": np.where(is_leaf, value[old_for_new], 0.0),
+        "depth": int(depth.max()),
+    }
+
+
+def _random_forest_trees(rf, weight):
+    trees = []
+    for estimator in rf.estimators_:
+        tree = estimator.tree_
+        trees.append({
+            "left": tree.children_left,
+            "right": tree.children_right,
+            "feature": tree.feature,
+            # sklearn goes left when float32(x) <= float64(t)  <=>  x <= float32_floor(t)
+            "threshold": _float32_floor(tree.threshold),
+            # RF prediction is the mean of its trees
+            "value": tree.value[:, 0, 0] * weight / len(rf.estimators_),
+        })
+    return trees
+
+
+def _xgboost_trees(xgb, weight):
+    booster = xgb.get_booster()
+    learner = json.loads(booster.save_raw("json"))["learner"]
+
+    objective = learner["objective"]["name"]
+    if objective != "reg:squarederror":
+        raise Exception(f"Unsupported XGBoost objective for export: {objective}")
+
+    # base_score is stored as a string such as "[1.180828E2]"
+    base_score = float(learner["learner_model_param"]["base_score"].strip("[]"))
+
+    model = learner["gradient_booster"]["model"]
+    raw_trees = model["trees"]
+
+    # Respect early stopping the same way XGBRegressor.predict does
+    best_iteration = getattr(xgb, "best_iteration", None)
+    if best_iteration is not None:
+        raw_trees = raw_trees[:model["iteration_indptr"][best_iteration + 1]]
+
+    trees = []
+    for raw in raw_trees:
+        conditions = np.asarray(raw["split_conditions"], dtype=np.float32)
+        trees.append({
+            "left": np.asarray(raw["left_children"]),
+            "right": np.asarray(raw["right_children"]),
+            "feature": np.asarray(raw["split_indices"]),
+            # XGBoost goes left when x < t  <=>  x <= (float32 just below t)
+            "threshold": np.nextafter(conditions, np.float32(-np.inf)),
+            # For XGBoost leaves, split_conditions holds the leaf weight
+            "value": conditions.astype(np.float64) * weight,
+        })
+    return trees, base_score * weight
+
+
+# Builds the FusedPredictor arrays from a fitted StandardScaler + VotingRegressor
+def compile_ensemble(ensemble, scaler):
+    n_features = scaler.n_features_in_
+    mean = np.zeros(n_features) if scaler.mean_ is None else np.asarray(scaler.mean_, dtype=np.float64)
+    scale = np.ones(n_features) if scaler.scale_ is None else np.asarray(scaler.scale_, dtype=np.float64)
+
+    if hasattr(scaler, "feature_names_in_"):
+        feature_names = np.asarray(scaler.feature_names_in_, dtype=str)
+    else:
+        feature_names = np.asarray([f"x{i}" for i in range(n_features)])
+
+    # VotingRegressor = weighted average of its members
+    weights = np.ones(len(ensemble.estimators_)) if ensemble.weights is None else np.asarray(ensemble.weights, dtype=np.float64)
+    weights = weights / weights.sum()
+
+    linear_coef = np.zeros(n_features)
+    intercept = 0.0
+    trees = []
+
+    for (name, estimator), weight in zip(ensemble.named_estimators_.items(), weights):
+        if isinstance(estimator, LinearRegression):
+            # Fold the scaler: w.((x - m) / s) + b  ==  (w / s).x + (b - sum(w * m / s))
+            coef = np.ravel(estimator.coef_) / scale
+            linear_coef += weight * coef
+            intercept += weight * (float(np.ravel(estimator.intercept_)[0]) - float(np.dot(coef, mean)))
+        elif isinstance(estimator, RandomForestRegressor):
+            trees.extend(_random_forest_trees(estimator, weight))
+        elif isinstance(estimator, XGBRegressor):
+            xgb_trees, base_score = _xgboost_trees(estimator, weight)
+            trees.extend(xgb_trees)
+            intercept += base_score
+        else:
+            raise Exception(f"Cannot export ensemble member '{name}' of type {type(estimator).__name__}")
+
+    # Flatten every tree into one contiguous block
+    blocks, roots = [], []
+    offset = 0
+    for tree in trees:
+        blocks.append(_layout_tree(tree["left"], tree["right"], tree["feature"],
+                                   tree["threshold"], tree["value"], offset))
+        roots.append(offset)
+        offset += len(tree["left"])
+
+    def concat(key, dtype):
+        if not blocks:
+            return np.zeros(0, dtype=dtype)
+        return np.concatenate([block[key] for block in blocks]).astype(dtype)
+
+    return {
+        "feature_names": feature_names,
+        "scaler_mean": mean,
+        "scaler_scale": scale,
+        "linear_coef": linear_coef,
+        "intercept": intercept,
+        "feature": concat("feature", np.int32),
+        "threshold": concat("threshold", np.float32),
+        "left": concat("left", np.int32),
+        "value": concat("value", np.float64),
+        "roots": np.asarray(roots, dtype=np.int32),
+        "depth": max([block["depth"] for block in blocks], default=0),
+    }
+
+
+class ModelExporter:
+    def __init__(self):
+        self.model_export_config = ModelExportConfig()
+
+    def initiate_model_export(self, ensemble, scaler):
+        print("Compiling Scaler + Ensemble into the fused predictor...")
+        try:
+            predictor = FusedPredictor(compile_ensemble(ensemble, scaler))
+
+            file_path = self.model_export_config.fused_model_file_path
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            predictor.save(file_path)
+
+            print(f"Fused predictor saved to {file_path}")
+            return file_path
+
+        except Exception as e:
+            raise Exception(f"Model Export Failed: {e}")
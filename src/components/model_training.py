@@ -1,13 +1,11 @@
 import os
 import sys
+import time
+import joblib
 import pandas as pd
 import wandb  
 from dataclasses import dataclass
-
-# Models
-from sklearn.linear_model import LinearRegression
-from sklearn.ensemble import RandomForestRegressor, VotingRegressor
-from xgboost import XGBRegressor
+from datetime import datetime, timezone
 
 # Sklearn helpers
 from sklearn.preprocessing import StandardScaler
@@ -15,7 +13,14 @@ from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_absolute_error, r2_score
 
 # Our custom helpers
-from src.utils import save_object, pull_from_feature_store
+from src.utils import save_object, save_text
+from src.feature_cache import load_training_features
+from src.components.model_export import ModelExporter
+from src.components.ensemble_training import (DEFAULT_ENSEMBLE_PARAMS, FEATURE_COLUMNS, TARGET_COLUMN,
+                                              LinearSufficientStats, assemble_ensemble, continue_boosting,
+                                              fit_stats_to_metrics, linear_from_stats, refresh_forest)
+from src.components.backtest import Backtester
+from src.training_cache import TrainingCache, fit_members_cached, frame_fingerprint, library_versions
 
 
 @dataclass
@@ -23,6 +28,32 @@ class ModelTrainerConfig:
     # save these files locally first
     trained_model_file_path = os.path.join("models", "model.pkl")
     scaler_file_path = os.path.join("models", "scaler.pkl")
+    # Written LAST: the API hot-reloads when this file changes
+    model_version_file_path = os.path.join("models", "VERSION")
+
+    # Ensemble hyperparameters (LR + RF + XGB)
+    ensemble_params = DEFAULT_ENSEMBLE_PARAMS
+    # TRAIN_PARALLEL=0 fits the members one after another;
+    # TRAIN_CORE_BUDGET caps the cores all members use together (default: all cores)
+    parallel = os.getenv("TRAIN_PARALLEL", "1") == "1"
+    core_budget = int(os.getenv("TRAIN_CORE_BUDGET", "0")) or os.cpu_count()
+    # TRAIN_BACKTEST=1 also runs the walk-forward backtest (BACKTEST_* settings) and logs it
+    backtest = os.getenv("TRAIN_BACKTEST", "0") == "1"
+
+    # INCREMENTAL TRAINING (INCREMENTAL_TRAINING=1)
+    # Updates the saved model with the new training rows instead of refitting on all of them.
+    # Saved next to model.pkl: scaler, LR sums, and what the model was trained on.
+    training_state_file_path = os.path.join("models", "training_state.joblib")
+    incremental = os.getenv("INCREMENTAL_TRAINING", "0") == "1"
+    # Full refit after this many incremental updates (bounds XGB growth and RF staleness)
+    full_refit_every = int(os.getenv("FULL_REFIT_EVERY", "4"))
+    # RF trees replaced / XGB rounds added per update
+    incremental_rf_trees = int(os.getenv("INCREMENTAL_RF_TREES", "20"))
+    incremental_xgb_rounds = int(os.getenv("INCREMENTAL_XGB_ROUNDS", "10"))
+    # New trees and rounds are fitted on the most recent N training rows (or all new rows if more)
+    incremental_window = int(os.getenv("INCREMENTAL_WINDOW", "500"))
+    # More new rows than this share of the old training set -> full refit
+    max_new_share = float(os.getenv("INCREMENTAL_MAX_NEW_SHARE", "0.25"))
 
 class ModelTrainer:
     def __init__(self):
@@ -36,41 +67,48 @@ class ModelTrainer:
         run = wandb.init(project="stock-prediction-prod", job_type="train_and_register")
         
         try:
-            # LOAD DATA FROM MONGO 
-            df = pull_from_feature_store()
+            # LOAD DATA (local mirror of the Mongo feature store, refreshed only when the store changed)
+            df = load_training_features()
             
-            X = df[['Close', 'SMA_10', 'SMA_50', 'Volatility']]
-            y = df['Target']
+            X = df[FEATURE_COLUMNS]
+            y = df[TARGET_COLUMN]
             
             # SPLIT & SCALE 
             # Shuffle=False is mandatory for Time Series
             X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, shuffle=False)
             
-            print("   Scaling Data...")
-            scaler = StandardScaler()
-            X_train_scaled = scaler.fit_transform(X_train)
-            X_test_scaled = scaler.transform(X_test)
-            
             # DEFINE ENSEMBLE MODEL 
-            # Combine the 3 best models that found in EDA
-            lr = LinearRegression()
-            rf = RandomForestRegressor(n_estimators=200, max_depth=10, random_state=42)
-            xgb = XGBRegressor(n_estimators=200, learning_rate=0.2, random_state=42)
-            
-            ensemble = VotingRegressor(estimators=[
-                ('lr', lr), ('rf', rf), ('xgb', xgb)
-            ])
-            
-            # TRAIN
-            print("   Training Ensemble Model...")
-            ensemble.fit(X_train_scaled, y_train.values.ravel())
-            
-            # EVALUATE 
-            preds = ensemble.predict(X_test_scaled)
-            mae = mean_absolute_error(y_test, preds)
-            r2 = r2_score(y_test, preds)
+            # Combine the 3 best models that found in EDA (LR + RF + XGB, see ensemble_params)
+            params = self.model_trainer_config.ensemble_params
+            versions = library_versions()
+
+            # FULL REFIT or INCREMENTAL UPDATE of the saved model
+            state = self.load_training_state()
+            mode, reason = self.plan_training(state, X_train, y_train, params, versions)
+            print(f"   Training mode: {mode} ({reason})")
+
+            if mode == "incremental":
+                scaler, ensemble, lr_stats, fit_stats = self.update_ensemble(state, X_train, y_train, params)
+                preds = ensemble.predict(scaler.transform(X_test))
+                mae, r2 = mean_absolute_error(y_test, preds), r2_score(y_test, preds)
+                cache_metrics = {}
+                # A rerun with no new rows republishes the same model and doesn't count as an update
+                updates_since_full = state["updates_since_full"] + int(len(X_train) > state["train_rows"])
+            else:
+                scaler, ensemble, lr_stats, fit_stats, mae, r2, cache_metrics = self.fit_ensemble(
+                    X_train, X_test, y_train, y_test, params, versions)
+                updates_since_full = 0
             
             print(f"Final Performance -> MAE: ${mae:.2f} | R2: {r2:.4f}")
+
+            # WALK-FORWARD BACKTEST (optional): many train/test splits instead of one holdout
+            backtest_metrics = {}
+            if self.model_trainer_config.backtest:
+                folds, summary = Backtester().initiate_backtest(df, params)
+                backtest_metrics = {f"backtest_{key}": value for key, value in summary.items()
+                                    if isinstance(value, (int, float))}
+                wandb.log({"backtest_folds": wandb.Table(dataframe=folds.astype({
+                    "train_start": str, "test_start": str, "test_end": str}))})
             
             
             # ---------------------------------------------------------
@@ -95,15 +133,38 @@ class ModelTrainer:
             
             # ---------------------------------------------------------
             
-            # Log metrics to W&B dashboard
-            wandb.log({"mae": mae, "r2": r2, "status": "accepted"})
+            # Log metrics to W&B dashboard (plus per-member fit time and memory)
+            wandb.log({"mae": mae, "r2": r2, "status": "accepted", "train_mode": mode,
+                       "train_rows": len(X_train), **fit_stats_to_metrics(fit_stats),
+                       **backtest_metrics, **cache_metrics})
 
 
             # SAVE LOCALLY
+            model_version = f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}-{run.id}"
             save_object(self.model_trainer_config.trained_model_file_path, ensemble)
             save_object(self.model_trainer_config.scaler_file_path, scaler)
             print("Model saved locally to artifacts/")
 
+            # EXPORT the fused (sklearn-free) predictor that the API serves
+            fused_model_path = ModelExporter().initiate_model_export(ensemble, scaler)
+
+            # What the next incremental update starts from (only valid together with this VERSION)
+            save_object(self.model_trainer_config.training_state_file_path, {
+                "model_version": model_version,
+                "train_rows": len(X_train),
+                "train_fingerprint": frame_fingerprint(X_train, y_train),
+                "scaler": scaler,
+                "lr_stats": lr_stats,
+                "params": params,
+                "versions": versions,
+                "feature_columns": list(FEATURE_COLUMNS),
+                "updates_since_full": updates_since_full,
+            })
+
+            # Publish the new version (running APIs pick it up without a restart)
+            save_text(self.model_trainer_config.model_version_file_path, model_version)
+            print(f"Model version: {model_version}")
+
             # Model Registery 
             print(" Registering Model to W&B Artifacts...")
             
@@ -114,7 +175,7 @@ class ModelTrainer:
                 name="stock_prediction_model", 
                 type="model",
                 description="Voting Ensemble (LR+RF+XGB)",
-                metadata={"mae": mae, "r2": r2}
+                metadata={"mae": mae, "r2": r2, **backtest_metrics}
             )
             
             # 2. Put our local model file into the box
@@ -123,7 +184,10 @@ class ModelTrainer:
             # 3. Put the Scaler into the box (We need this for the App too!)
             artifact.add_file(self.model_trainer_config.scaler_file_path)
 
-            # 4. Upload the box to W&B Cloud
+            # 4. The fused predictor is what the API actually loads
+            artifact.add_file(fused_model_path)
+
+            # 5. Upload the box to W&B Cloud
             run.log_artifact(artifact)
             
             print("Model successfully registered in W&B Cloud!")
@@ -135,6 +199,147 @@ class ModelTrainer:
             wandb.finish() # Close run even if it fails
             raise Exception(e)
 
+    # ---------------------------------------------------------
+    # FULL REFIT
+    # ---------------------------------------------------------
+    def fit_ensemble(self, X_train, X_test, y_train, y_test, params, versions):
+        # TRAINING CACHE
+        # Same training rows + same params + same library versions -> same fitted model,
+        # so reruns on unchanged data (holidays, a retried upload) skip the fitting
+        cache = TrainingCache()
+        data_key = frame_fingerprint(X_train, y_train)
+
+        print("   Scaling Data...")
+        scaler_key = TrainingCache.key("scaler", data_key, versions)
+        scaler = cache.get(scaler_key)
+        if scaler is None:
+            scaler = StandardScaler().fit(X_train)
+            cache.put(scaler_key, scaler)
+        X_train_scaled = scaler.transform(X_train)
+        X_test_scaled = scaler.transform(X_test)
+
+        # TRAIN
+        # Members missing from the cache are fitted side by side, each with its share of the core budget
+        print("   Training Ensemble Model...")
+        members, fit_stats, keys, cached_members = fit_members_cached(
+            cache, data_key, X_train_scaled, y_train.values.ravel(), params,
+            parallel=self.model_trainer_config.parallel,
+            core_budget=self.model_trainer_config.core_budget)
+        ensemble = assemble_ensemble(members, params)
+        for name, member_stats in fit_stats.items():
+            print(f"   {name}: {member_stats}")
+
+        # LR sums, so the next run can update the linear member without the old rows
+        lr_stats = LinearSufficientStats(X_train_scaled.shape[1])
+        lr_stats.add(X_train_scaled, y_train.values.ravel())
+
+        # EVALUATE (cached too: same members + same test rows -> same metrics)
+        metrics_key = TrainingCache.key("metrics", frame_fingerprint(X_test, y_test), scaler_key, keys)
+        metrics = cache.get(metrics_key)
+        if metrics is None:
+            preds = ensemble.predict(X_test_scaled)
+            metrics = {"mae": mean_absolute_error(y_test, preds), "r2": r2_score(y_test, preds)}
+            cache.put(metrics_key, metrics)
+        cache_metrics = {"cache_hits": cache.hits, "cache_misses": cache.misses,
+                         "cached_members": len(cached_members)}
+        return scaler, ensemble, lr_stats, fit_stats, metrics["mae"], metrics["r2"], cache_metrics
+
+    # ---------------------------------------------------------
+    # INCREMENTAL UPDATE
+    # ---------------------------------------------------------
+    # The saved state is only used if it belongs to the model that is currently published
+    def load_training_state(self):
+        config = self.model_trainer_config
+        paths = (config.training_state_file_path, config.trained_model_file_path, config.model_version_file_path)
+        if not all(os.path.exists(path) for path in paths):
+            return None
+        try:
+            state = joblib.load(config.training_state_file_path)
+            with open(config.model_version_file_path) as file_obj:
+                published = file_obj.read().strip()
+        except Exception as e:
+            print(f"   Ignoring unreadable training state: {e}")
+            return None
+        return state if state.get("model_version") == published else None
+
+    # Returns ("incremental" | "full", reason)
+    def plan_training(self, state, X_train, y_train, params, versions):
+        config = self.model_trainer_config
+        if not config.incremental:
+            return "full", "INCREMENTAL_TRAINING is off"
+        if state is None:
+            return "full", "no training state for the published model"
+        if state["updates_since_full"] >= config.full_refit_every:
+            return "full", f"periodic full refit after {state['updates_since_full']} updates"
+        if state["params"] != params or state["versions"] != versions or state["feature_columns"] != list(FEATURE_COLUMNS):
+            return "full", "hyperparameters, library versions or features changed"
+
+        old_rows = state["train_rows"]
+        if len(X_train) < old_rows:
+            return "full", "training history got shorter"
+        # Only appending is allowed: the rows the model already saw must be unchanged
+        if frame_fingerprint(X_train.iloc[:old_rows], y_train.iloc[:old_rows]) != state["train_fingerprint"]:
+            return "full", "training history changed"
+
+        new_rows = len(X_train) - old_rows
+        if new_rows > config.max_new_share * old_rows:
+            return "full", f"{new_rows} new rows is too much for an update"
+        return "incremental", f"{new_rows} new rows"
+
+    # Updates the published ensemble with the rows after state["train_rows"].
+    # The scaler stays fixed, so the old members and the new rows share one feature space.
+    def update_ensemble(self, state, X_train, y_train, params):
+        config = self.model_trainer_config
+        started = time.perf_counter()
+
+        scaler = state["scaler"]
+        previous = joblib.load(config.trained_model_file_path)
+        old_rows = state["train_rows"]
+        new_rows = len(X_train) - old_rows
+        fit_stats = {}
+
+        if new_rows == 0:
+            # Nothing new: publish the same model again
+            lr_stats = state["lr_stats"]
+            ensemble = previous
+        else:
+            X_new = scaler.transform(X_train.iloc[old_rows:])
+            y_new = y_train.values.ravel()[old_rows:]
+            # Trees only see a recent window, so the cost does not grow with the history
+            window = max(config.incremental_window, new_rows)
+            X_recent = scaler.transform(X_train.iloc[-window:])
+            y_recent = y_train.values.ravel()[-window:]
+
+            def timed(name, fn, n_jobs=1):
+                member_started = time.perf_counter()
+                member = fn()
+                fit_stats[name] = {"fit_seconds": round(time.perf_counter() - member_started, 4), "n_jobs": n_jobs}
+                return member
+
+            # LR: exact refit on ALL training rows from the running X'X / X'y
+            lr_stats = state["lr_stats"]
+
+            def update_linear():
+                lr_stats.add(X_new, y_new)
+                return linear_from_stats(lr_stats)
+
+            lr = timed("lr", update_linear)
+
+            rf = previous.named_estimators_["rf"]
+            rf.set_params(n_jobs=config.core_budget)
+            rf = timed("rf", lambda: refresh_forest(rf, X_recent, y_recent, config.incremental_rf_trees,
+                                                    seed=42 + state["updates_since_full"] + 1), config.core_budget)
+
+            xgb = timed("xgb", lambda: continue_boosting(previous.named_estimators_["xgb"], X_recent, y_recent,
+                                                         config.incremental_xgb_rounds, params.get("xgb"),
+                                                         config.core_budget), config.core_budget)
+            ensemble = assemble_ensemble({"lr": lr, "rf": rf, "xgb": xgb}, params)
+
+        fit_stats["total"] = {"wall_seconds": round(time.perf_counter() - started, 4),
+                              "core_budget": config.core_budget, "parallel": False}
+        print(f"   Updated the ensemble with {new_rows} new rows in {fit_stats['total']['wall_seconds']:.2f}s")
+        return scaler, ensemble, lr_stats, fit_stats
+
 if __name__ == "__main__":
     trainer = ModelTrainer()
     trainer.initiate_model_trainer()
\ No newline at end of file
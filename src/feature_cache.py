@@ -0,0 +1,104 @@
+import os
+import json
+import time
+import pyarrow as pa
+import pyarrow.feather as feather
+from dataclasses import dataclass
+
+from src.feature_store import get_feature_store
+from src.utils import save_text
+
+
+@dataclass
+class FeatureCacheConfig:
+    # Arrow IPC (uncompressed Feather v2) so the file can be memory-mapped on read
+    cache_file_path: str = os.getenv("FEATURE_CACHE_PATH", os.path.join("data", "feature_cache", "features.arrow"))
+    # FEATURE_STORE_OFFLINE=1: never touch MongoDB, only read the local mirror (CI / laptops)
+    offline: bool = os.getenv("FEATURE_STORE_OFFLINE", "0") == "1"
+
+    @property
+    def version_file_path(self):
+        return f"{self.cache_file_path}.version.json"
+
+
+# ---------------------------------------------------------
+# LOCAL MIRROR OF THE FEATURE STORE
+# ---------------------------------------------------------
+# Training and every sweep trial read the features from here instead of MongoDB.
+# Each load asks the store for its version stamp (one small aggregation); the
+# full table is only pulled again when that stamp changed.
+class FeatureCache:
+    def __init__(self, config=None, pull_fn=None, version_fn=None):
+        self.config = config or FeatureCacheConfig()
+        # Default: the backend selected by FEATURE_STORE_BACKEND (created on first use)
+        self.pull_fn = pull_fn or (lambda: get_feature_store().read())
+        self.version_fn = version_fn or (lambda: get_feature_store().version())
+
+        # The last frame read in this process (a sweep runs many trials in one process)
+        self._frame = None
+        self._frame_version = None
+
+    def local_version(self):
+        try:
+            with open(self.config.version_file_path) as file_obj:
+                return json.load(file_obj)["version"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _write(self, df, version):
+        os.makedirs(os.path.dirname(self.config.cache_file_path), exist_ok=True)
+
+        # Write next to the target and rename, then write the stamp LAST:
+        # a crash in between leaves a stamp that no longer matches, so it is refreshed
+        tmp_path = f"{self.config.cache_file_path}.tmp"
+        feather.write_feather(df, tmp_path, compression="uncompressed")
+        os.replace(tmp_path, self.config.cache_file_path)
+
+        save_text(self.config.version_file_path, json.dumps({
+            "version": version, "rows": len(df), "written_at": time.time(),
+        }))
+
+    def _read(self):
+        # Memory-mapped: numeric columns are used straight from the page cache
+        with pa.memory_map(self.config.cache_file_path, "r") as source:
+            table = pa.ipc.open_file(source).read_all()
+        return table.to_pandas(split_blocks=True)
+
+    def refresh(self, version=None):
+        version = version or self.version_fn()
+        print(f"Refreshing local feature mirror (store version {version})...")
+        df = self.pull_fn()
+        if df.empty:
+            raise Exception("Feature Store is empty! Run Data Transformation first.")
+        self._write(df, version)
+        return version
+
+    # Returns the feature table, pulling from the store only when it changed
+    def load(self, offline=None):
+        offline = self.config.offline if offline is None else offline
+
+        if offline:
+            version = self.local_version()
+            if version is None or not os.path.exists(self.config.cache_file_path):
+                raise Exception(f"Offline mode: no local feature mirror at {self.config.cache_file_path}")
+        else:
+            version = self.version_fn()
+            if version != self.local_version() or not os.path.exists(self.config.cache_file_path):
+                self.refresh(version)
+
+        if self._frame is None or self._frame_version != version:
+            self._frame = self._read()
+            self._frame_version = version
+            print(f"Loaded {len(self._frame)} feature rows from the local mirror (version {version}).")
+        return self._frame
+
+
+_default_cache = None
+
+
+# Shared entry point for ModelTrainer and the sweep trials
+def load_training_features(offline=None):
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = FeatureCache()
+    return _default_cache.load(offline=offline)
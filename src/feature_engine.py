@@ -0,0 +1,297 @@
+import os
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass, field
+from concurrent.futures import ProcessPoolExecutor
+
+# ---------------------------------------------------------
+# FEATURE REGISTRY
+# ---------------------------------------------------------
+# Each feature declares WHAT it needs (kind, input columns, window, extra params);
+# the engine decides HOW to compute it and shares intermediates between features
+# (e.g. SMA_10 and Volatility use the same running sums, MACD reuses EMA_12 / EMA_26).
+
+
+@dataclass(frozen=True)
+class FeatureSpec:
+    name: str
+    kind: str                      # sma | std | ema | rsi | macd | macd_signal | atr | return | log_return | shift
+    inputs: tuple = ("Close",)
+    window: int = None
+    params: dict = field(default_factory=dict, hash=False)
+
+
+FEATURE_REGISTRY = {}
+
+
+def register_feature(spec):
+    FEATURE_REGISTRY[spec.name] = spec
+    return spec
+
+
+# The four features the model is trained on (same recipe as before the engine existed)
+register_feature(FeatureSpec("SMA_10", "sma", window=10))
+register_feature(FeatureSpec("SMA_50", "sma", window=50))
+register_feature(FeatureSpec("Volatility", "std", window=10))
+register_feature(FeatureSpec("Target", "shift", window=-1))     # tomorrow's close
+
+# Extra indicators (opt-in through FEATURE_SET)
+register_feature(FeatureSpec("EMA_12", "ema", window=12))
+register_feature(FeatureSpec("EMA_26", "ema", window=26))
+register_feature(FeatureSpec("RSI_14", "rsi", window=14))
+register_feature(FeatureSpec("MACD", "macd", params={"fast": 12, "slow": 26}))
+register_feature(FeatureSpec("MACD_signal", "macd_signal", window=9, params={"fast": 12, "slow": 26}))
+register_feature(FeatureSpec("ATR_14", "atr", inputs=("High", "Low", "Close"), window=14))
+register_feature(FeatureSpec("Return_1", "return", window=1))
+register_feature(FeatureSpec("LogReturn_1", "log_return", window=1))
+
+DEFAULT_FEATURES = ["SMA_10", "SMA_50", "Volatility", "Target"]
+
+
+# ---------------------------------------------------------
+# VECTORIZED PANEL ENGINE
+# ---------------------------------------------------------
+# Works on a (n_steps x n_symbols) float64 panel per input column, where row t of a
+# symbol's column is that symbol's t-th bar (see build_panel). Every operation runs
+# over all symbols at once; loops only go over time for recursive indicators (EMA).
+# Missing values (NaN) behave like pandas rolling(): any NaN in a window -> NaN.
+class PanelContext:
+    def __init__(self, panel):
+        self.panel = panel
+        self._cache = {}
+
+    def _memo(self, key, fn):
+        if key not in self._cache:
+            self._cache[key] = fn()
+        return self._cache[key]
+
+    def column(self, name):
+        return self.panel[name]
+
+    # Prefix sums with a leading zero row: window sum = cs[t+1] - cs[t+1-w]
+    def _prefix(self, key, values):
+        return self._memo(key, lambda: np.vstack([np.zeros((1, values.shape[1])), np.cumsum(values, axis=0)]))
+
+    def _valid_prefix(self, name):
+        return self._prefix(("valid", name), np.isfinite(self.column(name)).astype(np.float64))
+
+    # Values shifted by the per-symbol mean so sums of squares don't lose precision
+    def _centered(self, name):
+        def build():
+            x = self.column(name)
+            with np.errstate(invalid="ignore"):
+                center = np.nanmean(x, axis=0) if np.isfinite(x).any() else np.zeros(x.shape[1])
+            return np.nan_to_num(x - np.nan_to_num(center)), np.nan_to_num(center)
+        return self._memo(("centered", name), build)
+
+    def _window_sum(self, key, prefix, window):
+        out = np.full((prefix.shape[0] - 1, prefix.shape[1]), np.nan)
+        if window <= out.shape[0]:
+            out[window - 1:] = prefix[window:] - prefix[:-window]
+        return out
+
+    def _full_window(self, name, window):
+        # True where all `window` values are present
+        return self._memo(("full", name, window),
+                          lambda: self._window_sum(None, self._valid_prefix(name), window) == window)
+
+    def rolling_mean(self, name, window):
+        def build():
+            centered, center = self._centered(name)
+            sums = self._window_sum(None, self._prefix(("sum", name), centered), window)
+            return np.where(self._full_window(name, window), sums / window + center, np.nan)
+        return self._memo(("mean", name, window), build)
+
+    def rolling_std(self, name, window):
+        def build():
+            centered, center = self._centered(name)
+            sums = self._window_sum(None, self._prefix(("sum", name), centered), window)
+            sumsq = self._window_sum(None, self._prefix(("sumsq", name), centered * centered), window)
+            # Sample variance (ddof=1), same as pandas rolling().std()
+            variance = np.maximum((sumsq - sums * sums / window) / (window - 1), 0.0)
+            return np.where(self._full_window(name, window), np.sqrt(variance), np.nan)
+        return self._memo(("std", name, window), build)
+
+    # Exponential average with alpha, like pandas ewm(adjust=False); NaNs keep the last value
+    def ewm(self, key, values, alpha, min_periods):
+        def build():
+            out = np.full(values.shape, np.nan)
+            state = np.full(values.shape[1], np.nan)
+            seen = np.zeros(values.shape[1])
+            for t in range(values.shape[0]):
+                x = values[t]
+                valid = np.isfinite(x)
+                state = np.where(valid & np.isnan(state), x, state)
+                state = np.where(valid, state + alpha * (x - state), state)
+                seen += valid
+                out[t] = np.where(seen >= min_periods, state, np.nan)
+            return out
+        return self._memo(key, build)
+
+    def ema(self, name, span):
+        return self.ewm(("ema", name, span), self.column(name), 2.0 / (span + 1), span)
+
+    def diff(self, name):
+        def build():
+            x = self.column(name)
+            out = np.full(x.shape, np.nan)
+            out[1:] = x[1:] - x[:-1]
+            return out
+        return self._memo(("diff", name), build)
+
+    def shift(self, name, periods):
+        x = self.column(name)
+        out = np.full(x.shape, np.nan)
+        if periods < 0:
+            out[:periods] = x[-periods:]
+        elif periods > 0:
+            out[periods:] = x[:-periods]
+        else:
+            out[:] = x
+        return out
+
+    def macd(self, name, fast, slow):
+        return self._memo(("macd", name, fast, slow), lambda: self.ema(name, fast) - self.ema(name, slow))
+
+
+def _compute_feature(ctx, spec):
+    source = spec.inputs[0]
+    if spec.kind == "sma":
+        return ctx.rolling_mean(source, spec.window)
+    if spec.kind == "std":
+        return ctx.rolling_std(source, spec.window)
+    if spec.kind == "shift":
+        return ctx.shift(source, spec.window)
+    if spec.kind == "ema":
+        return ctx.ema(source, spec.window)
+    if spec.kind == "return":
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return ctx.diff(source) / ctx.shift(source, spec.window)
+    if spec.kind == "log_return":
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.log(ctx.column(source) / ctx.shift(source, spec.window))
+    if spec.kind == "rsi":
+        # Wilder's smoothing (alpha = 1/window) of gains and losses
+        change = ctx.diff(source)
+        alpha = 1.0 / spec.window
+        gain = ctx.ewm(("gain", source, spec.window), np.where(change > 0, change, np.where(np.isnan(change), np.nan, 0.0)),
+                       alpha, spec.window)
+        loss = ctx.ewm(("loss", source, spec.window), np.where(change < 0, -change, np.where(np.isnan(change), np.nan, 0.0)),
+                       alpha, spec.window)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(loss == 0, 100.0, 100.0 - 100.0 / (1.0 + gain / loss))
+    if spec.kind == "macd":
+        return ctx.macd(source, spec.params["fast"], spec.params["slow"])
+    if spec.kind == "macd_signal":
+        macd = ctx.macd(source, spec.params["fast"], spec.params["slow"])
+        return ctx.ewm(("macd_signal", source, spec.window), macd, 2.0 / (spec.window + 1), spec.window)
+    if spec.kind == "atr":
+        high, low, close = (ctx.column(name) for name in spec.inputs)
+        prev_close = ctx.shift(spec.inputs[2], 1)
+        true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+        return ctx.ewm(("atr", spec.inputs, spec.window), true_range, 1.0 / spec.window, spec.window)
+    raise ValueError(f"Unknown feature kind '{spec.kind}' for {spec.name}")
+
+
+# Evaluates the features on a dict of (n_dates x n_symbols) arrays
+def compute_panel(panel, features=DEFAULT_FEATURES):
+    ctx = PanelContext(panel)
+    return {name: _compute_feature(ctx, FEATURE_REGISTRY[name]) for name in features}
+
+
+def _required_inputs(features):
+    inputs = []
+    for name in features:
+        for column in FEATURE_REGISTRY[name].inputs:
+            if column not in inputs:
+                inputs.append(column)
+    return inputs
+
+
+# Compacted panel: each symbol's rows are stacked in date order on their OWN dates,
+# starting at row 0, and shorter symbols are padded with NaN at the end. A date that
+# only some symbols have (a trading halt, another exchange's calendar, intraday gaps)
+# therefore never puts a NaN inside another symbol's windows or its Target shift.
+# Returns the panel plus the (row, column) position of every input row.
+def build_panel(df, columns, date_col="Date"):
+    if df.duplicated(["symbol", date_col]).any():
+        raise ValueError(f"Duplicate (symbol, {date_col}) rows: each symbol needs one row per bar")
+
+    codes, symbols = pd.factorize(df["symbol"], sort=True)
+    order = np.lexsort((df[date_col].to_numpy(), codes))
+    counts = np.bincount(codes, minlength=len(symbols))
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+
+    row_pos = np.empty(len(df), dtype=np.int64)
+    row_pos[order] = np.arange(len(df)) - starts[codes[order]]
+
+    n_steps = int(counts.max()) if len(counts) else 0
+    panel = {}
+    for column in columns:
+        values = np.full((n_steps, len(symbols)), np.nan)
+        values[row_pos, codes] = df[column].to_numpy(dtype=np.float64)
+        panel[column] = values
+    return panel, row_pos, codes
+
+
+# Long frame (symbol, date column, raw columns) -> long frame with the features added.
+# Rows where any requested feature is NaN are dropped, like the original dropna().
+# Every symbol gets exactly the rows it would get if it were computed on its own.
+def compute_features_frame(df, features=DEFAULT_FEATURES, date_col="Date"):
+    features = list(features)
+    unknown = [name for name in features if name not in FEATURE_REGISTRY]
+    if unknown:
+        raise ValueError(f"Unknown features: {unknown}. Registered: {sorted(FEATURE_REGISTRY)}")
+
+    panel, row_pos, col_pos = build_panel(df, _required_inputs(features), date_col)
+    results = compute_panel(panel, features)
+
+    # Back to long form, aligned with the input rows
+    out = df.copy()
+    for name in features:
+        out[name] = results[name][row_pos, col_pos]
+    return out.dropna(subset=features)
+
+
+def _compute_group(args):
+    df, features, date_col = args
+    return compute_features_frame(df, features, date_col)
+
+
+# n_jobs > 1 splits the symbols across a process pool (each worker gets whole symbols)
+def compute_features(df, features=DEFAULT_FEATURES, date_col="Date", n_jobs=1):
+    symbols = df["symbol"].unique()
+    if n_jobs <= 1 or len(symbols) < 2:
+        return compute_features_frame(df, features, date_col)
+
+    groups = np.array_split(symbols, min(n_jobs, len(symbols)))
+    tasks = [(df[df["symbol"].isin(group)], list(features), date_col) for group in groups]
+    with ProcessPoolExecutor(max_workers=len(tasks)) as pool:
+        parts = list(pool.map(_compute_group, tasks))
+    return pd.concat(parts).sort_index()
+
+
+# Kinds that only look at a fixed number of past rows (recursive ones like EMA / RSI / ATR
+# depend on the whole history, so they can't be carried across chunks with a finite tail)
+WINDOWED_KINDS = {"sma": lambda spec: spec.window, "std": lambda spec: spec.window,
+                  "shift": lambda spec: max(1, -spec.window), "return": lambda spec: spec.window + 1,
+                  "log_return": lambda spec: spec.window + 1}
+
+
+# Rows of history a chunk needs from the previous one to continue every window
+def streaming_lookback(features):
+    lookback = 1
+    for name in features:
+        spec = FEATURE_REGISTRY[name]
+        if spec.kind not in WINDOWED_KINDS:
+            raise ValueError(f"{name} ({spec.kind}) depends on the full history and can't be streamed in chunks")
+        lookback = max(lookback, WINDOWED_KINDS[spec.kind](spec))
+    return lookback
+
+
+# FEATURE_SET=SMA_10,SMA_50,Volatility,Target,RSI_14,... (the model still trains on the default four)
+def configured_features():
+    names = os.getenv("FEATURE_SET")
+    if not names:
+        return list(DEFAULT_FEATURES)
+    return [name.strip() for name in names.split(",") if name.strip()]
@@ -0,0 +1,269 @@
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+import numpy as np
+import pandas as pd
+
+from src.utils import (FEATURE_STORE_COLUMNS, ROW_HASH_FIELD, column_dtype,
+                       feature_store_version, get_feature_collection, prepare_feature_frame,
+                       pull_feature_columns, push_to_feature_store)
+
+# Bump when the stored columns or their meaning change; a store written by a
+# NEWER schema is refused instead of being silently misread
+SCHEMA_VERSION = 1
+
+# Every column a backend stores (besides the row hash)
+STORE_COLUMNS = ["symbol", "Date", "Open", "High", "Low", "Close", "Volume",
+                 "SMA_10", "SMA_50", "Volatility", "Target"]
+
+
+# ---------------------------------------------------------
+# FEATURE STORE INTERFACE
+# ---------------------------------------------------------
+# Every backend stores rows keyed on (symbol, Date) and supports:
+#   write(df, mode)                         -> bulk upsert ("upsert" | "replace")
+#   read(symbol, start, end, columns)       -> typed DataFrame sorted by (symbol, Date)
+#   version()                               -> stamp that changes whenever the content does
+#   schema_version()                        -> SCHEMA_VERSION the store was written with
+# A backend missing any of them fails when it is created, not at first use.
+class FeatureStore(ABC):
+    name = "base"
+
+    @abstractmethod
+    def write(self, df, mode="upsert"):
+        ...
+
+    @abstractmethod
+    def read(self, symbol=None, start=None, end=None, columns=None):
+        ...
+
+    @abstractmethod
+    def version(self):
+        ...
+
+    @abstractmethod
+    def schema_version(self):
+        ...
+
+    def check_schema(self, stored_version):
+        if stored_version is not None and stored_version > SCHEMA_VERSION:
+            raise Exception(f"{self.name} feature store uses schema v{stored_version}, "
+                            f"this code only understands up to v{SCHEMA_VERSION}")
+
+
+# ---------------------------------------------------------
+# MONGODB BACKEND (the production store)
+# ---------------------------------------------------------
+class MongoFeatureStore(FeatureStore):
+    name = "mongo"
+    META_COLLECTION = "feature_store_meta"
+
+    def __init__(self, collection=None):
+        self._collection = collection
+
+    @property
+    def collection(self):
+        # Connect on first use, not when the backend is created
+        if self._collection is None:
+            self._collection = get_feature_collection()
+        return self._collection
+
+    def _meta(self):
+        return self.collection.database[self.META_COLLECTION]
+
+    def schema_version(self):
+        doc = self._meta().find_one({"_id": "schema"})
+        return doc["version"] if doc else None
+
+    def write(self, df, mode="upsert"):
+        self.check_schema(self.schema_version())
+        result = push_to_feature_store(df, mode=mode, collection=self.collection)
+        self._meta().update_one({"_id": "schema"}, {"$set": {"version": SCHEMA_VERSION}}, upsert=True)
+        return result
+
+    def read(self, symbol=None, start=None, end=None, columns=None):
+        return pull_feature_columns(symbol=symbol, start=start, end=end, columns=columns,
+                                    collection=self.collection)
+
+    def version(self):
+        return feature_store_version(self.collection)
+
+
+# ---------------------------------------------------------
+# SQLITE BACKEND (local file, no server)
+# ---------------------------------------------------------
+# Dates are stored as int64 nanoseconds so range filters are plain integer
+# comparisons on the (symbol, Date) primary key.
+class SQLiteFeatureStore(FeatureStore):
+    name = "sqlite"
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._local = threading.local()
+
+        dir_path = os.path.dirname(db_path)
+        if dir_path:
+            os.makedirs(dir_path, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            column_defs = ", ".join(f'"{col}" {self._sql_type(col)}' for col in STORE_COLUMNS)
+            conn.execute(f"CREATE TABLE IF NOT EXISTS features ({column_defs}, {ROW_HASH_FIELD} INTEGER, "
+                         f"PRIMARY KEY (symbol, Date)) WITHOUT ROWID")
+        self.check_schema(self.schema_version())
+
+    @staticmethod
+    def _sql_type(col):
+        if col == "symbol":
+            return "TEXT NOT NULL"
+        if col in ("Date", "Volume"):
+            return "INTEGER"
+        return "REAL"
+
+    # One connection per thread (sqlite3 connections must stay on their thread)
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def schema_version(self):
+        row = self._connect().execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+        return int(row[0]) if row else None
+
+    def write(self, df, mode="upsert"):
+        if mode not in ("upsert", "replace"):
+            raise ValueError(f"Unknown push mode '{mode}' (use 'upsert' or 'replace')")
+
+        frame = prepare_feature_frame(df)
+        frame["Date"] = frame["Date"].astype("datetime64[ns]").astype("int64")
+        for col in STORE_COLUMNS:
+            if col not in frame.columns:
+                frame[col] = None
+        # Extra numeric features (e.g. RSI_14 from FEATURE_SET) get their own REAL column
+        extra_columns = self._add_extra_columns(
+            [col for col in frame.columns if col not in STORE_COLUMNS + [ROW_HASH_FIELD]
+             and pd.api.types.is_numeric_dtype(frame[col])])
+        columns = STORE_COLUMNS + extra_columns
+        frame = frame[columns + [ROW_HASH_FIELD]]
+        # NaN -> NULL, NumPy scalars -> Python numbers
+        rows = frame.astype(object).where(frame.notna(), None).itertuples(index=False, name=None)
+
+        names = ", ".join(f'"{col}"' for col in columns + [ROW_HASH_FIELD])
+        updates = ", ".join(f'"{col}" = excluded."{col}"' for col in columns[2:] + [ROW_HASH_FIELD])
+        placeholders = ", ".join("?" * (len(columns) + 1))
+
+        conn = self._connect()
+        with conn:  # one transaction for the whole batch
+            before = conn.total_changes
+            # Rows whose hash did not change are skipped by the WHERE clause
+            conn.executemany(
+                f"INSERT INTO features ({names}) VALUES ({placeholders}) "
+                f"ON CONFLICT (symbol, Date) DO UPDATE SET {updates} "
+                f"WHERE features.{ROW_HASH_FIELD} IS NOT excluded.{ROW_HASH_FIELD}",
+                rows)
+            written = conn.total_changes - before
+
+            deleted = 0
+            if mode == "replace":
+                conn.execute("CREATE TEMP TABLE IF NOT EXISTS keep (symbol TEXT, Date INTEGER)")
+                conn.execute("DELETE FROM keep")
+                conn.executemany("INSERT INTO keep VALUES (?, ?)",
+                                 zip(frame["symbol"].tolist(), frame["Date"].tolist()))
+                deleted = conn.execute(
+                    "DELETE FROM features WHERE symbol IN (SELECT DISTINCT symbol FROM keep) "
+                    "AND (symbol, Date) NOT IN (SELECT symbol, Date FROM keep)").rowcount
+
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('schema_version', ?)", (str(SCHEMA_VERSION),))
+
+        print(f"Feature Store push: {written} new or updated, {len(frame) - written} unchanged, {deleted} deleted rows.")
+        return {"written": written, "unchanged": len(frame) - written, "deleted": deleted}
+
+    def _add_extra_columns(self, names):
+        conn = self._connect()
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(features)")}
+        for name in names:
+            if name not in existing:
+                conn.execute(f'ALTER TABLE features ADD COLUMN "{name}" REAL')
+        return names
+
+    def read(self, symbol=None, start=None, end=None, columns=None):
+        columns = list(columns or FEATURE_STORE_COLUMNS)
+
+        where, params = [], []
+        if symbol is not None:
+            symbols = [symbol] if isinstance(symbol, str) else list(symbol)
+            where.append(f"symbol IN ({', '.join('?' * len(symbols))})")
+            params += [s.upper() for s in symbols]
+        if start is not None:
+            where.append("Date >= ?")
+            params.append(pd.Timestamp(start).value)
+        if end is not None:
+            where.append("Date <= ?")
+            params.append(pd.Timestamp(end).value)
+
+        names = ", ".join(f'"{col}"' for col in columns)
+        query = f"SELECT {names} FROM features"
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        query += " ORDER BY symbol, Date"
+
+        rows = self._connect().execute(query, params).fetchall()
+        data = {}
+        for i, col in enumerate(columns):
+            values = [row[i] for row in rows]
+            dtype = column_dtype(col)
+            if col == "Date":
+                data[col] = pd.to_datetime(np.array(values, dtype=np.int64), unit="ns")
+            elif dtype is np.float32:
+                data[col] = np.array(values, dtype=np.float64).astype(np.float32)
+            elif dtype is np.int64:
+                data[col] = np.array([0 if v is None else v for v in values], dtype=np.int64)
+            else:
+                data[col] = np.array(values, dtype=object)
+        df = pd.DataFrame(data)
+        if "symbol" in df.columns:
+            df["symbol"] = df["symbol"].astype("category")
+
+        print(f"Successfully read {len(df)} rows x {len(columns)} columns from SQLite.")
+        return df
+
+    def version(self):
+        rows, max_date, checksum = self._connect().execute(
+            f"SELECT COUNT(*), MAX(Date), SUM({ROW_HASH_FIELD} % 1000000007) FROM features").fetchone()
+        if rows == 0:
+            return "empty"
+        return f"{rows}:{pd.Timestamp(max_date).isoformat()}:{int(checksum)}"
+
+
+# ---------------------------------------------------------
+# BACKEND SELECTION
+# ---------------------------------------------------------
+# FEATURE_STORE_BACKEND=mongo (default) | sqlite
+# FEATURE_STORE_SQLITE_PATH=data/feature_store.db
+def create_feature_store(backend=None):
+    backend = (backend or os.getenv("FEATURE_STORE_BACKEND", "mongo")).lower()
+    if backend == "mongo":
+        return MongoFeatureStore()
+    if backend == "sqlite":
+        return SQLiteFeatureStore(os.getenv("FEATURE_STORE_SQLITE_PATH", os.path.join("data", "feature_store.db")))
+    raise ValueError(f"Unknown FEATURE_STORE_BACKEND '{backend}' (use 'mongo' or 'sqlite')")
+
+
+_feature_store = None
+_feature_store_lock = threading.Lock()
+
+
+# The process-wide store selected by FEATURE_STORE_BACKEND
+def get_feature_store():
+    global _feature_store
+    if _feature_store is None:
+        with _feature_store_lock:
+            if _feature_store is None:
+                _feature_store = create_feature_store()
+                print(f"Using the {_feature_store.name} feature store backend.")
+    return _feature_store
@@ -0,0 +1,71 @@
+import os
+import numpy as np
+import joblib
+
+# ---------------------------------------------------------
+# FUSED PREDICTOR (Serving side)
+# ---------------------------------------------------------
+# A plain-NumPy copy of "StandardScaler -> VotingRegressor(LR + RF + XGB)".
+# It is built by src/components/model_export.py and only needs numpy + joblib
+# to run, so the API never has to import sklearn or xgboost.
+#
+# The whole ensemble is reduced to:
+#   prediction = linear_coef . x + intercept + sum(leaf value of every tree)
+# - The scaler and the voting weights are folded into the linear part and the leaf values.
+# - Every RF and XGB tree is flattened into ONE set of contiguous node arrays.
+#   Children of a node sit next to each other, so "next = left[node] + (x > threshold)".
+#   Leaves point to themselves with threshold=+inf, so extra steps are no-ops.
+
+
+class FusedPredictor:
+    def __init__(self, arrays):
+        self.arrays = arrays
+        self.feature_names = [str(name) for name in arrays["feature_names"]]
+        self.n_features = len(self.feature_names)
+
+        self.mean = arrays["scaler_mean"]
+        self.scale = arrays["scaler_scale"]
+        self.linear_coef = arrays["linear_coef"]
+        self.intercept = float(arrays["intercept"])
+
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.left = arrays["left"]
+        self.value = arrays["value"]
+        self.roots = arrays["roots"]
+        self.depth = int(arrays["depth"])
+
+    # Same output as ensemble.predict(scaler.transform(X)), but takes RAW features
+    def predict(self, features):
+        X = np.asarray(features, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if not np.isfinite(X).all():
+            raise ValueError("Fused predictor requires finite feature values")
+
+        n_rows = X.shape[0]
+
+        # Trees see standardized features cast to float32 (what sklearn and XGBoost both do)
+        z = ((X - self.mean) / self.scale).astype(np.float32).ravel()
+
+        # (n_rows x n_trees) node ids: every tree of every row advances one level per step
+        node = np.broadcast_to(self.roots, (n_rows, len(self.roots)))
+        row_offset = (np.arange(n_rows) * self.n_features)[:, None]
+
+        for _ in range(self.depth):
+            go_right = z[row_offset + self.feature[node]] > self.threshold[node]
+            node = self.left[node] + go_right
+
+        return X @ self.linear_coef + self.intercept + self.value[node].sum(axis=1)
+
+    def save(self, file_path):
+        # Write next to the target and rename: a worker that has the old file
+        # memory-mapped keeps reading the old inode instead of a half-written one
+        tmp_path = f"{file_path}.tmp"
+        joblib.dump(self.arrays, tmp_path)
+        os.replace(tmp_path, file_path)
+
+    # mmap_mode="r" lets several workers share the node arrays through the page cache
+    @classmethod
+    def load(cls, file_path, mmap_mode=None):
+        return cls(joblib.load(file_path, mmap_mode=mmap_mode))
@@ -0,0 +1,417 @@
+import os
+import json
+import time
+import queue
+import random
+import itertools
+import threading
+import multiprocessing
+import numpy as np
+import xgboost
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+
+from src.utils import save_text
+from src.components.ensemble_training import FEATURE_COLUMNS, TARGET_COLUMN, build_member
+
+# Early stopping watches the most recent 10% of the TRAINING rows. The validation rows
+# only score trials: stopping on them too would make the best MAE look better than it is.
+EARLY_STOPPING_SHARE = 0.1
+
+# The "menu" of options (the W&B sweep in src/tunning.py uses the same one)
+SEARCH_SPACE = {
+    # Random Forest Params
+    "rf_n_estimators": [50, 100, 200],
+    "rf_max_depth": [10, 20, None],
+    # XGBoost Params
+    "xgb_learning_rate": [0.01, 0.1, 0.2],
+    "xgb_n_estimators": [50, 100, 200],
+}
+
+
+@dataclass
+class LocalSearchConfig:
+    # grid | random | asha (successive halving over XGBoost rounds)
+    method: str = os.getenv("HPO_METHOD", "asha")
+    # Configurations to try (random / asha); grid tries every combination
+    n_trials: int = int(os.getenv("HPO_TRIALS", "20"))
+    n_jobs: int = int(os.getenv("HPO_JOBS", "0")) or os.cpu_count()
+    seed: int = int(os.getenv("HPO_SEED", "42"))
+
+    # ASHA: rungs at min_rounds * eta^k XGBoost rounds (capped at max_rounds);
+    # only the best 1/eta of a rung go on to the next one
+    min_rounds: int = int(os.getenv("HPO_MIN_ROUNDS", "25"))
+    max_rounds: int = int(os.getenv("HPO_MAX_ROUNDS", "200"))
+    eta: int = int(os.getenv("HPO_ETA", "3"))
+    # Stop boosting once XGBoost's MAE on the last EARLY_STOPPING_SHARE of the training
+    # rows hasn't improved for N rounds (0 = off)
+    early_stopping_rounds: int = int(os.getenv("HPO_EARLY_STOPPING", "20"))
+
+    results_file_path: str = os.path.join("data", "hpo", "results.jsonl")
+    summary_file_path: str = os.path.join("data", "hpo", "best.json")
+    # HPO_WANDB=1: also log every trial to W&B from a background thread
+    wandb: bool = os.getenv("HPO_WANDB", "0") == "1"
+
+
+# Search params -> the ensemble_params dict ModelTrainer uses
+def to_ensemble_params(params, rounds=None):
+    return {
+        "lr": {},
+        "rf": {"n_estimators": params["rf_n_estimators"], "max_depth": params["rf_max_depth"], "random_state": 42},
+        "xgb": {"n_estimators": rounds or params["xgb_n_estimators"],
+                "learning_rate": params["xgb_learning_rate"], "random_state": 42},
+    }
+
+
+# ---------------------------------------------------------
+# SHARED FEATURE MATRIX
+# ---------------------------------------------------------
+# The scaled train/validation arrays are copied ONCE into shared memory;
+# every worker maps the same block instead of receiving its own pickled copy.
+ARRAY_NAMES = ("X_train", "y_train", "X_val", "y_val")
+_arrays = {}
+_shm = None
+
+
+def share_arrays(arrays):
+    total = sum(arrays[name].nbytes for name in ARRAY_NAMES)
+    shm = shared_memory.SharedMemory(create=True, size=max(total, 1))
+    layout = {}
+    offset = 0
+    for name in ARRAY_NAMES:
+        array = np.ascontiguousarray(arrays[name], dtype=np.float64)
+        np.ndarray(array.shape, np.float64, buffer=shm.buf, offset=offset)[...] = array
+        layout[name] = (offset, array.shape)
+        offset += array.nbytes
+    return shm, layout
+
+
+def _attach_arrays(shm_name, layout):
+    global _shm
+    # Workers only attach; the parent creates and unlinks the block
+    _shm = shared_memory.SharedMemory(name=shm_name)
+    for name, (offset, shape) in layout.items():
+        _arrays[name] = np.ndarray(shape, np.float64, buffer=_shm.buf, offset=offset)
+
+
+# ---------------------------------------------------------
+# ONE TRIAL (runs in a worker)
+# ---------------------------------------------------------
+# job: trial id, search params, target XGBoost rounds, and for an ASHA promotion the
+# booster + LR/RF validation predictions of the previous rung (so nothing is refitted).
+def run_trial(job):
+    started = time.perf_counter()
+    X_train, y_train = _arrays["X_train"], _arrays["y_train"]
+    X_val, y_val = _arrays["X_val"], _arrays["y_val"]
+    params = to_ensemble_params(job["params"], job["rounds"])
+
+    # LR and RF don't depend on the number of boosting rounds: fitted once per trial
+    base_preds = job.get("base_preds")
+    if base_preds is None:
+        base_preds = {name: build_member(name, params[name]).fit(X_train, y_train).predict(X_val)
+                      for name in ("lr", "rf")}
+
+    previous = None
+    if job.get("booster") is not None:
+        previous = xgboost.Booster()
+        previous.load_model(bytearray(job["booster"]))
+    done_rounds = previous.num_boosted_rounds() if previous is not None else 0
+
+    xgb_params = dict(params["xgb"], n_estimators=job["rounds"] - done_rounds)
+    xgb = build_member("xgb", xgb_params)
+    early_stopping_rounds = job.get("early_stopping_rounds") or None
+    if early_stopping_rounds:
+        # Boost on the older training rows, stop on the newest ones
+        n_stop = max(1, int(len(X_train) * EARLY_STOPPING_SHARE))
+        X_fit, y_fit = X_train[:-n_stop], y_train[:-n_stop]
+        eval_set = [(X_train[-n_stop:], y_train[-n_stop:])]
+    else:
+        X_fit, y_fit, eval_set = X_train, y_train, None
+    xgb.set_params(eval_metric="mae", early_stopping_rounds=early_stopping_rounds)
+    xgb.fit(X_fit, y_fit, eval_set=eval_set, xgb_model=previous, verbose=False)
+    booster = xgb.get_booster()
+
+    # XGBoost's per-round MAE on the held-out training tail decides early termination
+    best_iteration = getattr(xgb, "best_iteration", None) if early_stopping_rounds else None
+    converged = best_iteration is not None and best_iteration + 1 < booster.num_boosted_rounds()
+    if converged:
+        booster = booster[:best_iteration + 1]
+
+    xgb_preds = booster.inplace_predict(X_val)
+    preds = (base_preds["lr"] + base_preds["rf"] + xgb_preds) / 3
+    return {
+        "trial": job["trial"],
+        "rung": job.get("rung", 0),
+        "params": job["params"],
+        "rounds": booster.num_boosted_rounds(),
+        "mae": float(np.mean(np.abs(preds - y_val))),
+        "xgb_val_mae": float(np.mean(np.abs(xgb_preds - y_val))),
+        "converged": converged,
+        "seconds": round(time.perf_counter() - started, 3),
+        # Kept by the ASHA scheduler for promotions, never written to the results file
+        "booster": bytes(booster.save_raw("ubj")) if job.get("keep_state") else None,
+        "base_preds": base_preds if job.get("keep_state") else None,
+    }
+
+
+# ---------------------------------------------------------
+# SCHEDULERS
+# ---------------------------------------------------------
+# next_job() -> a job, or None when nothing can start until a running trial reports back.
+# done() -> True once every trial is finished.
+class GridScheduler:
+    def __init__(self, space, config):
+        names = list(space)
+        self.pending = [dict(zip(names, values)) for values in itertools.product(*space.values())]
+        self.config = config
+        self.started = 0
+        self.finished = 0
+
+    def _job(self, params):
+        job = {"trial": self.started, "params": params, "rounds": params["xgb_n_estimators"],
+               "early_stopping_rounds": self.config.early_stopping_rounds}
+        self.started += 1
+        return job
+
+    def next_job(self):
+        return self._job(self.pending.pop(0)) if self.pending else None
+
+    def report(self, result):
+        self.finished += 1
+
+    def done(self):
+        return not self.pending and self.finished == self.started
+
+
+class RandomScheduler(GridScheduler):
+    def __init__(self, space, config):
+        super().__init__(space, config)
+        rng = random.Random(config.seed)
+        # Distinct combinations in random order (never more than the grid holds)
+        rng.shuffle(self.pending)
+        self.pending = self.pending[:config.n_trials]
+
+
+# Asynchronous successive halving: a finished rung result is promoted as soon as it is in
+# the top 1/eta of its rung, otherwise a new configuration starts. The number of XGBoost
+# rounds is the budget, so xgb_n_estimators is not searched: it is the rung a trial reaches.
+class ASHAScheduler:
+    def __init__(self, space, config):
+        self.config = config
+        self.space = {name: values for name, values in space.items() if name != "xgb_n_estimators"}
+        self.rng = random.Random(config.seed)
+
+        self.rungs = []
+        rounds = config.min_rounds
+        while rounds < config.max_rounds:
+            self.rungs.append(rounds)
+            rounds *= config.eta
+        self.rungs.append(config.max_rounds)
+
+        self.results = [dict() for _ in self.rungs]  # rung -> {trial: result}
+        self.promoted = [set() for _ in self.rungs]
+        self.started = 0
+        self.running = 0
+
+    def _sample(self):
+        return {name: self.rng.choice(values) for name, values in self.space.items()}
+
+    def _job(self, trial, params, rung, previous=None):
+        self.running += 1
+        return {"trial": trial, "params": params, "rung": rung, "rounds": self.rungs[rung],
+                "early_stopping_rounds": self.config.early_stopping_rounds, "keep_state": True,
+                "booster": previous["booster"] if previous else None,
+                "base_preds": previous["base_preds"] if previous else None}
+
+    # Best unpromoted result in the top 1/eta of a rung (highest rung first)
+    def _promotion(self):
+        for rung in range(len(self.rungs) - 2, -1, -1):
+            ranked = sorted(self.results[rung].values(), key=lambda result: result["mae"])
+            for result in ranked[:len(ranked) // self.config.eta]:
+                if result["trial"] not in self.promoted[rung] and not result["converged"]:
+                    return rung, result
+        return None
+
+    def next_job(self):
+        # Finish promising trials before starting new ones
+        promotion = self._promotion()
+        if promotion is not None:
+            rung, result = promotion
+            self.promoted[rung].add(result["trial"])
+            return self._job(result["trial"], result["params"], rung + 1, result)
+
+        if self.started < self.config.n_trials:
+            self.started += 1
+            return self._job(self.started - 1, self._sample(), 0)
+        return None
+
+    def report(self, result):
+        self.running -= 1
+        self.results[result["rung"]][result["trial"]] = result
+        # The previous rung's state was handed to this job and is no longer needed
+        if result["rung"] > 0:
+            previous = self.results[result["rung"] - 1].get(result["trial"])
+            if previous is not None:
+                previous["booster"] = previous["base_preds"] = None
+
+    def done(self):
+        return self.running == 0 and self.started >= self.config.n_trials and self._promotion() is None
+
+
+SCHEDULERS = {"grid": GridScheduler, "random": RandomScheduler, "asha": ASHAScheduler}
+
+
+# ---------------------------------------------------------
+# OPTIONAL ASYNC W&B REPORTING
+# ---------------------------------------------------------
+# Trials never wait on the network: results go through a queue to one background thread.
+class AsyncWandbReporter:
+    def __init__(self, config):
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, args=(config,), name="hpo-wandb", daemon=True)
+        self._thread.start()
+
+    def _run(self, config):
+        try:
+            import wandb
+            run = wandb.init(project="stock-prediction-prod", job_type="local_search", config=config)
+        except Exception as e:
+            print(f"W&B reporting disabled: {e}")
+            run = None
+
+        while True:
+            record = self._queue.get()
+            if record is None:
+                break
+            if run is not None:
+                try:
+                    run.log(record)
+                except Exception as e:
+                    print(f"W&B log failed: {e}")
+        if run is not None:
+            run.finish()
+
+    def log(self, record):
+        self._queue.put(record)
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+
+# ---------------------------------------------------------
+# SEARCH
+# ---------------------------------------------------------
+def prepare_arrays(df):
+    X = df[FEATURE_COLUMNS]
+    y = df[TARGET_COLUMN]
+    # Same split + scaler as ModelTrainer, computed once for all trials
+    X_train, X_val, y_train, y_val = train_test_split(X, y, test_size=0.2, shuffle=False)
+    scaler = StandardScaler().fit(X_train)
+    return {"X_train": scaler.transform(X_train), "y_train": y_train.to_numpy(dtype=np.float64),
+            "X_val": scaler.transform(X_val), "y_val": y_val.to_numpy(dtype=np.float64)}
+
+
+class LocalSearch:
+    def __init__(self, config=None, space=None):
+        self.config = config or LocalSearchConfig()
+        self.space = space or SEARCH_SPACE
+
+    def initiate_search(self, df=None):
+        print(f"Starting local {self.config.method} search on {self.config.n_jobs} worker(s)...")
+        try:
+            if df is None:
+                # One read of the local feature mirror for the whole search (works offline)
+                from src.feature_cache import load_training_features
+                df = load_training_features()
+
+            if self.config.method not in SCHEDULERS:
+                raise ValueError(f"Unknown HPO_METHOD '{self.config.method}' (grid | random | asha)")
+            scheduler = SCHEDULERS[self.config.method](self.space, self.config)
+
+            started = time.perf_counter()
+            results = self._run(scheduler, prepare_arrays(df))
+            best = min(results, key=lambda result: result["mae"])
+
+            summary = {
+                "method": self.config.method,
+                "trials": len({result["trial"] for result in results}),
+                "evaluations": len(results),
+                "wall_seconds": round(time.perf_counter() - started, 3),
+                "best_mae": best["mae"],
+                "best_params": best["params"],
+                "best_rounds": best["rounds"],
+                # Ready to use as ModelTrainerConfig.ensemble_params
+                "ensemble_params": to_ensemble_params(best["params"], best["rounds"]),
+            }
+            save_text(self.config.summary_file_path, json.dumps(summary, indent=2))
+            print(f"Best MAE {best['mae']:.3f} with {best['params']} ({best['rounds']} XGB rounds) "
+                  f"after {summary['evaluations']} evaluations in {summary['wall_seconds']:.1f}s")
+            return results, summary
+
+        except Exception as e:
+            raise Exception(f"Error in Local Search: {e}")
+
+    def _run(self, scheduler, arrays):
+        os.makedirs(os.path.dirname(self.config.results_file_path), exist_ok=True)
+        reporter = AsyncWandbReporter(vars(self.config)) if self.config.wandb else None
+        results = []
+
+        # Results are appended as they arrive, so a killed search keeps what it finished
+        with open(self.config.results_file_path, "w") as results_file:
+            def record(result):
+                scheduler.report(result)
+                row = {key: value for key, value in result.items() if key not in ("booster", "base_preds")}
+                results.append(row)
+                results_file.write(json.dumps(row) + "\n")
+                results_file.flush()
+                if reporter is not None:
+                    reporter.log({key: value for key, value in row.items() if key != "params"} | row["params"])
+                print(f"   trial {row['trial']} rung {row['rung']} ({row['rounds']} rounds) -> MAE {row['mae']:.3f}")
+
+            if self.config.n_jobs <= 1:
+                _attach_local(arrays)
+                while not scheduler.done():
+                    record(run_trial(scheduler.next_job()))
+            else:
+                self._run_pool(scheduler, arrays, record)
+
+        if reporter is not None:
+            reporter.close()
+        return results
+
+    def _run_pool(self, scheduler, arrays, record):
+        shm, layout = share_arrays(arrays)
+        try:
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=self.config.n_jobs, mp_context=context,
+                                     initializer=_attach_arrays, initargs=(shm.name, layout)) as pool:
+                running = set()
+                while True:
+                    # Keep every worker busy while the scheduler has work
+                    while len(running) < self.config.n_jobs:
+                        job = scheduler.next_job()
+                        if job is None:
+                            break
+                        running.add(pool.submit(run_trial, job))
+                    if not running:
+                        break
+                    finished, running = wait(running, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        record(future.result())
+        finally:
+            shm.close()
+            shm.unlink()
+
+
+# In-process run (n_jobs=1): the arrays are used directly
+def _attach_local(arrays):
+    _arrays.update({name: np.ascontiguousarray(arrays[name], dtype=np.float64) for name in ARRAY_NAMES})
+
+
+if __name__ == "__main__":
+    LocalSearch().initiate_search()
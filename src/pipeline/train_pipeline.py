@@ -24,13 +24,20 @@ if __name__ == "__main__":
     
     # INGESTION
     # Checks for file or downloads it
+    # INCREMENTAL_INGESTION=1: only the bars after the last stored date are fetched and appended
     ingestion_obj = DataIngestion()
-    raw_data_path = ingestion_obj.initiate_data_ingestion()
+    raw_data_path = ingestion_obj.initiate_data_ingestion(
+        incremental=os.getenv("INCREMENTAL_INGESTION", "0") == "1")
 
     # TRANSFORMATION
     # Reads raw data -> Engineers Features -> Pushes to MongoDB
+    # INCREMENTAL_FEATURES=1: only the new bars since the last run are computed and appended
+    # STREAMING_TRANSFORM=1: the raw file is processed in chunks (for files bigger than memory)
     transform_obj = DataTransformation()
-    transform_obj.initiate_data_transformation(raw_data_path)
+    transform_obj.initiate_data_transformation(
+        raw_data_path,
+        incremental=os.getenv("INCREMENTAL_FEATURES", "0") == "1",
+        streaming=os.getenv("STREAMING_TRANSFORM", "0") == "1")
 
     # TRAINING
     # Pulls from MongoDB -> Trains -> Saves Model
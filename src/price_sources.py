@@ -0,0 +1,155 @@
+import os
+import time
+import random
+import threading
+import pandas as pd
+
+# Columns every fetcher returns, in the order data/data.csv stores them
+PRICE_COLUMNS = ["Date", "Close", "High", "Low", "Open", "Volume"]
+
+
+# ---------------------------------------------------------
+# PRICE FETCHER INTERFACE
+# ---------------------------------------------------------
+# fetch(symbol, start=None, period=None) -> DataFrame with PRICE_COLUMNS, sorted by Date.
+#   start:  first date to fetch (incremental runs)
+#   period: how much history to fetch when there is no start (e.g. "5y")
+# last_fetch records rows, bytes and seconds of the latest call, so runs can be compared.
+class PriceFetcher:
+    name = "base"
+
+    def __init__(self):
+        self.last_fetch = {}
+
+    def fetch(self, symbol, start=None, period="5y"):
+        df, self.last_fetch = self.fetch_with_stats(symbol, start=start, period=period)
+        return df
+
+    # Thread-safe variant: the stats are returned instead of stored on the fetcher
+    def fetch_with_stats(self, symbol, start=None, period="5y"):
+        started = time.perf_counter()
+        df = normalize_prices(self._fetch(symbol, start=start, period=period))
+        stats = {
+            "symbol": symbol,
+            "rows": len(df),
+            # Size of the fetched bars as CSV (what we actually pulled, not the whole history)
+            "bytes": len(df.to_csv(index=False).encode()) if len(df) else 0,
+            "seconds": time.perf_counter() - started,
+        }
+        return df, stats
+
+    def _fetch(self, symbol, start=None, period="5y"):
+        raise NotImplementedError
+
+
+def normalize_prices(df):
+    # Formatting checks (MultiIndex handling)
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = df.columns.get_level_values(0)
+    # Reset index so 'Date' becomes a column
+    if "Date" not in df.columns:
+        df = df.reset_index()
+    if "Date" not in df.columns and "Datetime" in df.columns:
+        df = df.rename(columns={"Datetime": "Date"})
+
+    df["Date"] = pd.to_datetime(df["Date"])
+    if df["Date"].dt.tz is not None:
+        df["Date"] = df["Date"].dt.tz_localize(None)
+    return df[PRICE_COLUMNS].sort_values("Date").reset_index(drop=True)
+
+
+# Yahoo Finance (the production source)
+class YFinanceFetcher(PriceFetcher):
+    name = "yfinance"
+
+    def _fetch(self, symbol, start=None, period="5y"):
+        import yfinance as yf
+
+        if start is not None:
+            # Only the missing range is requested
+            return yf.download(symbol, start=pd.Timestamp(start).strftime("%Y-%m-%d"), interval="1d", progress=False)
+        return yf.download(symbol, period=period, interval="1d", progress=False)
+
+
+# Serves bars from a local CSV: a stand-in for Yahoo in tests and offline runs
+class CSVFixtureFetcher(PriceFetcher):
+    name = "fixture"
+
+    def __init__(self, fixture_path):
+        super().__init__()
+        self.fixture_path = fixture_path
+
+    def _fetch(self, symbol, start=None, period="5y"):
+        df = pd.read_csv(self.fixture_path, parse_dates=["Date"])
+        if "symbol" in df.columns:
+            df = df[df["symbol"] == symbol]
+        if start is not None:
+            df = df[df["Date"] >= pd.Timestamp(start)]
+        elif period and period != "max" and len(df):
+            df = df[df["Date"] > df["Date"].max() - period_offset(period)]
+        return df
+
+
+# yfinance-style period ("5y", "6mo", "30d") as a pandas offset
+def period_offset(period):
+    for suffix, unit in (("mo", "months"), ("y", "years"), ("d", "days")):
+        if period.endswith(suffix):
+            return pd.DateOffset(**{unit: int(period[:-len(suffix)])})
+    raise ValueError(f"Unsupported period '{period}'")
+
+
+# PRICE_SOURCE=yfinance (default) | fixture (reads PRICE_FIXTURE_PATH)
+def create_price_fetcher(source=None):
+    source = (source or os.getenv("PRICE_SOURCE", "yfinance")).lower()
+    if source == "yfinance":
+        return YFinanceFetcher()
+    if source == "fixture":
+        return CSVFixtureFetcher(os.getenv("PRICE_FIXTURE_PATH", os.path.join("data", "stock_data.csv")))
+    raise ValueError(f"Unknown PRICE_SOURCE '{source}' (use 'yfinance' or 'fixture')")
+
+
+# ---------------------------------------------------------
+# RATE LIMITING + RETRIES (shared by all download threads)
+# ---------------------------------------------------------
+# Token bucket: `rate` requests per second on average, bursts of up to `capacity`.
+class TokenBucket:
+    def __init__(self, rate, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self.tokens = self.capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.updated_at = clock()
+        self.waited_seconds = 0.0
+        self._lock = threading.Lock()
+
+    # Blocks until a token is available
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = self.clock()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+                self.waited_seconds += wait
+            self.sleep(wait)
+
+
+# Calls fn(); on failure waits base_delay * 2^attempt (+ jitter, capped) and tries again.
+# Returns (result, attempts); re-raises the last error once `retries` are used up.
+def retry_with_backoff(fn, retries=3, base_delay=1.0, max_delay=30.0, sleep=time.sleep):
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            return fn(), attempt
+        except Exception as e:
+            if attempt > retries:
+                raise
+            delay = min(max_delay, base_delay * 2 ** (attempt - 1))
+            delay *= 1 + random.random() * 0.25  # jitter: threads don't retry in lockstep
+            print(f"   attempt {attempt} failed ({e}), retrying in {delay:.1f}s")
+            sleep(delay)
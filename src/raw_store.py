@@ -0,0 +1,203 @@
+import os
+import json
+import hashlib
+import threading
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from src.utils import save_text
+
+# Bump when the partition layout or column types change
+RAW_STORE_SCHEMA_VERSION = 1
+
+# Typed columns: prices as float32, volume as int64
+RAW_SCHEMA = pa.schema([
+    ("Date", pa.timestamp("ns")),
+    ("Open", pa.float32()),
+    ("High", pa.float32()),
+    ("Low", pa.float32()),
+    ("Close", pa.float32()),
+    ("Volume", pa.int64()),
+])
+
+
+# ---------------------------------------------------------
+# PARTITIONED RAW-DATA STORE
+# ---------------------------------------------------------
+# Raw bars as Parquet, one file per symbol and year:
+#   data/raw_store/symbol=GOOGL/year=2024/part.parquet
+#   data/raw_store/manifest.json   (rows, date range, bytes and sha256 per partition)
+# Reads prune partitions by symbol and date range using the manifest, so only the
+# matching files are opened (no directory listing), and only the requested columns are decoded.
+class RawStore:
+    def __init__(self, root):
+        self.root = root
+        self.manifest_path = os.path.join(root, "manifest.json")
+        self._lock = threading.Lock()  # writers of different symbols share the manifest
+
+    def _partition_dir(self, symbol, year):
+        return os.path.join(self.root, f"symbol={symbol}", f"year={year}")
+
+    def load_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return {"schema_version": RAW_STORE_SCHEMA_VERSION, "partitions": {}}
+        with open(self.manifest_path) as file_obj:
+            manifest = json.load(file_obj)
+        if manifest.get("schema_version", 0) > RAW_STORE_SCHEMA_VERSION:
+            raise Exception(f"Raw store at {self.root} uses schema v{manifest['schema_version']}, "
+                            f"this code only understands up to v{RAW_STORE_SCHEMA_VERSION}")
+        return manifest
+
+    @staticmethod
+    def _checksum(path):
+        digest = hashlib.sha256()
+        with open(path, "rb") as file_obj:
+            for block in iter(lambda: file_obj.read(1024 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _to_table(df):
+        df = df.copy()
+        df["Date"] = pd.to_datetime(df["Date"]).astype("datetime64[ns]")
+        return pa.Table.from_pandas(df[RAW_SCHEMA.names], schema=RAW_SCHEMA, preserve_index=False)
+
+    # Merges bars for one symbol into its year partitions (only the touched years are rewritten)
+    def write(self, df, symbol):
+        symbol = symbol.upper()
+        df = df.copy()
+        df["Date"] = pd.to_datetime(df["Date"])
+
+        updated = {}
+        for year, new_rows in df.groupby(df["Date"].dt.year):
+            part_dir = self._partition_dir(symbol, int(year))
+            part_path = os.path.join(part_dir, "part.parquet")
+
+            if os.path.exists(part_path):
+                existing = pq.read_table(part_path).to_pandas()
+                new_rows = pd.concat([existing, new_rows[RAW_SCHEMA.names]], ignore_index=True)
+            # Dedupe overlapping bars (the newest version wins) and keep date order
+            merged = new_rows.drop_duplicates(subset="Date", keep="last").sort_values("Date")
+
+            os.makedirs(part_dir, exist_ok=True)
+            tmp_path = f"{part_path}.tmp"
+            pq.write_table(self._to_table(merged), tmp_path, compression="zstd")
+            os.replace(tmp_path, part_path)
+
+            updated[f"symbol={symbol}/year={int(year)}"] = {
+                "rows": len(merged),
+                "min_date": str(merged["Date"].min().date()),
+                "max_date": str(merged["Date"].max().date()),
+                "bytes": os.path.getsize(part_path),
+                "sha256": self._checksum(part_path),
+            }
+
+        # Manifest is written LAST (after the partitions it describes are in place)
+        with self._lock:
+            manifest = self.load_manifest()
+            manifest["partitions"].update(updated)
+            manifest["schema_version"] = RAW_STORE_SCHEMA_VERSION
+            save_text(self.manifest_path, json.dumps(manifest, indent=2, sort_keys=True))
+        return sum(p["rows"] for p in updated.values())
+
+    # Newest stored date for a symbol, from the manifest alone
+    def last_date(self, symbol):
+        prefix = f"symbol={symbol.upper()}/"
+        dates = [p["max_date"] for key, p in self.load_manifest()["partitions"].items() if key.startswith(prefix)]
+        return pd.Timestamp(max(dates)) if dates else None
+
+    def symbols(self):
+        return sorted({key.split("/")[0].split("=", 1)[1] for key in self.load_manifest()["partitions"]})
+
+    def read(self, symbols=None, start=None, end=None, columns=None):
+        columns = list(columns or ["Date", "symbol"] + RAW_SCHEMA.names[1:])
+        file_columns = [col for col in columns if col != "symbol"]
+        if (start is not None or end is not None) and "Date" not in file_columns:
+            file_columns.append("Date")
+
+        if symbols is not None:
+            symbols = {s.upper() for s in ([symbols] if isinstance(symbols, str) else symbols)}
+        start = pd.Timestamp(start) if start is not None else None
+        end = pd.Timestamp(end) if end is not None else None
+
+        # Partition pruning from the manifest alone: symbol, then each file's date range
+        tables = []
+        for key, part in sorted(self.load_manifest()["partitions"].items()):
+            symbol = key.split("/")[0].split("=", 1)[1]
+            if symbols is not None and symbol not in symbols:
+                continue
+            if start is not None and pd.Timestamp(part["max_date"]) < start.normalize():
+                continue
+            if end is not None and pd.Timestamp(part["min_date"]) > end:
+                continue
+
+            table = pq.ParquetFile(os.path.join(self.root, key, "part.parquet")).read(
+                columns=file_columns, use_threads=False)
+
+            # Row filter only for partitions that straddle the range
+            if start is not None and pd.Timestamp(part["min_date"]) < start:
+                table = table.filter(pc.greater_equal(table["Date"], pa.scalar(start.to_pydatetime(), pa.timestamp("ns"))))
+            if end is not None and pd.Timestamp(part["max_date"]) > end:
+                table = table.filter(pc.less_equal(table["Date"], pa.scalar(end.to_pydatetime(), pa.timestamp("ns"))))
+
+            if "symbol" in columns:
+                table = table.append_column("symbol", pa.array([symbol] * table.num_rows, pa.string()))
+            tables.append(table)
+
+        if not tables:
+            return pd.DataFrame({col: pd.Series(dtype=self._pandas_dtype(col)) for col in columns})
+
+        df = pa.concat_tables(tables).select(columns).to_pandas()
+        if "symbol" in df.columns:
+            df["symbol"] = df["symbol"].astype("category")
+        # Partitions are read in (symbol, year) order, so rows already come out sorted
+        return df.reset_index(drop=True)
+
+    # Same rows as read(), but streamed partition by partition (symbol, then year),
+    # at most `batch_rows` rows at a time, for readers that can't hold the whole store
+    def iter_batches(self, batch_rows, symbols=None, columns=None):
+        columns = list(columns or ["Date", "symbol"] + RAW_SCHEMA.names[1:])
+        file_columns = [col for col in columns if col != "symbol"]
+        if symbols is not None:
+            symbols = {s.upper() for s in ([symbols] if isinstance(symbols, str) else symbols)}
+
+        for key in sorted(self.load_manifest()["partitions"]):
+            symbol = key.split("/")[0].split("=", 1)[1]
+            if symbols is not None and symbol not in symbols:
+                continue
+            parquet = pq.ParquetFile(os.path.join(self.root, key, "part.parquet"))
+            for batch in parquet.iter_batches(batch_size=batch_rows, columns=file_columns, use_threads=False):
+                df = batch.to_pandas()
+                if "symbol" in columns:
+                    df["symbol"] = symbol
+                yield df[columns]
+
+    @staticmethod
+    def _pandas_dtype(col):
+        if col == "symbol":
+            return "category"
+        return RAW_SCHEMA.field(col).type.to_pandas_dtype()
+
+    # Recomputes every checksum; returns the partitions that don't match the manifest
+    def verify(self):
+        problems = []
+        for key, part in self.load_manifest()["partitions"].items():
+            path = os.path.join(self.root, key, "part.parquet")
+            if not os.path.exists(path):
+                problems.append({"partition": key, "problem": "missing"})
+            elif self._checksum(path) != part["sha256"]:
+                problems.append({"partition": key, "problem": "checksum mismatch"})
+        return problems
+
+    # One-off migration of a raw CSV (e.g. data/data.csv) into the store
+    def import_csv(self, csv_path, symbol):
+        df = pd.read_csv(csv_path)
+        if "Datetime" in df.columns and "Date" not in df.columns:
+            df = df.rename(columns={"Datetime": "Date"})
+        return self.write(df, symbol)
+
+
+def is_raw_store(path):
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, "manifest.json"))
@@ -0,0 +1,184 @@
+import json
+import math
+import numpy as np
+import pandas as pd
+
+# Same windows as DataTransformation.build_features
+SMA_SHORT_WINDOW = 10
+SMA_LONG_WINDOW = 50
+# Volatility is the std of the same 10 closes whose mean is SMA_10
+VOLATILITY_WINDOW = SMA_SHORT_WINDOW
+
+# Welford updates drift by a few ULPs over many steps,
+# so every N bars mean / M2 / sum are recomputed exactly from the stored closes
+RESYNC_EVERY = 1000
+
+
+# ---------------------------------------------------------
+# ROLLING FEATURE STATE (training side, persisted between runs)
+# ---------------------------------------------------------
+# Everything needed to turn the NEXT raw bar into features in O(1):
+# - the last 50 closes (oldest first)
+# - sum of the last 50 closes (SMA_50)
+# - sliding-window Welford mean / M2 of the last 10 closes (SMA_10, Volatility)
+# - the newest bar, which is still waiting for tomorrow's close as its Target
+# - the bar before it, whose Target changes if the newest bar is re-fetched with another close
+class RollingFeatureState:
+    def __init__(self):
+        self.closes = []
+        self.sum_long = 0.0
+        self.mean_short = 0.0
+        self.m2_short = 0.0
+        self.last_date = None
+        self.pending = None
+        self.previous = None
+        self.updates = 0
+
+    # Recompute the running values exactly from the stored closes
+    def resync(self):
+        short = np.array(self.closes[-SMA_SHORT_WINDOW:], dtype=np.float64)
+        self.sum_long = float(np.sum(self.closes[-SMA_LONG_WINDOW:]))
+        self.mean_short = float(short.mean()) if len(short) else 0.0
+        self.m2_short = float(np.sum((short - self.mean_short) ** 2)) if len(short) else 0.0
+
+    def _push_close(self, close):
+        n_short = min(len(self.closes), SMA_SHORT_WINDOW)
+
+        if n_short < SMA_SHORT_WINDOW:
+            # Window still filling up: classic Welford add
+            delta = close - self.mean_short
+            self.mean_short += delta / (n_short + 1)
+            self.m2_short += delta * (close - self.mean_short)
+        else:
+            # Full window: the oldest close leaves as the new one enters
+            old = self.closes[-SMA_SHORT_WINDOW]
+            old_mean = self.mean_short
+            self.mean_short += (close - old) / SMA_SHORT_WINDOW
+            self.m2_short += (close - old) * (close - self.mean_short + old - old_mean)
+
+        if len(self.closes) >= SMA_LONG_WINDOW:
+            self.sum_long -= self.closes[-SMA_LONG_WINDOW]
+        self.sum_long += close
+
+        self.closes.append(close)
+        del self.closes[:-SMA_LONG_WINDOW]
+
+        self.updates += 1
+        if self.updates % RESYNC_EVERY == 0:
+            self.resync()
+
+    # The newest bar was re-fetched (ingestion refreshes a possibly partial last bar):
+    # swap its close in both windows instead of pushing a new one
+    def _replace_last_close(self, close):
+        old = self.closes[-1]
+        n_short = min(len(self.closes), SMA_SHORT_WINDOW)
+        old_mean = self.mean_short
+        self.mean_short += (close - old) / n_short
+        self.m2_short += (close - old) * (close - self.mean_short + old - old_mean)
+        self.sum_long += close - old
+        self.closes[-1] = close
+
+    def _features(self):
+        n = len(self.closes)
+        return {
+            "SMA_10": self.mean_short if n >= SMA_SHORT_WINDOW else math.nan,
+            "SMA_50": self.sum_long / SMA_LONG_WINDOW if n >= SMA_LONG_WINDOW else math.nan,
+            # Sample std (ddof=1), same as pandas rolling().std()
+            "Volatility": math.sqrt(max(self.m2_short / (VOLATILITY_WINDOW - 1), 0.0))
+                          if n >= VOLATILITY_WINDOW else math.nan,
+        }
+
+    # Feeds raw bars (Date index, at least a Close column) from the newest processed bar on.
+    # A bar on the newest processed date replaces it (same as the batch path on the refreshed raw data).
+    # Returns the rows that became complete (features + Target), ready to upsert into the store.
+    def update(self, new_bars):
+        completed = []
+        for date, bar in new_bars.sort_index().iterrows():
+            date = pd.Timestamp(date)
+            if self.last_date is not None and date < self.last_date:
+                continue  # already processed
+            values = {k: _to_python(v) for k, v in bar.items()}
+            close = float(bar["Close"])
+
+            if self.last_date is not None and date == self.last_date:
+                if self.pending is not None and all(self.pending.get(k) == v for k, v in values.items()):
+                    continue  # same bar again
+                # Revised bar: the row before it gets the corrected close as its Target (upserted again)
+                if self.previous is not None:
+                    _complete(completed, self.previous, close)
+                self._replace_last_close(close)
+            else:
+                # Yesterday's bar gets today's close as its Target
+                if self.pending is not None:
+                    _complete(completed, self.pending, close)
+                self._push_close(close)
+                self.previous = self.pending
+
+            self.pending = {"Date": date.isoformat(), **values, **self._features()}
+            self.last_date = date
+
+        if not completed:
+            return pd.DataFrame(columns=list(new_bars.columns) + ["SMA_10", "SMA_50", "Volatility", "Target"])
+
+        df = pd.DataFrame(completed)
+        df["Date"] = pd.to_datetime(df["Date"])
+        return df.set_index("Date")
+
+    # Builds the state from a full raw history (Date index) in one pass over its tail
+    @classmethod
+    def from_history(cls, raw_df):
+        state = cls()
+        raw_df = raw_df.sort_index()
+        # Only the last 50 bars matter, plus one so the bar before the newest has its features too
+        state.update(raw_df.iloc[-(SMA_LONG_WINDOW + 1):])
+        state.resync()
+        state.updates = 0
+        return state
+
+    def to_dict(self):
+        return {
+            "closes": self.closes,
+            "sum_long": self.sum_long,
+            "mean_short": self.mean_short,
+            "m2_short": self.m2_short,
+            "last_date": self.last_date.isoformat() if self.last_date is not None else None,
+            "pending": self.pending,
+            "previous": self.previous,
+            "updates": self.updates,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls()
+        state.closes = [float(c) for c in data["closes"]]
+        state.sum_long = data["sum_long"]
+        state.mean_short = data["mean_short"]
+        state.m2_short = data["m2_short"]
+        state.last_date = pd.Timestamp(data["last_date"]) if data["last_date"] else None
+        state.pending = data["pending"]
+        # Older state files don't have it: a revised bar then can't correct the row before it
+        state.previous = data.get("previous")
+        state.updates = data["updates"]
+        return state
+
+    # json round-trips floats exactly (repr), so a reloaded state continues bit-for-bit
+    def dumps(self):
+        return json.dumps(self.to_dict())
+
+    @classmethod
+    def loads(cls, text):
+        return cls.from_dict(json.loads(text))
+
+
+def _complete(rows, pending, target):
+    row = {**pending, "Target": target}
+    if not any(isinstance(v, float) and math.isnan(v) for v in row.values()):
+        rows.append(row)
+
+
+def _to_python(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    return value
@@ -0,0 +1,335 @@
+import os
+import json
+import glob
+import time
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+
+from src.utils import save_text
+
+# Runs are ordered and filtered on their last heartbeat: it moves whenever a run logs or finishes
+UPDATED_FIELD = "heartbeatAt"
+TIME_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+
+@dataclass
+class SweepExportConfig:
+    sweep_path: str = os.getenv("SWEEP_PATH", "hanseeka-dhingana-sukkur-iba-university/stock-prediction-prod/sweeps/rpev57yx")
+    # Columnar store: one Parquet file per sync, compacted into one once there are many
+    store_dir: str = os.path.join("data", "sweep_results")
+    state_file_path: str = os.path.join("data", "sweep_results", "sync_state.json")
+    # Flat CSV view of the store (what this script always produced)
+    csv_file_path: str = "sweep_results.csv"
+    # Time slices fetched at the same time, and runs per API page
+    max_workers: int = int(os.getenv("EXPORT_WORKERS", "4"))
+    page_size: int = int(os.getenv("EXPORT_PAGE_SIZE", "50"))
+
+
+# ---------------------------------------------------------
+# RUNS API
+# ---------------------------------------------------------
+# list_runs() yields pages (lists) of plain run dicts between two update times.
+# Tests use an in-memory stand-in with the same two methods.
+class WandbRunsClient:
+    def __init__(self, sweep_path, api=None):
+        entity, project, _, self.sweep_id = sweep_path.split("/")
+        self.project_path = f"{entity}/{project}"
+        self._api = api
+
+    @property
+    def api(self):
+        if self._api is None:
+            import wandb
+            api_key = os.getenv("WANDB_API_KEY")
+            if api_key:
+                wandb.login(key=api_key)
+            self._api = wandb.Api(timeout=60)
+        return self._api
+
+    @staticmethod
+    def _to_dict(run):
+        return {
+            "id": run.id,
+            "name": run.name,
+            "state": run.state,
+            "updated_at": run._attrs.get(UPDATED_FIELD) or run.created_at,
+            "summary": dict(run.summary._json_dict),
+            "config": {key: value for key, value in run.config.items() if not key.startswith("_")},
+        }
+
+    def list_runs(self, updated_after=None, updated_before=None, per_page=50):
+        filters = {"sweep": self.sweep_id}
+        window = {}
+        if updated_after:
+            window["$gte"] = updated_after
+        if updated_before:
+            window["$lt"] = updated_before
+        if window:
+            filters[UPDATED_FIELD] = window
+
+        runs = self.api.runs(self.project_path, filters=filters, order=f"+{UPDATED_FIELD}", per_page=per_page)
+        page = []
+        for run in runs:
+            page.append(self._to_dict(run))
+            if len(page) == per_page:
+                yield page
+                page = []
+        if page:
+            yield page
+
+    # Update time of the oldest run in the sweep (None if the sweep has no runs)
+    def earliest_update(self):
+        for page in self.list_runs(per_page=1):
+            return page[0]["updated_at"]
+        return None
+
+
+# ---------------------------------------------------------
+# FLATTEN + TYPE
+# ---------------------------------------------------------
+# {"_wandb": {"runtime": 42}} -> {"_wandb.runtime": 42}
+def flatten(values, prefix=""):
+    flat = {}
+    for key, value in values.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        elif isinstance(value, (list, tuple)):
+            # Lists (e.g. histograms) stay readable but don't explode into columns
+            flat[name] = json.dumps(value, default=str)
+        else:
+            flat[name] = value
+    return flat
+
+
+def run_to_row(run):
+    # Same column names as before for flat keys; config wins over summary like it used to
+    return {
+        "name": run["name"],
+        "run_id": run["id"],
+        "state": run.get("state"),
+        "updated_at": run["updated_at"],
+        **flatten(run.get("summary") or {}),
+        **flatten(run.get("config") or {}),
+    }
+
+
+# Numbers -> float64 / nullable Int64, True/False -> boolean, everything else -> string
+def typed_frame(rows):
+    df = pd.DataFrame(rows)
+    for column in df.columns:
+        values = df[column]
+        present = values.dropna()
+        if present.empty:
+            df[column] = values.astype("float64")
+        elif present.map(lambda value: isinstance(value, (bool, np.bool_))).all():
+            df[column] = values.astype("boolean")
+        elif present.map(lambda value: isinstance(value, (int, float, np.number)) and not isinstance(value, bool)).all():
+            numbers = pd.to_numeric(values)
+            whole = numbers.dropna()
+            df[column] = numbers.astype("Int64") if (whole == whole.round()).all() else numbers.astype("float64")
+        else:
+            df[column] = values.map(lambda value: value if value is None or isinstance(value, str) else str(value)).astype("string")
+    return df
+
+
+# ---------------------------------------------------------
+# LOCAL COLUMNAR RESULTS STORE
+# ---------------------------------------------------------
+# Arrow -> the same nullable pandas dtypes typed_frame() produced
+PANDAS_TYPES = {pa.int64(): pd.Int64Dtype(), pa.bool_(): pd.BooleanDtype(),
+                pa.string(): pd.StringDtype(), pa.large_string(): pd.StringDtype()}
+
+
+# One type per column across parts: a key can be logged as 7 in one sync and "fast" in the next.
+# int + float -> float64, any other mix -> string (so reading never fails on a type change)
+def unify_types(types):
+    types = {t for t in types if not pa.types.is_null(t)}
+    if not types:
+        return pa.null()
+    if len(types) == 1:
+        return types.pop()
+    if all(pa.types.is_integer(t) or pa.types.is_floating(t) for t in types):
+        return pa.float64()
+    return pa.string()
+
+
+# Append-only Parquet parts; a run that was exported twice keeps its newest version.
+class SweepResultsStore:
+    def __init__(self, root, compact_after=20):
+        self.root = root
+        self.compact_after = compact_after
+
+    def parts(self):
+        return sorted(glob.glob(os.path.join(self.root, "part-*.parquet")))
+
+    def append(self, df):
+        if df.empty:
+            return None
+        os.makedirs(self.root, exist_ok=True)
+        path = os.path.join(self.root, f"part-{time.time_ns()}.parquet")
+        # Temp file + rename: a crashed export never leaves half a part behind
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False), f"{path}.tmp")
+        os.replace(f"{path}.tmp", path)
+        if len(self.parts()) > self.compact_after:
+            self.compact()
+        return path
+
+    def _table(self, columns=None):
+        schemas = {path: pq.read_schema(path) for path in self.parts()}
+        if not schemas:
+            return None
+        # Parts are only read after their column types were unified (footers only, no data)
+        seen = {}
+        for schema in schemas.values():
+            for field in schema:
+                seen.setdefault(field.name, []).append(field.type)
+        target = {name: unify_types(types) for name, types in seen.items()}
+
+        tables = []
+        for path, schema in schemas.items():
+            wanted = None if columns is None else [c for c in columns if c in schema.names]
+            table = pq.read_table(path, columns=wanted)
+            tables.append(table.cast(pa.schema([pa.field(name, target[name]) for name in table.column_names])))
+        # Columns added by later runs are null in older parts
+        return pa.concat_tables(tables, promote_options="permissive")
+
+    # Latest version of every run, optionally only some columns / rows.
+    # filters: {"column": value} equality or {"column": (op, value)} with op in < <= > >= == !=
+    def read(self, columns=None, filters=None):
+        needed = None
+        if columns is not None:
+            needed = list(dict.fromkeys(["run_id", "updated_at", *columns, *(filters or {})]))
+        table = self._table(needed)
+        if table is None:
+            return pd.DataFrame(columns=columns or [])
+
+        # Newest version per run: sort by update time, keep the last row of each run_id
+        table = table.sort_by([("run_id", "ascending"), ("updated_at", "ascending")])
+        run_ids = table.column("run_id")
+        last = pc.not_equal(run_ids.slice(0, len(run_ids) - 1), run_ids.slice(1))
+        table = table.filter(pa.concat_arrays([last.combine_chunks(), pa.array([True])]))
+
+        operators = {"<": pc.less, "<=": pc.less_equal, ">": pc.greater, ">=": pc.greater_equal,
+                     "==": pc.equal, "!=": pc.not_equal}
+        for column, condition in (filters or {}).items():
+            op, value = condition if isinstance(condition, tuple) else ("==", condition)
+            table = table.filter(operators[op](table.column(column), value))
+
+        df = table.to_pandas(types_mapper=PANDAS_TYPES.get)
+        return df if columns is None else df[list(columns)]
+
+    # k best runs by a metric (lowest MAE first by default)
+    def top_k(self, k=10, by="mae", ascending=True, columns=None, filters=None):
+        df = self.read(columns=None if columns is None else [by, *columns], filters=filters)
+        df = df.dropna(subset=[by]).sort_values(by, ascending=ascending, kind="stable")
+        return df.head(k).reset_index(drop=True)
+
+    # (run_id, updated_at) of every stored version, to skip runs that didn't change
+    def versions(self):
+        table = self._table(["run_id", "updated_at"])
+        if table is None:
+            return set()
+        return set(zip(table.column("run_id").to_pylist(), table.column("updated_at").to_pylist()))
+
+    # Rewrites all parts as one file holding only the newest version of each run
+    def compact(self):
+        old_parts = self.parts()
+        if len(old_parts) <= 1:
+            return
+        latest = self.read()
+        path = os.path.join(self.root, f"part-{time.time_ns()}.parquet")
+        pq.write_table(pa.Table.from_pandas(latest, preserve_index=False), f"{path}.tmp")
+        os.replace(f"{path}.tmp", path)
+        for part in old_parts:
+            os.remove(part)
+
+
+# ---------------------------------------------------------
+# INCREMENTAL EXPORTER
+# ---------------------------------------------------------
+class SweepExporter:
+    def __init__(self, config=None, client=None):
+        self.config = config or SweepExportConfig()
+        self.client = client or WandbRunsClient(self.config.sweep_path)
+        self.store = SweepResultsStore(self.config.store_dir)
+
+    def load_state(self):
+        try:
+            with open(self.config.state_file_path) as file_obj:
+                state = json.load(file_obj)
+            return state if state.get("sweep_path") == self.config.sweep_path else {}
+        except (OSError, ValueError):
+            return {}
+
+    # Splits [start, now] into one time slice per worker (the last slice is open-ended)
+    def _slices(self, start):
+        n = max(1, self.config.max_workers)
+        start_time = datetime.strptime(start[:19], TIME_FORMAT)
+        span = datetime.now(timezone.utc).replace(tzinfo=None) - start_time
+        if n == 1 or span <= timedelta(0):
+            return [(start, None)]
+        bounds = [(start_time + span * i / n).strftime(TIME_FORMAT) for i in range(1, n)]
+        starts = [start, *bounds]
+        return list(zip(starts, [*bounds, None]))
+
+    def _fetch_slice(self, window):
+        updated_after, updated_before = window
+        runs, pages = [], 0
+        for page in self.client.list_runs(updated_after, updated_before, per_page=self.config.page_size):
+            runs.extend(page)
+            pages += 1
+        return runs, pages
+
+    def initiate_export(self):
+        print(f"Exporting sweep {self.config.sweep_path}...")
+        try:
+            started = time.perf_counter()
+            state = self.load_state()
+
+            # Resume from the newest update seen last time (inclusive, so nothing is missed)
+            start = state.get("watermark") or self.client.earliest_update()
+            runs, pages = [], 0
+            if start is not None:
+                with ThreadPoolExecutor(max_workers=max(1, self.config.max_workers)) as pool:
+                    for slice_runs, slice_pages in pool.map(self._fetch_slice, self._slices(start)):
+                        runs.extend(slice_runs)
+                        pages += slice_pages
+
+            # Keep only run versions the store doesn't have yet
+            known = self.store.versions()
+            fresh = {}
+            for run in runs:
+                if (run["id"], run["updated_at"]) not in known:
+                    fresh[run["id"]] = max(fresh.get(run["id"], run), run, key=lambda r: r["updated_at"])
+
+            df = typed_frame([run_to_row(run) for run in fresh.values()])
+            self.store.append(df)
+
+            # CSV view for people who just want to open the results
+            latest = self.store.read()
+            if not latest.empty:
+                save_text(self.config.csv_file_path, latest.to_csv(index=False))
+
+            watermark = max([run["updated_at"] for run in runs] + [state.get("watermark") or ""]) or None
+            save_text(self.config.state_file_path, json.dumps({
+                "sweep_path": self.config.sweep_path,
+                "watermark": watermark,
+                "synced_at": datetime.now(timezone.utc).strftime(TIME_FORMAT),
+                "runs": len(latest),
+            }, indent=2))
+
+            stats = {"fetched": len(runs), "pages": pages, "new_or_updated": len(fresh), "total_runs": len(latest),
+                     "seconds": round(time.perf_counter() - started, 3)}
+            print(f"Fetched {stats['fetched']} runs in {stats['pages']} pages, "
+                  f"{stats['new_or_updated']} new or updated, {stats['total_runs']} in the store")
+            return stats
+
+        except Exception as e:
+            raise Exception(f"Error exporting sweep results: {e}")
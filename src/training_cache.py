@@ -0,0 +1,174 @@
+import os
+import json
+import time
+import hashlib
+import platform
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+import xgboost
+from dataclasses import dataclass
+
+from src.utils import save_object
+from src.components.ensemble_training import ENSEMBLE_MEMBERS, fit_members
+
+# Bump when what is stored under a key changes, so old entries are never reused
+CACHE_FORMAT = 1
+
+
+@dataclass
+class TrainingCacheConfig:
+    cache_dir: str = os.getenv("TRAINING_CACHE_DIR", os.path.join("data", "training_cache"))
+    # Oldest-used entries are deleted once the cache is bigger than this
+    max_bytes: int = int(float(os.getenv("TRAINING_CACHE_MAX_MB", "512")) * 1024 * 1024)
+    # TRAINING_CACHE=0: always refit (nothing is read or written)
+    enabled: bool = os.getenv("TRAINING_CACHE", "1") == "1"
+
+
+# Fitted models depend on these too: a new sklearn/xgboost may fit or pickle differently
+def library_versions():
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "sklearn": sklearn.__version__,
+        "xgboost": xgboost.__version__,
+    }
+
+
+# Content hash of a table: values (row by row), column names and dtypes
+def frame_fingerprint(*frames):
+    digest = hashlib.sha256()
+    for frame in frames:
+        frame = frame.to_frame() if isinstance(frame, pd.Series) else frame
+        digest.update(json.dumps([[str(c), str(t)] for c, t in frame.dtypes.items()]).encode())
+        digest.update(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+# ---------------------------------------------------------
+# CONTENT-ADDRESSED TRAINING CACHE
+# ---------------------------------------------------------
+# Every entry is one joblib file named after the hash of everything that produced it
+# (data fingerprint, params, library versions). Nothing is ever overwritten in place,
+# so a stale entry can't be returned: different inputs simply give a different key.
+# A hit touches the file's mtime; eviction deletes the least recently used files.
+class TrainingCache:
+    def __init__(self, config=None):
+        self.config = config or TrainingCacheConfig()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(kind, *parts):
+        payload = json.dumps([CACHE_FORMAT, kind, *parts], sort_keys=True, default=str)
+        return f"{kind}-{hashlib.sha256(payload.encode()).hexdigest()}"
+
+    def path(self, key):
+        return os.path.join(self.config.cache_dir, f"{key}.joblib")
+
+    def get(self, key):
+        if not self.config.enabled:
+            return None
+
+        path = self.path(key)
+        try:
+            obj = joblib.load(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception as e:
+            # Truncated or unreadable entry: drop it and treat it as a miss
+            print(f"Training cache: dropping unreadable entry {key}: {e}")
+            self._remove(path)
+            self.misses += 1
+            return None
+
+        os.utime(path)
+        self.hits += 1
+        return obj
+
+    def put(self, key, obj):
+        if not self.config.enabled:
+            return
+        save_object(self.path(key), obj)
+        self.evict()
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def entries(self):
+        if not os.path.isdir(self.config.cache_dir):
+            return []
+        entries = []
+        for name in os.listdir(self.config.cache_dir):
+            if not name.endswith(".joblib"):
+                continue
+            path = os.path.join(self.config.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    # Deletes least recently used entries until the cache fits in max_bytes
+    def evict(self):
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        for _, size, path in entries:
+            if total <= self.config.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+            evicted += 1
+        return evicted
+
+    def stats(self):
+        entries = self.entries()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+        }
+
+
+# ---------------------------------------------------------
+# CACHED ENSEMBLE FIT
+# ---------------------------------------------------------
+# Each member has its own key (data + ITS params + versions), so changing only the
+# XGB params still reuses the fitted LR and RF. Only the missing members are fitted.
+def member_keys(data_key, params, versions=None):
+    versions = versions or library_versions()
+    return {name: TrainingCache.key("member", name, data_key, params.get(name, {}), versions)
+            for name in ENSEMBLE_MEMBERS}
+
+
+def fit_members_cached(cache, data_key, X, y, params, **fit_kwargs):
+    keys = member_keys(data_key, params)
+
+    members = {}
+    for name in ENSEMBLE_MEMBERS:
+        member = cache.get(keys[name])
+        if member is not None:
+            members[name] = member
+    cached = [name for name in ENSEMBLE_MEMBERS if name in members]
+    missing = tuple(name for name in ENSEMBLE_MEMBERS if name not in members)
+
+    stats = {}
+    if missing:
+        started = time.perf_counter()
+        fitted, stats = fit_members(X, y, params, members=missing, **fit_kwargs)
+        for name, member in fitted.items():
+            cache.put(keys[name], member)
+        members.update(fitted)
+        print(f"   Training cache: fitted {list(missing)} in {time.perf_counter() - started:.1f}s, reused {cached}")
+    else:
+        print(f"   Training cache: reused every member {cached}")
+
+    return members, stats, keys, cached
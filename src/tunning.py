@@ -13,7 +13,9 @@ from xgboost import XGBRegressor
 from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_absolute_error
-from src.utils import pull_from_feature_store
+from src.feature_cache import load_training_features
+from src.components.backtest import run_backtest
+from src.local_search import SEARCH_SPACE, LocalSearch
 
 # Load Environment Variables (API Key)
 load_dotenv()
@@ -25,15 +27,8 @@ sweep_config = {
         'name': 'mae',
         'goal': 'minimize'   # We want the LOWEST error
     },
-    'parameters': {
-        # Random Forest Params
-        'rf_n_estimators': {'values': [50, 100, 200]},
-        'rf_max_depth': {'values': [10, 20, None]},
-        
-        # XGBoost Params
-        'xgb_learning_rate': {'values': [0.01, 0.1, 0.2]},
-        'xgb_n_estimators': {'values': [50, 100, 200]}
-    }
+    # Same search space as the local engine (src/local_search.py)
+    'parameters': {name: {'values': values} for name, values in SEARCH_SPACE.items()}
 }
 
 def train_sweep():
@@ -43,10 +38,27 @@ def train_sweep():
         
         # Load Data
         try:
-            df = pull_from_feature_store()
+            # Every trial reuses the local mirror instead of re-reading MongoDB
+            df = load_training_features()
         except Exception:
             return
 
+        # TUNE_BACKTEST=1: score each trial on the walk-forward backtest instead of one holdout
+        if os.getenv("TUNE_BACKTEST", "0") == "1":
+            params = {
+                "lr": {},
+                "rf": {"n_estimators": config.rf_n_estimators, "max_depth": config.rf_max_depth, "random_state": 42},
+                "xgb": {"n_estimators": config.xgb_n_estimators, "learning_rate": config.xgb_learning_rate,
+                        "random_state": 42},
+            }
+            folds, summary = run_backtest(df, params)
+            wandb.log({"mae": summary["mae"], "backtest_rmse": summary["rmse"],
+                       "backtest_worst_fold_mae": summary["mae_worst_fold"], "backtest_folds": summary["folds"],
+                       "backtest_approximate": summary["approximate"]})
+            print(f"Params: RF={config.rf_n_estimators} XGB_LR={config.xgb_learning_rate} -> "
+                  f"backtest MAE: {summary['mae']:.2f} over {summary['folds']} folds")
+            return
+
         X = df[['Close', 'SMA_10', 'SMA_50', 'Volatility']]
         y = df['Target']
 
@@ -87,6 +99,11 @@ def train_sweep():
         print(f"Params: RF={config.rf_n_estimators} XGB_LR={config.xgb_learning_rate} -> MAE: {mae:.2f}")
 
 if __name__ == "__main__":
+    # TUNING_ENGINE=local: search on this machine (process pool, no W&B controller needed)
+    if os.getenv("TUNING_ENGINE", "wandb") == "local":
+        LocalSearch().initiate_search()
+        sys.exit(0)
+
     # Login
     wandb.login(key=os.getenv("WANDB_API_KEY"))
     
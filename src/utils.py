@@ -1,75 +1,236 @@
 import os
 import sys
+import threading
 import pandas as pd
-import pickle
+import joblib
+import numpy as np
 import pymongo
+import bson
+from bson.codec_options import CodecOptions
 from dotenv import load_dotenv
 from sklearn.metrics import mean_absolute_error
 
+# Optional: pymongoarrow decodes raw BSON batches straight into Arrow columns (in C)
+try:
+    import pyarrow as pa
+    from pymongoarrow.context import PyMongoArrowContext
+    from pymongoarrow.api import Schema as ArrowSchema
+except ImportError:
+    PyMongoArrowContext = None
+
 
 load_dotenv()
 
 # --- MongoDB Configuration ---
-# Replace with your actual connection string if using cloud (e.g., MongoDB Atlas)
-MONGO_URI = os.getenv("MONGO_URL")
-
-if not MONGO_URI:
-    print("WARNING: MONGO_URL not found in .env file. Using localhost.")
-    MONGO_URI = "mongodb://localhost:27017/"
+# Replace with your actual connection string if using cloud (e.g., MongoDB Atlas).
+# Read when the first connection is made (not at import), so local backends and
+# tests never need MONGO_URL.
+def get_mongo_uri():
+    mongo_uri = os.getenv("MONGO_URL")
+    if not mongo_uri:
+        print("WARNING: MONGO_URL not found in .env file. Using localhost.")
+        mongo_uri = "mongodb://localhost:27017/"
+    return mongo_uri
 
 DB_NAME = "stock_db"
 COLLECTION_NAME = "features"
 
-# Utility function to save objects (like the Scaler) using pickle
+# Utility function to save objects (like the Scaler) using joblib.
+# joblib stores NumPy arrays so that joblib.load(mmap_mode="r") can memory-map them,
+# and writing to a temp file + rename means a running API never reads a half-written file.
 def save_object(file_path, obj):
     try:
         dir_path = os.path.dirname(file_path)
         os.makedirs(dir_path, exist_ok=True)
 
-        with open(file_path, "wb") as file_obj:
-            pickle.dump(obj, file_obj)
+        tmp_path = f"{file_path}.tmp"
+        joblib.dump(obj, tmp_path)
+        os.replace(tmp_path, file_path)
 
     except Exception as e:
         raise Exception(f"Error saving object: {e}")
 
 
+# Writes a small text file atomically (e.g. models/VERSION, which the API watches)
+def save_text(file_path, text):
+    try:
+        dir_path = os.path.dirname(file_path)
+        os.makedirs(dir_path, exist_ok=True)
+
+        tmp_path = f"{file_path}.tmp"
+        with open(tmp_path, "w") as file_obj:
+            file_obj.write(text)
+        os.replace(tmp_path, file_path)
+
+    except Exception as e:
+        raise Exception(f"Error saving text file: {e}")
+
+
+# --- Shared MongoDB client ---
+# MongoClient keeps its own connection pool and is thread-safe, so the whole
+# process shares ONE client instead of opening a new one (and a new pool) per call.
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+
+# Rows pushed without a 'symbol' column belong to this ticker (data/data.csv is GOOGL)
+DEFAULT_SYMBOL = os.getenv("DEFAULT_SYMBOL", "GOOGL")
+
+# Upserts are sent in unordered bulk_write chunks of this many rows
+FEATURE_STORE_CHUNK_SIZE = int(os.getenv("FEATURE_STORE_CHUNK_SIZE", "5000"))
+
+# Documents per round trip when pulling columns
+FEATURE_STORE_PULL_BATCH = int(os.getenv("FEATURE_STORE_PULL_BATCH", "50000"))
+
+# Columns the trainer needs, and the compact dtypes they are decoded into
+FEATURE_STORE_COLUMNS = ["Date", "symbol", "Close", "SMA_10", "SMA_50", "Volatility", "Target"]
+FEATURE_STORE_DTYPES = {
+    "Open": np.float32, "High": np.float32, "Low": np.float32, "Close": np.float32,
+    "SMA_10": np.float32, "SMA_50": np.float32, "Volatility": np.float32, "Target": np.float32,
+    "Volume": np.int64,
+}
+
+# Any other column (e.g. indicators from the feature registry) is numeric -> float32
+def column_dtype(name):
+    if name in ("symbol", "Date"):
+        return None
+    return FEATURE_STORE_DTYPES.get(name, np.float32)
+
+
+# Hash of a row's values, stored next to it so unchanged rows are never re-sent
+ROW_HASH_FIELD = "_row_hash"
+
+_mongo_client = None
+_mongo_lock = threading.Lock()
+_indexed_collections = set()
+
+
+def get_mongo_client():
+    global _mongo_client
+    if _mongo_client is None:
+        with _mongo_lock:
+            if _mongo_client is None:
+                print("Connecting to MongoDB Feature Store...")
+                _mongo_client = pymongo.MongoClient(get_mongo_uri(), maxPoolSize=MONGO_MAX_POOL_SIZE)
+    return _mongo_client
+
+
+# Returns the features collection with its unique (symbol, Date) index in place
+def get_feature_collection():
+    collection = get_mongo_client()[DB_NAME][COLLECTION_NAME]
+    ensure_feature_index(collection)
+    return collection
+
+
+def ensure_feature_index(collection):
+    if collection.full_name in _indexed_collections:
+        return
+
+    # Stores written by the old full-rewrite push have no symbol field yet
+    collection.update_many({"symbol": {"$exists": False}}, {"$set": {"symbol": DEFAULT_SYMBOL}})
+    collection.create_index([("symbol", pymongo.ASCENDING), ("Date", pymongo.ASCENDING)],
+                            unique=True, name="symbol_date_unique")
+    _indexed_collections.add(collection.full_name)
+
+
+# Normalizes a features DataFrame: Date and symbol columns plus a per-row hash
+def prepare_feature_frame(df):
+    data_to_save = df.copy()
+
+    # Reset index to ensure Date is saved as a column, not an index
+    if isinstance(data_to_save.index, pd.DatetimeIndex):
+        data_to_save.reset_index(inplace=True)
+    if "Date" not in data_to_save.columns and "Datetime" in data_to_save.columns:
+        data_to_save.rename(columns={"Datetime": "Date"}, inplace=True)
+
+    data_to_save["Date"] = pd.to_datetime(data_to_save["Date"])
+    # BSON dates are UTC without a timezone
+    if data_to_save["Date"].dt.tz is not None:
+        data_to_save["Date"] = data_to_save["Date"].dt.tz_convert("UTC").dt.tz_localize(None)
+
+    if "symbol" not in data_to_save.columns:
+        data_to_save["symbol"] = DEFAULT_SYMBOL
+    data_to_save.drop(columns=[ROW_HASH_FIELD], errors="ignore", inplace=True)
+
+    # One vectorized hash per row (uint64 -> int64, since BSON has no unsigned ints)
+    row_hash = pd.util.hash_pandas_object(data_to_save, index=False).to_numpy()
+    data_to_save[ROW_HASH_FIELD] = row_hash.view("int64")
+    return data_to_save
+
+
+# Mongo-ready records of prepare_feature_frame()
+def prepare_feature_records(df):
+    return prepare_feature_frame(df).to_dict("records")
+
+
 # This function can be used to store the features in MongoDB after transformation.
-def push_to_feature_store(df):
+# mode="upsert" (default): only new or changed (symbol, Date) rows are written.
+# mode="replace": upsert, then delete rows that are no longer in df.
+# Either way the store is never empty while it is being written.
+def push_to_feature_store(df, mode="upsert", chunk_size=FEATURE_STORE_CHUNK_SIZE, collection=None):
     try:
-        print("Connecting to MongoDB Feature Store...")
-        client = pymongo.MongoClient(MONGO_URI)
-        db = client[DB_NAME]
-        collection = db[COLLECTION_NAME]
+        if mode not in ("upsert", "replace"):
+            raise ValueError(f"Unknown push mode '{mode}' (use 'upsert' or 'replace')")
 
-        # Reset index to ensure Date is saved as a column, not an index
-        data_to_save = df.copy()
-        if isinstance(data_to_save.index, pd.DatetimeIndex):
-            data_to_save.reset_index(inplace=True)
+        if collection is None:
+            collection = get_feature_collection()
+        else:
+            ensure_feature_index(collection)
 
-        # Convert DataFrame to Dictionary records for MongoDB
-        records = data_to_save.to_dict("records")
+        records = prepare_feature_records(df)
+        symbols = sorted({record["symbol"] for record in records})
 
-        # Overwrite existing data (Clear old history to avoid duplicates)
-        collection.delete_many({})
-        
-        # Insert new features
-        collection.insert_many(records)
-        print(f"Successfully pushed {len(records)} feature rows to MongoDB!")
+        # Hashes already stored for these symbols (index-only fields, no feature values).
+        # Upserts only need the pushed date range, so pushing one chunk of a long history stays cheap.
+        query = {"symbol": {"$in": symbols}}
+        if mode == "upsert" and records:
+            dates = [record["Date"] for record in records]
+            query["Date"] = {"$gte": min(dates), "$lte": max(dates)}
+
+        existing = {}
+        cursor = collection.find(query, {"_id": 0, "symbol": 1, "Date": 1, ROW_HASH_FIELD: 1})
+        for doc in cursor:
+            existing[(doc["symbol"], pd.Timestamp(doc["Date"]))] = doc.get(ROW_HASH_FIELD)
+
+        # Skip rows whose values did not change since the last push
+        changed = [record for record in records
+                   if existing.get((record["symbol"], pd.Timestamp(record["Date"]))) != record[ROW_HASH_FIELD]]
+
+        upserted, modified = 0, 0
+        for start in range(0, len(changed), chunk_size):
+            operations = [
+                pymongo.UpdateOne({"symbol": record["symbol"], "Date": record["Date"]},
+                                  {"$set": record}, upsert=True)
+                for record in changed[start:start + chunk_size]
+            ]
+            # Unordered: the server applies the chunk in parallel and does not stop at the first error
+            result = collection.bulk_write(operations, ordered=False)
+            upserted += result.upserted_count
+            modified += result.modified_count
+
+        deleted = 0
+        if mode == "replace":
+            keep = {(record["symbol"], pd.Timestamp(record["Date"])) for record in records}
+            stale = [{"symbol": symbol, "Date": date.to_pydatetime()}
+                     for symbol, date in existing if (symbol, date) not in keep]
+            for start in range(0, len(stale), chunk_size):
+                deleted += collection.delete_many({"$or": stale[start:start + chunk_size]}).deleted_count
+
+        print(f"Feature Store push: {upserted} new, {modified} updated, "
+              f"{len(records) - len(changed)} unchanged, {deleted} deleted rows.")
+        return {"inserted": upserted, "updated": modified,
+                "unchanged": len(records) - len(changed), "deleted": deleted}
 
     except Exception as e:
         raise Exception(f"Error pushing to MongoDB: {e}")
 
 
 # This function can be used in the Prediction Pipeline to pull the latest features for prediction
-def pull_from_feature_store():
+def pull_from_feature_store(collection=None):
     try:
-        print("Connecting to MongoDB Feature Store...")
-        client = pymongo.MongoClient(MONGO_URI)
-        db = client[DB_NAME]
-        collection = db[COLLECTION_NAME]
+        if collection is None:
+            collection = get_feature_collection()
 
-        # Fetch all data (exclude the internal '_id' field)
-        cursor = collection.find({}, {'_id': 0})
+        # Fetch all data in date order (exclude the internal '_id' and hash fields)
+        cursor = collection.find({}, {'_id': 0, ROW_HASH_FIELD: 0}).sort([("symbol", 1), ("Date", 1)])
         
         # Convert to DataFrame
         df = pd.DataFrame(list(cursor))
@@ -81,4 +242,136 @@ def pull_from_feature_store():
         return df
 
     except Exception as e:
-        raise Exception(f"Error pulling from MongoDB: {e}")
\ No newline at end of file
+        raise Exception(f"Error pulling from MongoDB: {e}")
+
+# Decodes one column of one batch straight into a typed NumPy array
+def _column_array(name, values):
+    dtype = column_dtype(name)
+    if name == "Date":
+        return np.array(values, dtype="datetime64[ns]")
+    if dtype is np.float32:
+        return np.fromiter((np.nan if v is None else v for v in values), dtype=np.float32, count=len(values))
+    if dtype is np.int64:
+        return np.fromiter((0 if v is None else v for v in values), dtype=np.int64, count=len(values))
+    return np.array(values, dtype=object)
+
+
+# Arrow type each projected column is decoded into by pymongoarrow
+def _arrow_type(name):
+    if name == "Date":
+        return pa.timestamp("ms")
+    if name == "symbol":
+        return pa.string()
+    return pa.int64() if column_dtype(name) is np.int64 else pa.float64()
+
+
+# pymongoarrow path: every raw batch is parsed in C into Arrow column builders,
+# no Python object is created per document or per value
+def _decode_batches_arrow(cursor, columns, codec_options):
+    context = PyMongoArrowContext(ArrowSchema({col: _arrow_type(col) for col in columns}),
+                                  codec_options=codec_options)
+    for raw_batch in cursor:
+        context.process_bson_stream(raw_batch)
+    table = context.finish()
+
+    data = {}
+    for col in columns:
+        values = table.column(col)
+        if col == "Date":
+            data[col] = values.to_numpy().astype("datetime64[ns]")
+        elif col == "symbol":
+            # Dictionary-encoded in Arrow -> pandas category without a str per row
+            data[col] = values.dictionary_encode().to_pandas()
+        elif column_dtype(col) is np.int64:
+            data[col] = values.fill_null(0).to_numpy().astype(np.int64)
+        else:
+            data[col] = values.to_numpy(zero_copy_only=False).astype(column_dtype(col))
+    return data, table.num_rows
+
+
+# Fallback without pymongoarrow: NOT a columnar decode. bson.decode_all() still builds
+# one dict per document; only one batch of dicts is alive at a time, and each batch is
+# copied into per-column arrays before the next one is decoded.
+def _decode_batches_dicts(cursor, columns):
+    chunks = {col: [] for col in columns}
+    n_rows = 0
+    for raw_batch in cursor:
+        docs = bson.decode_all(raw_batch)
+        for col in columns:
+            chunks[col].append(_column_array(col, [doc.get(col) for doc in docs]))
+        n_rows += len(docs)
+
+    data = {}
+    for col in columns:
+        data[col] = np.concatenate(chunks[col]) if chunks[col] else _column_array(col, [])
+        chunks[col] = None  # free the per-batch pieces as we go
+    return data, n_rows
+
+
+# Range-filtered pull into typed columns:
+# - the symbol / date filter and the column projection run inside MongoDB (on the (symbol, Date) index)
+# - documents arrive as raw BSON batches of `batch_size`
+# - with pymongoarrow installed the batches are decoded straight into columns;
+#   without it each batch goes through Python dicts first (see _decode_batches_dicts)
+# - floats come back as float32, Volume as int64, Date as datetime64 and symbol as a category
+def pull_feature_columns(symbol=None, start=None, end=None, columns=None,
+                         batch_size=FEATURE_STORE_PULL_BATCH, collection=None):
+    try:
+        if collection is None:
+            collection = get_feature_collection()
+        columns = list(columns or FEATURE_STORE_COLUMNS)
+
+        query = {}
+        if symbol is not None:
+            symbols = [symbol] if isinstance(symbol, str) else list(symbol)
+            query["symbol"] = {"$in": [s.upper() for s in symbols]}
+        if start is not None or end is not None:
+            query["Date"] = {}
+            if start is not None:
+                query["Date"]["$gte"] = pd.Timestamp(start).to_pydatetime()
+            if end is not None:
+                query["Date"]["$lte"] = pd.Timestamp(end).to_pydatetime()
+
+        projection = {"_id": 0, **{col: 1 for col in columns}}
+        cursor = collection.find_raw_batches(query, projection, sort=[("symbol", 1), ("Date", 1)],
+                                             batch_size=batch_size)
+
+        if PyMongoArrowContext is not None:
+            codec_options = getattr(collection, "codec_options", None) or CodecOptions()
+            data, n_rows = _decode_batches_arrow(cursor, columns, codec_options)
+        else:
+            data, n_rows = _decode_batches_dicts(cursor, columns)
+
+        df = pd.DataFrame(data, copy=False)
+        if "symbol" in df.columns:
+            df["symbol"] = df["symbol"].astype("category")
+
+        print(f"Successfully pulled {n_rows} rows x {len(columns)} columns from MongoDB.")
+        return df
+
+    except Exception as e:
+        raise Exception(f"Error pulling columns from MongoDB: {e}")
+
+
+# Cheap "has the store changed?" stamp: row count, newest Date and a checksum of the
+# per-row hashes (so a revised row in the middle of the history also changes it).
+# One aggregation on the server; no feature values are transferred.
+def feature_store_version(collection=None):
+    try:
+        if collection is None:
+            collection = get_feature_collection()
+
+        pipeline = [{"$group": {
+            "_id": None,
+            "rows": {"$sum": 1},
+            "max_date": {"$max": "$Date"},
+            # Summing raw int64 hashes would overflow, so each one is reduced first
+            "checksum": {"$sum": {"$mod": [{"$ifNull": [f"${ROW_HASH_FIELD}", 0]}, 1_000_000_007]}},
+        }}]
+        result = next(iter(collection.aggregate(pipeline)), None)
+        if result is None:
+            return "empty"
+        return f"{result['rows']}:{pd.Timestamp(result['max_date']).isoformat()}:{int(result['checksum'])}"
+
+    except Exception as e:
+        raise Exception(f"Error reading Feature Store version: {e}")
@@ -1,3 +1,4 @@
+import json
 from fastapi.testclient import TestClient
 from api.main import app
 
@@ -18,4 +19,151 @@ def test_prediction():
     }
     response = client.post("/predict", json=payload)
     assert response.status_code == 200
-    assert "predicted_price" in response.json()
\ No newline at end of file
+    assert "predicted_price" in response.json()
+
+def test_batch_prediction_json():
+    """Batch endpoint keeps input order and reports bad rows without failing the batch"""
+    rows = [
+        {"Close": 100.0, "SMA_10": 102.0, "SMA_50": 98.0, "Volatility": 2.5},
+        {"Close": "not-a-number", "SMA_10": 102.0, "SMA_50": 98.0, "Volatility": 2.5},
+        {"Close": 150.0, "SMA_10": 148.0, "SMA_50": 145.0, "Volatility": 2.1},
+    ]
+    response = client.post("/predict/batch", json={"rows": rows})
+    assert response.status_code == 200
+
+    body = response.json()
+    assert body["count"] == 3
+    assert body["predictions"][1] is None
+    assert [e["index"] for e in body["errors"]] == [1]
+
+    single = client.post("/predict", json=rows[2]).json()["predicted_price"]
+    assert abs(body["predictions"][2] - single) < 1e-6
+
+
+def test_batch_prediction_binary():
+    """Raw float32 bodies give the same answers as JSON rows"""
+    import numpy as np
+
+    matrix = np.array([[100.0, 102.0, 98.0, 2.5], [150.0, 148.0, 145.0, 2.1]], dtype="<f4")
+    response = client.post(
+        "/predict/batch",
+        content=matrix.tobytes(),
+        headers={"content-type": "application/octet-stream"},
+    )
+    assert response.status_code == 200
+    assert len(response.json()["predictions"]) == 2
+    assert response.json()["errors"] == []
+
+
+
+def test_oversized_batches_are_refused_before_parsing(monkeypatch):
+    """Row limit is enforced on the body size / row count, before any row is parsed"""
+    import numpy as np
+    import api.main as main
+
+    def not_called(*args):
+        raise AssertionError("rows were parsed")
+
+    monkeypatch.setattr(main, "MAX_BATCH_ROWS", 2)
+    monkeypatch.setattr(main, "parse_binary_rows", not_called)
+    monkeypatch.setattr(main, "parse_json_rows", not_called)
+
+    matrix = np.ones((3, 4), dtype="<f4")
+    response = client.post("/predict/batch", content=matrix.tobytes(),
+                           headers={"content-type": "application/octet-stream"})
+    assert response.status_code == 413
+
+    # Small enough in bytes, too many rows
+    row = {"Close": 1, "SMA_10": 1, "SMA_50": 1, "Volatility": 1}
+    assert client.post("/predict/batch", json={"rows": [row] * 3}).status_code == 413
+
+    # Declared size alone is enough to refuse it
+    huge = json.dumps({"rows": [row] * 2}) + " " * 2 * main.MAX_JSON_ROW_BYTES
+    assert client.post("/predict/batch", content=huge,
+                       headers={"content-type": "application/json"}).status_code == 413
+
+def test_health_reports_model_state():
+    """Health check shows the loaded model version, cold start and worker memory"""
+    client.post("/predict", json={"Close": 100.0, "SMA_10": 102.0, "SMA_50": 98.0, "Volatility": 2.5})
+
+    model_info = client.get("/").json()["model"]
+    assert model_info["loaded"] is True
+    assert model_info["cold_start_seconds"] is not None
+    assert "memory" in model_info
+
+
+def test_predict_from_latest_close():
+    """Server keeps the rolling window, client only sends today's price"""
+    response = client.post("/predict/GOOGL", json={"Close": 180.0, "Date": "2026-01-02"})
+    assert response.status_code == 200
+
+    body = response.json()
+    assert body["status"] == "success"
+    assert set(body["features"]) == {"Close", "SMA_10", "SMA_50", "Volatility"}
+
+    # Unknown symbols need 50 closes before SMA_50 exists
+    body = client.post("/predict/NEWCO", json={"Close": 10.0, "Date": "2026-01-02"}).json()
+    assert body["status"] == "warming_up"
+    assert body["closes_needed"] == 49
+
+    # A retried bar replaces its close, an older bar is ignored: the window doesn't move
+    assert client.post("/predict/NEWCO", json={"Close": 11.0, "Date": "2026-01-02"}).json()["update"] == "replaced"
+    body = client.post("/predict/NEWCO", json={"Close": 12.0, "Date": "2026-01-01"}).json()
+    assert body["update"] == "ignored"
+    assert body["closes_needed"] == 49
+
+
+def test_repeated_requests_hit_the_prediction_cache():
+    payload = {"Close": 123.0, "SMA_10": 121.0, "SMA_50": 119.0, "Volatility": 1.75}
+    before = client.get("/stats/cache").json()["hits"]
+
+    first = client.post("/predict", json=payload).json()["predicted_price"]
+    second = client.post("/predict", json=payload).json()["predicted_price"]
+
+    assert first == second
+    assert client.get("/stats/cache").json()["hits"] == before + 1
+
+
+def test_metrics_endpoint_exposes_stage_latencies():
+    client.post("/predict", json={"Close": 111.0, "SMA_10": 110.0, "SMA_50": 108.0, "Volatility": 2.0})
+    client.post("/predict/GOOGL", json={"Close": 181.0, "Date": "2026-01-02"})
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+
+    text = response.text
+    assert 'api_stage_duration_seconds_count{stage="validation",engine=""}' in text
+    assert 'stage="predict"' in text
+    assert 'stage="serialize"' in text
+    assert "api_requests_in_flight" in text
+    # Routes are labelled by template, not by the raw symbol path
+    assert 'path="/predict/{symbol}"' in text
+
+
+def test_model_stats_and_symbol_routing():
+    payload = {"Close": 150.0, "SMA_10": 148.0, "SMA_50": 145.0, "Volatility": 2.5}
+    # Symbols without their own models/<SYMBOL>/ directory use the default model
+    default = client.post("/predict", json=payload).json()["predicted_price"]
+    routed = client.post("/predict", json={**payload, "symbol": "NOSUCHSYMBOL"}).json()["predicted_price"]
+    assert routed == default
+
+    response = client.get("/stats/models")
+    assert response.status_code == 200
+    assert response.json()["default"]["loaded"] is True
+    assert "memory_budget_mb" in response.json()
+
+
+def test_non_finite_features_are_rejected():
+    payload = {"Close": float("nan"), "SMA_10": 102.0, "SMA_50": 98.0, "Volatility": 2.5}
+    response = client.post("/predict", content=json.dumps(payload), headers={"content-type": "application/json"})
+    assert response.status_code == 422
+
+
+def test_path_like_symbols_are_rejected():
+    payload = {"Close": 100.0, "SMA_10": 102.0, "SMA_50": 98.0, "Volatility": 2.5}
+    for symbol in ["..", "../x"]:
+        assert client.post("/predict", json={**payload, "symbol": symbol}).status_code == 422
+
+    body = client.post("/predict/batch", json={"rows": [payload], "symbol": "../x"}).json()
+    assert body["predictions"] == [None]
+    assert "Invalid symbol" in body["errors"][0]["detail"]
@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor, VotingRegressor
+from sklearn.linear_model import LinearRegression
+from sklearn.preprocessing import StandardScaler
+from xgboost import XGBRegressor
+
+from src.components.backtest import (BacktestConfig, LinearSufficientStats, make_folds, run_backtest,
+                                     run_fold_chunk)
+
+SMALL_PARAMS = {
+    "lr": {},
+    "rf": {"n_estimators": 8, "max_depth": 4, "random_state": 42},
+    "xgb": {"n_estimators": 8, "learning_rate": 0.2, "random_state": 42},
+}
+
+
+def make_features(n=160):
+    rng = np.random.default_rng(1)
+    close = 100 + np.cumsum(rng.normal(size=n))
+    df = pd.DataFrame({
+        "Date": pd.date_range("2022-01-03", periods=n, freq="B"),
+        "Close": close,
+        "SMA_10": close + rng.normal(scale=0.5, size=n),
+        "SMA_50": close + rng.normal(scale=1.0, size=n),
+        "Volatility": rng.uniform(0.5, 2.0, size=n),
+    })
+    df["Target"] = df["Close"].shift(-1)
+    return df.dropna()
+
+
+def test_make_folds_rolling_and_expanding():
+    folds = make_folds(20, window=10, step=3, horizon=2)
+    assert folds[0] == (0, 10, 10, 12)
+    assert folds[1] == (3, 13, 13, 15)
+    # Every test range sits right after its training range and inside the data
+    assert all(train_end == test_start and test_end <= 20 for _, train_end, test_start, test_end in folds)
+
+    expanding = make_folds(20, window=10, step=3, horizon=2, expanding=True)
+    assert all(train_start == 0 for train_start, *_ in expanding)
+
+
+def test_sufficient_stats_match_linear_regression_on_sliding_window():
+    rng = np.random.default_rng(2)
+    X = rng.normal(size=(60, 3))
+    y = X @ np.array([1.0, 2.0, -1.0]) + 3 + rng.normal(scale=0.1, size=60)
+
+    stats = LinearSufficientStats(3)
+    stats.add(X[:40], y[:40])
+    # Slide the window by 10 rows
+    stats.add(X[40:50], y[40:50])
+    stats.remove(X[:10], y[:10])
+
+    coef, intercept = stats.solve()
+    reference = LinearRegression().fit(X[10:50], y[10:50])
+    np.testing.assert_allclose(coef, reference.coef_, rtol=1e-8)
+    assert abs(intercept - reference.intercept_) < 1e-8
+
+
+def test_full_refit_fold_matches_trainer_ensemble():
+    df = make_features()
+    X = df[["Close", "SMA_10", "SMA_50", "Volatility"]].to_numpy()
+    y = df["Target"].to_numpy()
+
+    rows = run_fold_chunk(X, y, [(20, 100, 100, 110)], [0], SMALL_PARAMS, reuse=False)
+
+    # What ModelTrainer does for the same split
+    scaler = StandardScaler().fit(X[20:100])
+    ensemble = VotingRegressor([
+        ("lr", LinearRegression()),
+        ("rf", RandomForestRegressor(n_jobs=1, **SMALL_PARAMS["rf"])),
+        ("xgb", XGBRegressor(n_jobs=1, **SMALL_PARAMS["xgb"])),
+    ]).fit(scaler.transform(X[20:100]), y[20:100])
+    expected = np.mean(np.abs(ensemble.predict(scaler.transform(X[100:110])) - y[100:110]))
+
+    assert abs(rows[0]["mae"] - expected) < 1e-6
+
+
+def test_backtest_reuses_models_between_refits_and_parallel_matches_serial():
+    df = make_features()
+    config = BacktestConfig(window=60, step=5, horizon=5, n_jobs=1, reuse=True, refit_every=4)
+
+    folds, summary = run_backtest(df, SMALL_PARAMS, config)
+    assert summary["folds"] == len(folds) == len(make_folds(len(df), 60, 5, 5))
+    # One full refit per chunk of 4 folds, updates in between
+    assert list(folds["mode"][:5]) == ["full", "update", "update", "update", "full"]
+    assert folds["test_start"].is_monotonic_increasing
+    assert np.isfinite(summary["mae"])
+    assert summary["approximate"] is True
+
+    config.n_jobs = 2
+    parallel_folds, _ = run_backtest(df, SMALL_PARAMS, config)
+    np.testing.assert_allclose(parallel_folds["mae"], folds["mae"], rtol=1e-9)
+
+
+def test_exact_refits_are_the_default():
+    config = BacktestConfig(window=60, step=20, horizon=5, n_jobs=1)
+    assert config.reuse is False
+
+    folds, summary = run_backtest(make_features(), SMALL_PARAMS, config)
+    assert (folds["mode"] == "full").all()
+    assert summary["approximate"] is False
@@ -0,0 +1,79 @@
+import asyncio
+import numpy as np
+
+from api.batching import MicroBatcher
+
+
+def test_concurrent_requests_share_one_predict_call():
+    """Rows submitted together are scored in one call and answered in order"""
+    calls = []
+
+    def fake_predict(features, key):
+        calls.append(len(features))
+        return features.sum(axis=1)
+
+    batcher = MicroBatcher(fake_predict, max_batch_size=8, max_wait_us=50_000)
+
+    async def burst():
+        rows = [[float(i), 1.0, 1.0, 1.0] for i in range(20)]
+        return await asyncio.gather(*(batcher.submit(row) for row in rows))
+
+    results = asyncio.run(burst())
+
+    assert results == [float(i) + 3.0 for i in range(20)]
+    # Two full batches flushed on size, the remainder flushed on the timer
+    assert calls == [8, 8, 4]
+
+    stats = batcher.stats()
+    assert stats["batch_size"]["count"] == 3
+    assert stats["wait_us"]["count"] == 20
+
+
+def test_predict_errors_reach_every_waiting_request():
+    def broken_predict(features, key):
+        raise ValueError("model exploded")
+
+    batcher = MicroBatcher(broken_predict, max_batch_size=4, max_wait_us=1000)
+
+    async def burst():
+        return await asyncio.gather(*(batcher.submit([1.0, 2.0, 3.0, 4.0]) for _ in range(3)),
+                                    return_exceptions=True)
+
+    results = asyncio.run(burst())
+    assert all(isinstance(r, ValueError) for r in results)
+
+
+def test_rows_for_different_models_are_scored_separately():
+    calls = []
+
+    def fake_predict(features, key):
+        calls.append((key, len(features)))
+        return features[:, 0]
+
+    batcher = MicroBatcher(fake_predict, max_batch_size=100, max_wait_us=1000)
+
+    async def burst():
+        submits = [batcher.submit([float(i), 0.0, 0.0, 0.0], key="AAPL" if i % 2 else "MSFT") for i in range(6)]
+        return await asyncio.gather(*submits)
+
+    assert asyncio.run(burst()) == [float(i) for i in range(6)]
+    assert sorted(calls) == [("AAPL", 3), ("MSFT", 3)]
+
+
+def test_bad_row_does_not_fail_the_rest_of_its_batch():
+    """A NaN request queued next to a good one only fails itself"""
+    def strict_predict(features, key):
+        if not np.isfinite(features).all():
+            raise ValueError("non-finite input")
+        return features.sum(axis=1)
+
+    batcher = MicroBatcher(strict_predict, max_batch_size=8, max_wait_us=50_000)
+
+    async def burst():
+        return await asyncio.gather(batcher.submit([float("nan"), 1.0, 1.0, 1.0]),
+                                    batcher.submit([1.0, 1.0, 1.0, 1.0]),
+                                    return_exceptions=True)
+
+    bad, good = asyncio.run(burst())
+    assert isinstance(bad, ValueError)
+    assert good == 4.0
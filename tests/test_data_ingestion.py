@@ -0,0 +1,142 @@
+import json
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from src.components.data_ingestion import DataIngestion
+from src.raw_store import RawStore
+from src.price_sources import CSVFixtureFetcher, PriceFetcher, TokenBucket
+
+
+def make_ingestion(tmp_path, n_stored):
+    fixture = pd.read_csv("data/stock_data.csv").tail(100)
+    fixture.to_csv(tmp_path / "fixture.csv", index=False)
+    fixture.head(n_stored).to_csv(tmp_path / "data.csv", index=False)
+
+    ingestion = DataIngestion(fetcher=CSVFixtureFetcher(str(tmp_path / "fixture.csv")))
+    ingestion.ingestion_config.raw_data_path = str(tmp_path / "data.csv")
+    return ingestion, fixture
+
+
+def test_incremental_ingestion_appends_only_new_bars(tmp_path):
+    ingestion, fixture = make_ingestion(tmp_path, n_stored=90)
+    assert ingestion.last_stored_date() == pd.Timestamp(fixture["Date"].iloc[89])
+
+    ingestion.initiate_data_ingestion(incremental=True)
+    assert ingestion.last_run["new_rows"] == 10
+    assert ingestion.last_run["rows"] == 11  # only the missing range (+ the last stored bar) was fetched
+
+    stored = pd.read_csv(tmp_path / "data.csv")
+    assert list(stored["Date"]) == list(fixture["Date"])
+    assert list(stored.columns) == list(fixture.columns)
+
+    # Nothing new -> nothing appended
+    ingestion.initiate_data_ingestion(incremental=True)
+    assert ingestion.last_run["new_rows"] == 0
+    assert len(pd.read_csv(tmp_path / "data.csv")) == 100
+
+
+def test_overlapping_bars_are_deduplicated(tmp_path):
+    ingestion, fixture = make_ingestion(tmp_path, n_stored=95)
+
+    # A source that ignores `start` and returns the whole fixture again
+    original_fetch = ingestion.fetcher._fetch
+    ingestion.fetcher._fetch = lambda symbol, start=None, period="5y": original_fetch(symbol)
+
+    ingestion.initiate_data_ingestion(incremental=True)
+    stored = pd.read_csv(tmp_path / "data.csv")
+    assert len(stored) == 100 and stored["Date"].is_unique
+
+
+def test_partial_last_bar_is_refreshed(tmp_path):
+    """A bar stored mid-session is replaced by its final version on the next run"""
+    ingestion, fixture = make_ingestion(tmp_path, n_stored=90)
+    stored = fixture.head(90).copy()
+    stored.loc[stored.index[-1], "Close"] = 1.0  # intraday price, not the close
+    stored.to_csv(tmp_path / "data.csv", index=False)
+
+    ingestion.initiate_data_ingestion(incremental=True)
+    assert ingestion.last_run["new_rows"] == 10
+
+    refreshed = pd.read_csv(tmp_path / "data.csv")
+    assert list(refreshed["Date"]) == list(fixture["Date"])
+    assert refreshed["Close"].iloc[89] == pytest.approx(fixture["Close"].iloc[89])
+
+    # Same for the Parquet raw store
+    ingestion.raw_store = RawStore(str(tmp_path / "raw_store"))
+    ingestion.raw_store.write(stored, "GOOGL")
+    ingestion.initiate_data_ingestion(incremental=True)
+    bars = ingestion.raw_store.read(symbols=["GOOGL"])
+    assert len(bars) == 100
+    assert bars["Close"].iloc[89] == pytest.approx(fixture["Close"].iloc[89], rel=1e-6)
+
+
+# Local fake data source: a few bars per symbol, some symbols fail
+class FakeSource(PriceFetcher):
+    name = "fake"
+
+    def __init__(self, flaky=(), broken=()):
+        super().__init__()
+        self.flaky = {symbol: 2 for symbol in flaky}  # failures before the first success
+        self.broken = set(broken)
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def _fetch(self, symbol, start=None, period="5y"):
+        with self._lock:
+            self.calls += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(0.01)
+            if symbol in self.broken:
+                raise ConnectionError("503 from upstream")
+            with self._lock:
+                if self.flaky.get(symbol, 0) > 0:
+                    self.flaky[symbol] -= 1
+                    raise TimeoutError("read timed out")
+            dates = pd.bdate_range("2024-01-01", periods=5)
+            return pd.DataFrame({"Date": dates, "Close": 1.0, "High": 1.0, "Low": 1.0, "Open": 1.0, "Volume": 100})
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+def test_multi_symbol_ingestion_reports_each_symbol(tmp_path):
+    source = FakeSource(flaky=["MSFT"], broken=["BAD"])
+    ingestion = DataIngestion(fetcher=source)
+    config = ingestion.ingestion_config
+    config.raw_dir = str(tmp_path / "raw")
+    config.report_path = str(tmp_path / "raw" / "report.json")
+    config.max_workers = 4
+    config.rate_per_second = 1000
+    config.retries = 2
+    config.retry_base_delay = 0.001
+
+    symbols = [f"S{i:02d}" for i in range(20)] + ["MSFT", "BAD"]
+    summary = ingestion.initiate_multi_symbol_ingestion(symbols)
+
+    assert summary["succeeded"] == 21 and summary["failed"] == 1
+    results = {r["symbol"]: r for r in summary["results"]}
+    assert results["MSFT"]["attempts"] == 3
+    assert results["BAD"]["status"] == "failed" and "503" in results["BAD"]["error"]
+    assert 1 < source.max_active <= 4
+
+    # Every successful symbol was written as it completed, the failed one was not
+    assert len(pd.read_csv(tmp_path / "raw" / "S07.csv")) == 5
+    assert not (tmp_path / "raw" / "BAD.csv").exists()
+    assert json.loads((tmp_path / "raw" / "report.json").read_text())["failed"] == 1
+
+
+def test_token_bucket_limits_the_request_rate():
+    now = [0.0]
+    bucket = TokenBucket(rate=2, capacity=2, clock=lambda: now[0],
+                         sleep=lambda seconds: now.__setitem__(0, now[0] + seconds))
+    for _ in range(6):
+        bucket.acquire()
+    # 2 requests in the burst, then one every 0.5s
+    assert now[0] == pytest.approx(2.0)
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from src.components.ensemble_training import (allocate_cores, assemble_ensemble, fit_members,
+                                              fit_stats_to_metrics)
+
+SMALL_PARAMS = {
+    "lr": {},
+    "rf": {"n_estimators": 20, "max_depth": 4, "random_state": 42},
+    "xgb": {"n_estimators": 20, "learning_rate": 0.2, "random_state": 42},
+}
+
+
+def make_data(n=300):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(n, 4))
+    y = X @ np.array([1.0, -2.0, 0.5, 0.0]) + rng.normal(scale=0.1, size=n)
+    return X, y
+
+
+def test_allocate_cores_keeps_budget():
+    # LR is fitted in the parent first, so the tree workers share the whole budget
+    cores = allocate_cores(8)
+    assert cores["lr"] == 1
+    assert cores["rf"] + cores["xgb"] == 8
+
+    for members in [("lr", "rf", "xgb"), ("rf", "xgb"), ("lr", "xgb")]:
+        for budget in range(2, 17):
+            cores = allocate_cores(budget, members=members)
+            assert set(cores) == set(members)
+            workers = [name for name in members if name != "lr"]
+            assert min(cores.values()) >= 1 and sum(cores[name] for name in workers) == budget
+    # Fewer cores than tree workers can't be split without oversubscribing
+    with pytest.raises(ValueError):
+        allocate_cores(1)
+
+
+def test_small_budget_or_small_data_fits_members_one_after_another():
+    X, y = make_data(n=200)
+    _, stats = fit_members(X, y, SMALL_PARAMS, parallel=True, core_budget=1, min_parallel_rows=0)
+    assert stats["total"]["parallel"] is False
+    # Too few rows to pay for spawning the workers
+    _, stats = fit_members(X, y, SMALL_PARAMS, parallel=True, core_budget=4, min_parallel_rows=1000)
+    assert stats["total"]["parallel"] is False
+
+
+def test_parallel_fit_matches_sequential_fit():
+    X, y = make_data()
+
+    parallel_members, stats = fit_members(X, y, SMALL_PARAMS, parallel=True, core_budget=2,
+                                          min_parallel_rows=0)
+    sequential_members, _ = fit_members(X, y, SMALL_PARAMS, parallel=False)
+
+    parallel = assemble_ensemble(parallel_members, SMALL_PARAMS)
+    sequential = assemble_ensemble(sequential_members, SMALL_PARAMS)
+    np.testing.assert_allclose(parallel.predict(X), sequential.predict(X), rtol=1e-6)
+
+    # The assembled ensemble averages its members, like a fitted VotingRegressor
+    expected = np.mean([member.predict(X) for member in parallel_members.values()], axis=0)
+    np.testing.assert_allclose(parallel.predict(X), expected, rtol=1e-6)
+
+    for name in ("lr", "rf", "xgb"):
+        assert stats[name]["fit_seconds"] >= 0
+        assert stats[name]["peak_rss_mb"] > 0
+    assert stats["total"]["parallel"] is True
+
+    metrics = fit_stats_to_metrics(stats)
+    assert "fit_seconds/rf" in metrics and "train_wall_seconds" in metrics
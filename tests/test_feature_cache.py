@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.feature_cache import FeatureCache, FeatureCacheConfig
+
+
+class FakeStore:
+    def __init__(self):
+        self.version = "v1"
+        self.pulls = 0
+
+    def pull(self):
+        self.pulls += 1
+        return pd.DataFrame({
+            "Date": pd.date_range("2024-01-01", periods=5, freq="D"),
+            "Close": np.arange(5, dtype=np.float32) + 100,
+            "Target": np.arange(5, dtype=np.float32) + 101,
+        })
+
+
+def make_cache(tmp_path, store, offline=False):
+    config = FeatureCacheConfig(cache_file_path=str(tmp_path / "features.arrow"), offline=offline)
+    return FeatureCache(config, pull_fn=store.pull, version_fn=lambda: store.version)
+
+
+def test_mirror_is_pulled_once_per_store_version(tmp_path):
+    store = FakeStore()
+    cache = make_cache(tmp_path, store)
+
+    first = cache.load()
+    # A second trainer / sweep trial (even in a new process) reuses the mirror
+    make_cache(tmp_path, store).load()
+    assert store.pulls == 1
+    assert first["Close"].dtype == np.float32 and len(first) == 5
+
+    store.version = "v2"
+    cache.load()
+    assert store.pulls == 2
+    assert cache.local_version() == "v2"
+
+
+def test_offline_mode_reads_the_mirror_without_the_store(tmp_path):
+    store = FakeStore()
+
+    with pytest.raises(Exception, match="no local feature mirror"):
+        make_cache(tmp_path, store, offline=True).load()
+
+    make_cache(tmp_path, store).load()
+
+    def unreachable():
+        raise AssertionError("offline mode must not contact the store")
+
+    offline = FeatureCache(FeatureCacheConfig(cache_file_path=str(tmp_path / "features.arrow"), offline=True),
+                           pull_fn=unreachable, version_fn=unreachable)
+    assert len(offline.load()) == 5
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+
+from src.feature_engine import DEFAULT_FEATURES, FEATURE_REGISTRY, compute_features
+
+
+def make_prices(symbols, n_days=300):
+    rng = np.random.default_rng(3)
+    frames = []
+    for i, symbol in enumerate(symbols):
+        # Symbols with different start dates -> gaps in the (date x symbol) panel
+        dates = pd.bdate_range("2020-01-01", periods=n_days)[i * 20:]
+        close = 100 + rng.standard_normal(len(dates)).cumsum()
+        frames.append(pd.DataFrame({"Date": dates, "symbol": symbol, "Close": close,
+                                    "High": close + 1, "Low": close - 1}))
+    return pd.concat(frames, ignore_index=True)
+
+
+def test_default_features_match_the_pandas_recipe():
+    df = make_prices(["AAA", "BBB", "CCC"])
+    out = compute_features(df, DEFAULT_FEATURES)
+
+    for symbol, group in df.groupby("symbol"):
+        close = group.set_index("Date")["Close"]
+        expected = pd.DataFrame({
+            "SMA_10": close.rolling(10).mean(),
+            "SMA_50": close.rolling(50).mean(),
+            "Volatility": close.rolling(10).std(),
+            "Target": close.shift(-1),
+        }).dropna()
+        got = out[out["symbol"] == symbol].set_index("Date")[DEFAULT_FEATURES]
+
+        assert got.index.equals(expected.index)
+        np.testing.assert_allclose(got.to_numpy(), expected.to_numpy(), rtol=1e-9)
+
+
+def test_indicators_match_pandas_and_process_pool_gives_same_result():
+    df = make_prices(["AAA", "BBB"])
+    features = ["EMA_12", "MACD", "Return_1", "ATR_14", "RSI_14"]
+
+    out = compute_features(df, features)
+    close = df[df["symbol"] == "BBB"].set_index("Date")["Close"]
+    got = out[out["symbol"] == "BBB"].set_index("Date")
+
+    ema12 = close.ewm(span=12, adjust=False).mean()
+    macd = ema12 - close.ewm(span=26, adjust=False).mean()
+    np.testing.assert_allclose(got["EMA_12"], ema12.loc[got.index], rtol=1e-12)
+    np.testing.assert_allclose(got["MACD"], macd.loc[got.index], rtol=1e-9, atol=1e-9)
+    np.testing.assert_allclose(got["Return_1"], close.pct_change().loc[got.index], rtol=1e-12)
+    assert got["RSI_14"].between(0, 100).all()
+
+    parallel = compute_features(df, features, n_jobs=2)
+    pd.testing.assert_frame_equal(parallel.sort_index(), out.sort_index())
+
+
+def test_every_registered_feature_can_be_computed():
+    out = compute_features(make_prices(["AAA"]), list(FEATURE_REGISTRY))
+    assert len(out) > 0
+    assert np.isfinite(out[list(FEATURE_REGISTRY)].to_numpy()).all()
+
+
+def test_a_date_missing_for_one_symbol_does_not_drop_its_rows():
+    """BBB skips a day AAA has (e.g. a trading halt): BBB's features ignore AAA's calendar"""
+    df = make_prices(["AAA", "BBB"], n_days=150)
+    bbb_dates = df.loc[df["symbol"] == "BBB", "Date"]
+    df = df.drop(bbb_dates.index[60]).reset_index(drop=True)
+
+    together = compute_features(df, DEFAULT_FEATURES)
+    for symbol in ["AAA", "BBB"]:
+        alone = compute_features(df[df["symbol"] == symbol], DEFAULT_FEATURES)
+        got = together[together["symbol"] == symbol]
+        assert len(got) == len(alone)
+        np.testing.assert_allclose(got[DEFAULT_FEATURES].to_numpy(), alone[DEFAULT_FEATURES].to_numpy(), rtol=1e-9)
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+
+from api.feature_state import FeatureStateStore, SymbolState
+
+
+def test_running_features_match_pandas_rolling():
+    """O(1) ring-buffer features == the training pipeline's pandas rolling features"""
+    rng = np.random.default_rng(0)
+    close = pd.Series(100 + np.cumsum(rng.normal(0, 2, 2500)))
+
+    expected = pd.DataFrame({
+        "SMA_10": close.rolling(window=10).mean(),
+        "SMA_50": close.rolling(window=50).mean(),
+        "Volatility": close.rolling(window=10).std(),
+    })
+
+    state = SymbolState()
+    for i, price in enumerate(close):
+        state.push(price)
+        features = state.features()
+        if i < 49:
+            assert features is None
+            continue
+        for col in ["SMA_10", "SMA_50", "Volatility"]:
+            assert abs(features[col] - expected[col].iloc[i]) < 1e-8
+
+
+def test_bulk_seed_keeps_only_the_window_tail():
+    closes = np.arange(1.0, 201.0)
+    history = pd.DataFrame({"symbol": ["aapl"] * 200 + ["msft"] * 3, "Close": np.r_[closes, [1.0, 2.0, 3.0]]})
+
+    store = FeatureStateStore(seed_fn=lambda: history)
+    features, needed, action = store.update("AAPL", 201.0, "2026-01-02")
+
+    assert (needed, action) == (0, "appended")
+    assert features["SMA_50"] == np.mean(np.arange(152.0, 202.0))
+    assert store.update("msft", 4.0, "2026-01-02") == (None, 46, "appended")
+
+
+def test_repeated_or_old_bars_do_not_shift_the_window():
+    """Client retries of the same bar replace it; closes of older bars are ignored"""
+    dates = pd.bdate_range("2025-01-01", periods=60)
+    history = pd.DataFrame({"symbol": "AAPL", "Close": np.arange(1.0, 61.0), "Date": dates})
+    store = FeatureStateStore(seed_fn=lambda: history)
+
+    # The seeded last bar re-sent with a corrected price: replaced, not appended
+    features, _, action = store.update("AAPL", 70.0, dates[-1])
+    assert action == "replaced"
+    assert features["SMA_50"] == np.mean(np.r_[np.arange(11.0, 60.0), 70.0])
+
+    features, _, action = store.update("aapl", 99.0, dates[-5])
+    assert action == "ignored"
+    assert features["Close"] == 70.0
+
+    new_bar = dates[-1] + pd.Timedelta(days=1)
+    once = store.update("AAPL", 61.0, new_bar)[0]
+    again = store.update("AAPL", 61.0, new_bar.tz_localize("UTC"))[0]
+    assert once == again
+
+    expected = pd.Series(np.r_[np.arange(1.0, 60.0), 70.0, 61.0])
+    assert abs(once["Volatility"] - expected.rolling(10).std().iloc[-1]) < 1e-8
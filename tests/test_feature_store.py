@@ -0,0 +1,147 @@
+import itertools
+from types import SimpleNamespace
+
+import bson
+import pytest
+import numpy as np
+import pandas as pd
+
+from src.utils import pull_feature_columns, push_to_feature_store, ROW_HASH_FIELD
+
+_ids = itertools.count()
+
+
+# In-process stand-in for the pymongo calls push_to_feature_store makes,
+# with documents stored by their unique (symbol, Date) key
+class FakeCollection:
+    def __init__(self):
+        self.full_name = f"test.features{next(_ids)}"
+        self.docs = {}
+        self.bulk_calls = []
+
+    def update_many(self, query, update):
+        for doc in self.docs.values():
+            if "symbol" not in doc:
+                doc.update(update["$set"])
+
+    def create_index(self, keys, unique=False, name=None):
+        self.docs = {(doc["symbol"], pd.Timestamp(doc["Date"])): doc for doc in self.docs.values()}
+
+    def find(self, query, projection):
+        symbols = query["symbol"]["$in"]
+        return [dict(doc) for doc in self.docs.values() if doc["symbol"] in symbols]
+
+    def bulk_write(self, operations, ordered=True):
+        self.bulk_calls.append((len(operations), ordered))
+        upserted = modified = 0
+        for op in operations:
+            key = (op._filter["symbol"], pd.Timestamp(op._filter["Date"]))
+            if key in self.docs:
+                modified += 1
+                self.docs[key].update(op._doc["$set"])
+            else:
+                upserted += 1
+                self.docs[key] = dict(op._doc["$set"])
+        return SimpleNamespace(upserted_count=upserted, modified_count=modified)
+
+    def delete_many(self, query):
+        keys = [(q["symbol"], pd.Timestamp(q["Date"])) for q in query["$or"]]
+        for key in keys:
+            del self.docs[key]
+        return SimpleNamespace(deleted_count=len(keys))
+
+
+def make_features(n_days, start="2024-01-01"):
+    dates = pd.date_range(start, periods=n_days, freq="D", name="Date")
+    close = pd.Series(range(n_days), index=dates, dtype=float) + 100.0
+    return pd.DataFrame({"Close": close, "SMA_10": close - 1, "SMA_50": close - 2,
+                         "Volatility": 1.0, "Target": close + 1})
+
+
+def test_push_only_writes_new_or_changed_rows():
+    collection = FakeCollection()
+
+    first = push_to_feature_store(make_features(10), chunk_size=4, collection=collection)
+    assert first == {"inserted": 10, "updated": 0, "unchanged": 0, "deleted": 0}
+    # Unordered bulk writes in fixed-size chunks
+    assert collection.bulk_calls == [(4, False), (4, False), (2, False)]
+
+    # Next run: one day more, and yesterday's Target was revised
+    df = make_features(11)
+    df.iloc[9, df.columns.get_loc("Target")] = 999.0
+    second = push_to_feature_store(df, chunk_size=4, collection=collection)
+
+    assert second == {"inserted": 1, "updated": 1, "unchanged": 9, "deleted": 0}
+    assert len(collection.docs) == 11
+    doc = collection.docs[("GOOGL", pd.Timestamp("2024-01-10"))]
+    assert doc["Target"] == 999.0 and ROW_HASH_FIELD in doc
+
+
+def test_replace_mode_deletes_rows_missing_from_the_frame():
+    collection = FakeCollection()
+    push_to_feature_store(make_features(10), collection=collection)
+
+    result = push_to_feature_store(make_features(5, start="2024-01-06"), mode="replace", collection=collection)
+
+    assert result["deleted"] == 5
+    assert sorted(key[1].day for key in collection.docs) == [6, 7, 8, 9, 10]
+
+
+# find_raw_batches() stand-in: filters and projects like MongoDB, then returns BSON bytes per batch
+class RawBatchCollection:
+    def __init__(self, docs):
+        self.docs = docs
+        self.calls = []
+
+    def find_raw_batches(self, query, projection, sort=None, batch_size=None):
+        self.calls.append((query, projection, batch_size))
+        symbols = query.get("symbol", {}).get("$in")
+        dates = query.get("Date", {})
+        rows = [doc for doc in self.docs
+                if (symbols is None or doc["symbol"] in symbols)
+                and doc["Date"] >= dates.get("$gte", doc["Date"])
+                and doc["Date"] <= dates.get("$lte", doc["Date"])]
+        rows = [{k: v for k, v in doc.items() if projection.get(k)} for doc in rows]
+        return [b"".join(bson.encode(doc) for doc in rows[i:i + batch_size])
+                for i in range(0, len(rows), batch_size)]
+
+
+def test_columnar_pull_filters_projects_and_types_columns():
+    docs = []
+    for symbol in ["AAPL", "GOOGL"]:
+        for date in pd.date_range("2024-01-01", periods=10, freq="D"):
+            docs.append({"symbol": symbol, "Date": date.to_pydatetime(), "Close": 100.5,
+                         "SMA_10": 99.0, "Volume": 1_000_000, "Target": 101.0})
+    collection = RawBatchCollection(docs)
+
+    df = pull_feature_columns(symbol="googl", start="2024-01-03", end="2024-01-07",
+                              columns=["Date", "symbol", "Close", "Volume"], batch_size=2, collection=collection)
+
+    query, projection, _ = collection.calls[0]
+    assert query["symbol"] == {"$in": ["GOOGL"]}
+    assert projection == {"_id": 0, "Date": 1, "symbol": 1, "Close": 1, "Volume": 1}
+
+    assert len(df) == 5
+    assert list(df.columns) == ["Date", "symbol", "Close", "Volume"]
+    assert df["Close"].dtype == np.float32
+    assert df["Volume"].dtype == np.int64
+    assert df["Date"].min() == pd.Timestamp("2024-01-03")
+    assert (df["symbol"] == "GOOGL").all()
+
+
+def test_columnar_pull_gives_the_same_frame_with_and_without_pymongoarrow(monkeypatch):
+    pytest.importorskip("pymongoarrow")
+    import src.utils as utils
+
+    docs = [{"symbol": symbol, "Date": date.to_pydatetime(), "Close": 100.5 + i, "Volume": i}
+            for symbol in ["AAPL", "MSFT"]
+            for i, date in enumerate(pd.date_range("2024-01-01", periods=7, freq="D"))]
+    docs[3].pop("Close")  # missing values: NaN for floats, 0 for Volume like before
+    columns = ["Date", "symbol", "Close", "Volume"]
+
+    arrow = pull_feature_columns(columns=columns, batch_size=3, collection=RawBatchCollection(docs))
+    monkeypatch.setattr(utils, "PyMongoArrowContext", None)
+    dicts = pull_feature_columns(columns=columns, batch_size=3, collection=RawBatchCollection(docs))
+
+    pd.testing.assert_frame_equal(arrow, dicts)
+    assert np.isnan(arrow["Close"].iloc[3])
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.feature_store import SCHEMA_VERSION, FeatureStore, SQLiteFeatureStore
+
+
+def make_features(n_days, start="2024-01-01"):
+    dates = pd.date_range(start, periods=n_days, freq="D", name="Date")
+    close = pd.Series(range(n_days), index=dates, dtype=float) + 100.0
+    return pd.DataFrame({"Close": close, "Volume": 1000, "SMA_10": close - 1, "SMA_50": close - 2,
+                         "Volatility": 1.0, "Target": close + 1})
+
+
+def test_sqlite_store_upserts_and_reads_ranges(tmp_path):
+    store = SQLiteFeatureStore(str(tmp_path / "features.db"))
+    assert store.version() == "empty"
+
+    assert store.write(make_features(10))["written"] == 10
+    version = store.version()
+
+    # Same rows again -> nothing is rewritten and the version stays the same
+    assert store.write(make_features(10))["unchanged"] == 10
+    assert store.version() == version
+
+    df = make_features(11)
+    df.iloc[3, df.columns.get_loc("Target")] = 999.0
+    assert store.write(df)["written"] == 2
+    assert store.version() != version
+    assert store.schema_version() == SCHEMA_VERSION
+
+    result = store.read(symbol="googl", start="2024-01-03", end="2024-01-05",
+                        columns=["Date", "symbol", "Volume", "Target"])
+    assert list(result["Date"].dt.day) == [3, 4, 5]
+    assert result["Target"].dtype == np.float32 and result["Volume"].dtype == np.int64
+    assert result["Target"].iloc[1] == 999.0
+
+
+def test_sqlite_replace_mode_and_newer_schema(tmp_path):
+    store = SQLiteFeatureStore(str(tmp_path / "features.db"))
+    store.write(make_features(10))
+    assert store.write(make_features(4, start="2024-01-04"), mode="replace")["deleted"] == 6
+    assert len(store.read()) == 4
+
+    store._connect().execute("UPDATE meta SET value = ? WHERE key = 'schema_version'", (str(SCHEMA_VERSION + 1),))
+    store._connect().commit()
+    with pytest.raises(Exception, match="schema"):
+        SQLiteFeatureStore(str(tmp_path / "features.db"))
+
+
+def test_incomplete_backend_fails_when_created():
+    class WriteOnlyStore(FeatureStore):
+        def write(self, df, mode="upsert"):
+            return {}
+
+    with pytest.raises(TypeError):
+        WriteOnlyStore()
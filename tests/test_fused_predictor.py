@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+from sklearn.ensemble import RandomForestRegressor, VotingRegressor
+from sklearn.preprocessing import StandardScaler
+from xgboost import XGBRegressor
+
+from src.components.model_export import compile_ensemble
+from src.fused_predictor import FusedPredictor
+
+FEATURES = ["Close", "SMA_10", "SMA_50", "Volatility"]
+
+
+def make_ensemble(weights=None):
+    rng = np.random.default_rng(0)
+    close = 100 + np.cumsum(rng.normal(0, 2, 600))
+    X = pd.DataFrame({
+        "Close": close,
+        "SMA_10": close + rng.normal(0, 1, 600),
+        "SMA_50": close + rng.normal(0, 3, 600),
+        "Volatility": rng.uniform(0.5, 5, 600),
+    })
+    y = close + rng.normal(0, 1, 600)
+
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X)
+    ensemble = VotingRegressor(estimators=[
+        ("lr", LinearRegression()),
+        ("rf", RandomForestRegressor(n_estimators=20, max_depth=8, random_state=42)),
+        ("xgb", XGBRegressor(n_estimators=30, learning_rate=0.2, random_state=42)),
+    ], weights=weights)
+    ensemble.fit(X_scaled, y)
+    return ensemble, scaler, X
+
+
+def test_fused_predictor_matches_ensemble(tmp_path):
+    """Fused predictor on raw features == ensemble.predict on scaled features"""
+    ensemble, scaler, X = make_ensemble()
+
+    predictor = FusedPredictor(compile_ensemble(ensemble, scaler))
+    predictor.save(tmp_path / "fused_model.joblib")
+    predictor = FusedPredictor.load(tmp_path / "fused_model.joblib", mmap_mode="r")
+
+    expected = ensemble.predict(scaler.transform(X))
+    # XGBoost sums its trees in float32, so allow for that rounding
+    np.testing.assert_allclose(predictor.predict(X.values), expected, rtol=0, atol=1e-3)
+    np.testing.assert_allclose(predictor.predict(X.values[0]), expected[:1], rtol=0, atol=1e-3)
+
+
+def test_fused_predictor_respects_voting_weights():
+    ensemble, scaler, X = make_ensemble(weights=[1, 2, 3])
+
+    predictor = FusedPredictor(compile_ensemble(ensemble, scaler))
+    np.testing.assert_allclose(predictor.predict(X.values), ensemble.predict(scaler.transform(X)), rtol=0, atol=1e-3)
@@ -0,0 +1,92 @@
+import json
+import numpy as np
+import pandas as pd
+
+import src.local_search as local_search
+from src.local_search import LocalSearch, LocalSearchConfig, prepare_arrays, run_trial
+
+SMALL_SPACE = {
+    "rf_n_estimators": [5, 10],
+    "rf_max_depth": [3, None],
+    "xgb_learning_rate": [0.1, 0.3],
+    "xgb_n_estimators": [8, 16],
+}
+
+
+def make_features(n=200):
+    rng = np.random.default_rng(4)
+    close = 100 + np.cumsum(rng.normal(size=n + 1))
+    df = pd.DataFrame({"Close": close[:-1], "Target": close[1:],
+                       "SMA_10": close[:-1] + rng.normal(size=n), "SMA_50": close[:-1] + rng.normal(size=n),
+                       "Volatility": rng.uniform(0.5, 2, size=n)})
+    return df
+
+
+def make_config(tmp_path, **overrides):
+    settings = dict(method="asha", n_trials=6, n_jobs=1, seed=0, min_rounds=4, max_rounds=16, eta=2,
+                    early_stopping_rounds=0, results_file_path=str(tmp_path / "results.jsonl"),
+                    summary_file_path=str(tmp_path / "best.json"), wandb=False)
+    settings.update(overrides)
+    return LocalSearchConfig(**settings)
+
+
+def read_results(config):
+    with open(config.results_file_path) as file_obj:
+        return [json.loads(line) for line in file_obj]
+
+
+def test_asha_promotes_the_best_trials_to_more_rounds(tmp_path):
+    config = make_config(tmp_path)
+    results, summary = LocalSearch(config, SMALL_SPACE).initiate_search(make_features())
+
+    assert read_results(config) == results
+    assert len({row["trial"] for row in results}) == 6
+    # Rungs at 4, 8, 16 rounds: every trial starts at rung 0, only the best half moves up
+    by_rung = [[row for row in results if row["rung"] == rung] for rung in range(3)]
+    assert len(by_rung[0]) == 6 and 3 <= len(by_rung[1]) < 6 and len(by_rung[2]) >= 1
+    assert all(row["rounds"] == 4 for row in by_rung[0])
+    assert all(row["rounds"] == 16 for row in by_rung[2])
+    # Promotions happen as results arrive, but the final top half of rung 0 always moved up
+    best_at_rung_0 = sorted(by_rung[0], key=lambda row: row["mae"])[:3]
+    assert {row["trial"] for row in best_at_rung_0} <= {row["trial"] for row in by_rung[1]}
+
+    with open(config.summary_file_path) as file_obj:
+        assert json.load(file_obj)["best_mae"] == min(row["mae"] for row in results)
+    assert summary["ensemble_params"]["xgb"]["n_estimators"] == summary["best_rounds"]
+
+
+def test_grid_runs_every_combination_and_pool_matches_serial(tmp_path):
+    config = make_config(tmp_path, method="grid")
+    results, _ = LocalSearch(config, SMALL_SPACE).initiate_search(make_features())
+    assert len(results) == 16
+
+    # Random search on 2 workers reading the features from shared memory
+    serial, _ = LocalSearch(make_config(tmp_path, method="random", n_trials=3), SMALL_SPACE) \
+        .initiate_search(make_features())
+    pooled, _ = LocalSearch(make_config(tmp_path, method="random", n_trials=3, n_jobs=2), SMALL_SPACE) \
+        .initiate_search(make_features())
+    by_trial = {row["trial"]: row["mae"] for row in pooled}
+    for row in serial:
+        assert abs(by_trial[row["trial"]] - row["mae"]) < 1e-9
+
+
+def test_early_stopping_marks_trials_converged(tmp_path):
+    # A huge learning rate overshoots: XGBoost's validation MAE stops improving right away
+    space = dict(SMALL_SPACE, xgb_learning_rate=[1.0], xgb_n_estimators=[50])
+    config = make_config(tmp_path, method="grid", early_stopping_rounds=2)
+    results, _ = LocalSearch(config, space).initiate_search(make_features())
+    assert any(row["converged"] and row["rounds"] < 50 for row in results)
+
+
+def test_early_stopping_never_looks_at_the_validation_rows():
+    """The rounds a trial keeps don't change when only the validation targets change"""
+    arrays = prepare_arrays(make_features())
+    job = {"trial": 0, "params": {"rf_n_estimators": 5, "rf_max_depth": 3, "xgb_learning_rate": 1.0,
+                                  "xgb_n_estimators": 50}, "rounds": 50, "early_stopping_rounds": 2}
+
+    rounds = []
+    for shift in (0.0, 25.0):
+        local_search._arrays.update(arrays, y_val=arrays["y_val"] + shift)
+        rounds.append(run_trial(job)["rounds"])
+    local_search._arrays.clear()
+    assert rounds[0] == rounds[1] < 50
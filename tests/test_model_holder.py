@@ -0,0 +1,86 @@
+import numpy as np
+
+from api.model_holder import ModelHolder
+from src.fused_predictor import FusedPredictor
+
+
+# A tree-less fused predictor: prediction = coef . x + intercept
+def write_linear_model(artifact_dir, intercept, version):
+    arrays = {
+        "feature_names": np.array(["Close", "SMA_10", "SMA_50", "Volatility"]),
+        "scaler_mean": np.zeros(4),
+        "scaler_scale": np.ones(4),
+        "linear_coef": np.array([1.0, 0.0, 0.0, 0.0]),
+        "intercept": intercept,
+        "feature": np.zeros(0, dtype=np.int32),
+        "threshold": np.zeros(0, dtype=np.float32),
+        "left": np.zeros(0, dtype=np.int32),
+        "value": np.zeros(0),
+        "roots": np.zeros(0, dtype=np.int32),
+        "depth": 0,
+    }
+    FusedPredictor(arrays).save(str(artifact_dir / "fused_model.joblib"))
+    (artifact_dir / "VERSION").write_text(version)
+
+
+def test_holder_loads_lazily_and_swaps_on_new_version(tmp_path):
+    write_linear_model(tmp_path, intercept=0.0, version="v1")
+    holder = ModelHolder(str(tmp_path), reload_interval=0)
+
+    # Nothing is loaded until the first prediction
+    assert holder.health()["loaded"] is False
+
+    old_bundle = holder.get()
+    assert old_bundle.predict(np.array([[100.0, 0, 0, 0]]))[0] == 100.0
+    assert holder.health()["version"] == "v1"
+    assert holder.health()["cold_start_seconds"] is not None
+
+    # Nothing changed on disk -> no reload
+    assert holder.reload_if_changed() is False
+
+    write_linear_model(tmp_path, intercept=5.0, version="v2")
+    assert holder.reload_if_changed() is True
+    assert holder.get().predict(np.array([[100.0, 0, 0, 0]]))[0] == 105.0
+
+    # A request that grabbed the old bundle before the swap still finishes on it
+    assert old_bundle.predict(np.array([[100.0, 0, 0, 0]]))[0] == 100.0
+
+
+def test_holder_keeps_old_model_when_reload_fails(tmp_path):
+    write_linear_model(tmp_path, intercept=0.0, version="v1")
+    holder = ModelHolder(str(tmp_path), reload_interval=0)
+    holder.get()
+
+    (tmp_path / "fused_model.joblib").write_bytes(b"half-written")
+    (tmp_path / "VERSION").write_text("v2")
+
+    assert holder.reload_if_changed() is False
+    assert holder.get().version == "v1"
+    assert holder.health()["last_reload_error"]
+
+
+def test_large_batch_never_mixes_versions_mid_retrain(tmp_path):
+    import joblib
+    from sklearn.dummy import DummyRegressor
+    from sklearn.preprocessing import FunctionTransformer
+
+    def write_sklearn_model(constant):
+        X = np.zeros((2, 4))
+        joblib.dump(FunctionTransformer().fit(X), tmp_path / "scaler.pkl")
+        joblib.dump(DummyRegressor(strategy="constant", constant=constant).fit(X, [0, 0]), tmp_path / "model.pkl")
+
+    write_sklearn_model(100.0)
+    write_linear_model(tmp_path, intercept=0.0, version="v1")
+    holder = ModelHolder(str(tmp_path), reload_interval=0, fused_max_rows=1)
+    bundle = holder.get()
+    batch = np.array([[100.0, 0, 0, 0], [100.0, 0, 0, 0]])
+
+    # A retrain has replaced model.pkl but not yet VERSION: the batch stays on v1's fused predictor
+    write_sklearn_model(999.0)
+    assert bundle.predict(batch).tolist() == [100.0, 100.0]
+    assert bundle.model is None
+
+    # Once VERSION moves, the new bundle serves large batches from its own model.pkl
+    write_linear_model(tmp_path, intercept=0.0, version="v2")
+    assert holder.reload_if_changed() is True
+    assert holder.get().predict(batch).tolist() == [999.0, 999.0]
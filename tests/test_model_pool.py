@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from api.model_holder import ModelHolder
+from api.model_pool import DEFAULT_MODEL, ModelPool
+from tests.test_model_holder import write_linear_model
+
+
+def make_pool(tmp_path, symbols, **kwargs):
+    write_linear_model(tmp_path, intercept=0.0, version="default-v1")
+    for i, symbol in enumerate(symbols, start=1):
+        (tmp_path / symbol).mkdir()
+        write_linear_model(tmp_path / symbol, intercept=float(i), version=f"{symbol}-v1")
+    default_holder = ModelHolder(str(tmp_path), reload_interval=0)
+    return ModelPool(str(tmp_path), default_holder, default_symbol="GOOGL", reload_interval=0, **kwargs)
+
+
+def test_symbols_route_to_their_own_model(tmp_path):
+    pool = make_pool(tmp_path, ["AAPL", "MSFT"])
+    row = np.array([[100.0, 0, 0, 0]])
+
+    assert pool.resolve("aapl") == "AAPL"
+    assert pool.resolve("GOOGL") == DEFAULT_MODEL
+    # Unknown symbols fall back to the default model unless the pool is strict
+    assert pool.resolve("TSLA") == DEFAULT_MODEL
+
+    assert pool.load("AAPL").predict(row)[0] == 101.0
+    assert pool.load("MSFT").predict(row)[0] == 102.0
+    assert pool.load(DEFAULT_MODEL).predict(row)[0] == 100.0
+    assert pool.stats()["resident_models"] == 2
+
+
+def test_strict_pool_rejects_unknown_symbols(tmp_path):
+    pool = make_pool(tmp_path, ["AAPL"], strict=True)
+    assert pool.resolve("GOOGL") == DEFAULT_MODEL
+    with pytest.raises(KeyError):
+        pool.resolve("TSLA")
+
+
+def test_least_recently_used_model_is_evicted_over_budget(tmp_path):
+    pool = make_pool(tmp_path, ["AAPL", "MSFT", "NVDA"], memory_budget_mb=0)
+
+    pool.load("AAPL")
+    pool.load("MSFT")
+    pool.load("NVDA")
+
+    # A zero budget keeps only the model that was just used
+    assert [m["symbol"] for m in pool.stats()["models"]] == ["NVDA"]
+    assert pool.evictions == 2
+
+    # An evicted symbol is simply loaded again on its next request
+    assert pool.load("AAPL").predict(np.array([[1.0, 0, 0, 0]]))[0] == 2.0
+
+
+def test_path_like_symbols_are_rejected_before_touching_disk(tmp_path):
+    pool = make_pool(tmp_path, ["AAPL"])
+    (tmp_path / "x").mkdir()
+
+    for symbol in ["..", "../x", ".", "AAPL/..", "x/../AAPL", "A" * 20]:
+        with pytest.raises(ValueError):
+            pool.resolve(symbol)
+    # Ticker punctuation is still fine
+    assert pool.resolve("BRK.B") == DEFAULT_MODEL
+    assert pool.stats()["resident_models"] == 0
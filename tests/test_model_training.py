@@ -0,0 +1,98 @@
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression
+
+import src.components.model_training as model_training
+from src.components.model_training import ModelTrainer
+from src.training_cache import TrainingCache, TrainingCacheConfig
+
+SMALL_PARAMS = {
+    "lr": {},
+    "rf": {"n_estimators": 10, "max_depth": 4, "random_state": 42},
+    "xgb": {"n_estimators": 10, "learning_rate": 0.2, "random_state": 42},
+}
+
+
+def make_features(n):
+    rng = np.random.default_rng(3)
+    close = 100 + np.cumsum(rng.normal(scale=0.5, size=n + 1))
+    df = pd.DataFrame({"Close": close[:-1], "Target": close[1:]})
+    df["SMA_10"] = df["Close"].rolling(10, min_periods=1).mean()
+    df["SMA_50"] = df["Close"].rolling(50, min_periods=1).mean()
+    df["Volatility"] = df["Close"].rolling(10, min_periods=2).std().fillna(0.0)
+    return df
+
+
+# Every fit really happens (no entries are read or written)
+class DisabledTrainingCache(TrainingCache):
+    def __init__(self, config=None):
+        super().__init__(TrainingCacheConfig(enabled=False))
+
+
+@pytest.fixture
+def trainer(tmp_path, monkeypatch):
+    # Artifacts are written under the working directory (models/, data/)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("WANDB_MODE", "disabled")
+    # Config defaults are read from the env at import, so the cache is switched off directly
+    monkeypatch.setattr(model_training, "TrainingCache", DisabledTrainingCache)
+
+    trainer = ModelTrainer()
+    config = trainer.model_trainer_config
+    config.ensemble_params = SMALL_PARAMS
+    config.parallel = False
+    config.core_budget = 1
+    config.incremental = True
+    config.incremental_rf_trees = 3
+    config.incremental_xgb_rounds = 2
+    return trainer
+
+
+def train_on(trainer, monkeypatch, df):
+    monkeypatch.setattr(model_training, "load_training_features", lambda: df)
+    trainer.initiate_model_trainer()
+    return joblib.load(trainer.model_trainer_config.training_state_file_path)
+
+
+def test_incremental_update_after_new_rows(trainer, monkeypatch, tmp_path):
+    df = make_features(600)
+
+    state = train_on(trainer, monkeypatch, df.iloc[:500])
+    assert state["updates_since_full"] == 0 and state["train_rows"] == 400
+    assert not (tmp_path / "data" / "training_cache").exists()
+
+    state = train_on(trainer, monkeypatch, df)
+    assert state["updates_since_full"] == 1 and state["train_rows"] == 480
+
+    ensemble = joblib.load(trainer.model_trainer_config.trained_model_file_path)
+    # RF keeps its size, XGB grows by the extra rounds
+    assert len(ensemble.named_estimators_["rf"].estimators_) == 10
+    assert ensemble.named_estimators_["xgb"].get_booster().num_boosted_rounds() == 12
+
+    # LR is exactly the least-squares fit on all 480 training rows (in the first run's scaled space)
+    X_train = state["scaler"].transform(df[model_training.FEATURE_COLUMNS].iloc[:480])
+    reference = LinearRegression().fit(X_train, df["Target"].iloc[:480])
+    np.testing.assert_allclose(ensemble.named_estimators_["lr"].predict(X_train), reference.predict(X_train),
+                               rtol=1e-6)
+
+
+def test_changed_history_and_refit_interval_force_a_full_refit(trainer, monkeypatch):
+    df = make_features(600)
+    state = train_on(trainer, monkeypatch, df.iloc[:500])
+    X_train, y_train = df[model_training.FEATURE_COLUMNS].iloc[:480], df["Target"].iloc[:480]
+    config = trainer.model_trainer_config
+    versions = state["versions"]
+
+    assert trainer.plan_training(state, X_train, y_train, SMALL_PARAMS, versions)[0] == "incremental"
+
+    edited = X_train.copy()
+    edited.iloc[5, 0] += 1.0
+    assert trainer.plan_training(state, edited, y_train, SMALL_PARAMS, versions)[0] == "full"
+
+    new_params = dict(SMALL_PARAMS, rf={"n_estimators": 20, "max_depth": 4, "random_state": 42})
+    assert trainer.plan_training(state, X_train, y_train, new_params, versions)[0] == "full"
+
+    state["updates_since_full"] = config.full_refit_every
+    assert trainer.plan_training(state, X_train, y_train, SMALL_PARAMS, versions)[0] == "full"
@@ -0,0 +1,47 @@
+import time
+
+from api.prediction_cache import PredictionCache
+
+ROW = [100.0, 102.0, 98.0, 2.5]
+
+
+def test_cache_hits_evicts_and_expires():
+    cache = PredictionCache(max_entries=2, ttl_seconds=0.05)
+
+    assert cache.get("v1", ROW) is None
+    cache.put("v1", ROW, 101.5)
+    assert cache.get("v1", ROW) == 101.5
+
+    # Third entry pushes out the least recently used one
+    cache.put("v1", [1.0, 1.0, 1.0, 1.0], 1.0)
+    cache.put("v1", [2.0, 2.0, 2.0, 2.0], 2.0)
+    assert cache.get("v1", ROW) is None
+    assert cache.stats()["evictions"] == 1
+
+    time.sleep(0.06)
+    assert cache.get("v1", [2.0, 2.0, 2.0, 2.0]) is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_new_model_version_invalidates_and_quantized_keys_are_shared():
+    cache = PredictionCache(decimals=2)
+    cache.put("v1", ROW, 101.5)
+
+    # Rounded to 2 decimals -> same entry
+    assert cache.get("v1", [100.001, 102.0, 98.0, 2.5]) == 101.5
+
+    # A hot-reloaded model must never serve the old model's answers
+    assert cache.get("v2", ROW) is None
+    assert cache.stats()["size"] == 0
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_models_are_cached_and_invalidated_independently():
+    cache = PredictionCache()
+    cache.put("v1", ROW, 101.5, model="AAPL")
+    cache.put("v1", ROW, 55.0, model="MSFT")
+
+    assert cache.get("v1", ROW, model="AAPL") == 101.5
+    # Retraining MSFT leaves AAPL's entries alone
+    assert cache.get("v2", ROW, model="MSFT") is None
+    assert cache.get("v1", ROW, model="AAPL") == 101.5
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+from src.components.data_transformation import DataTransformation
+from src.raw_store import RawStore
+
+
+def test_partitions_manifest_and_range_reads(tmp_path):
+    store = RawStore(str(tmp_path / "raw_store"))
+    bars = pd.read_csv("data/data.csv")
+
+    store.write(bars.iloc[:800], "googl")
+    # Overlapping second write: duplicates are merged, only touched years are rewritten
+    store.write(bars.iloc[700:], "GOOGL")
+
+    manifest = store.load_manifest()["partitions"]
+    assert sum(p["rows"] for p in manifest.values()) == len(bars)
+    assert "symbol=GOOGL/year=2024" in manifest
+    assert store.last_date("GOOGL") == pd.Timestamp(bars["Date"].iloc[-1])
+
+    df = store.read(symbols="GOOGL", start="2024-03-01", end="2024-03-31")
+    assert df["Date"].min() >= pd.Timestamp("2024-03-01") and df["Date"].max() <= pd.Timestamp("2024-03-31")
+    assert df["Close"].dtype == np.float32 and df["Volume"].dtype == np.int64
+    assert store.verify() == []
+
+    # A modified partition no longer matches its checksum
+    with open(tmp_path / "raw_store" / "symbol=GOOGL" / "year=2021" / "part.parquet", "ab") as file_obj:
+        file_obj.write(b"x")
+    assert store.verify() == [{"partition": "symbol=GOOGL/year=2021", "problem": "checksum mismatch"}]
+
+
+def test_transformation_reads_the_raw_store(tmp_path):
+    store = RawStore(str(tmp_path / "raw_store"))
+    store.import_csv("data/data.csv", "GOOGL")
+
+    transformation = DataTransformation()
+    from_store = transformation.build_features(transformation.read_raw_data(str(tmp_path / "raw_store")))
+    from_csv = transformation.build_features(transformation.read_raw_data("data/data.csv"))
+
+    assert from_store.index.equals(from_csv.index)
+    assert (from_store["symbol"] == "GOOGL").all()
+    # float32 storage: same features to float32 precision
+    np.testing.assert_allclose(from_store["SMA_50"], from_csv["SMA_50"], rtol=1e-6)
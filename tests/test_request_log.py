@@ -0,0 +1,22 @@
+import json
+
+from api.request_log import RequestLogWriter
+
+
+def test_request_log_batches_and_rotates(tmp_path):
+    log_path = tmp_path / "requests.jsonl"
+    writer = RequestLogWriter(str(log_path), max_bytes=2000, backup_count=2, batch_size=10, flush_interval=0.01)
+
+    for i in range(200):
+        writer.write({"i": i, "path": "/predict", "status": 200})
+    writer.flush()
+
+    assert writer.stats()["written"] == 200
+    assert writer.stats()["rotations"] >= 1
+    assert (tmp_path / "requests.jsonl.1").exists()
+    # Only backup_count old files are kept
+    assert not (tmp_path / "requests.jsonl.3").exists()
+
+    # The newest records are in the live file, one JSON object per line
+    last = [json.loads(line) for line in log_path.read_text().splitlines()]
+    assert last[-1]["i"] == 199
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+from src.components.data_transformation import DataTransformation
+from src.rolling_features import RollingFeatureState
+
+
+def make_raw_bars(n_days):
+    rng = np.random.default_rng(7)
+    close = 100 + rng.standard_normal(n_days).cumsum()
+    dates = pd.bdate_range("2020-01-01", periods=n_days, name="Date")
+    return pd.DataFrame({"Close": close, "High": close + 1, "Low": close - 1, "Open": close,
+                         "Volume": rng.integers(1_000, 10_000, n_days)}, index=dates)
+
+
+def test_incremental_rows_match_the_batch_path():
+    raw = make_raw_bars(600)
+    transformation = DataTransformation()
+    expected = transformation.build_features(raw)
+
+    # Full run on the first 120 bars, then new bars arrive one by one (state saved and reloaded each time)
+    state = RollingFeatureState.from_history(raw.iloc[:120])
+    parts = [transformation.build_features(raw.iloc[:120])]
+    for i in range(120, len(raw)):
+        state = RollingFeatureState.loads(state.dumps())
+        parts.append(state.update(raw.iloc[i:i + 1]))
+    incremental = pd.concat([p for p in parts if len(p)])
+
+    assert incremental.index.equals(expected.index)
+    assert list(incremental.columns) == list(expected.columns)
+    # Same values up to floating-point summation order (pandas uses its own rolling sums)
+    np.testing.assert_allclose(incremental.to_numpy(dtype=float), expected.to_numpy(dtype=float),
+                               rtol=1e-12, atol=1e-9)
+
+
+def test_already_processed_bars_are_skipped():
+    raw = make_raw_bars(80)
+    state = RollingFeatureState.from_history(raw)
+    assert len(state.update(raw.iloc[-5:])) == 0
+
+    nxt = make_raw_bars(81).iloc[-1:]
+    assert list(state.update(nxt).index) == [raw.index[-1]]
+
+
+def test_revised_last_bar_matches_the_batch_path():
+    raw = make_raw_bars(120)
+    transformation = DataTransformation()
+
+    # The last bar was partial when the state was saved, then re-fetched with its final close
+    partial = raw.iloc[:100].copy()
+    partial.iloc[-1, partial.columns.get_loc("Close")] += 3.0
+    state = RollingFeatureState.loads(RollingFeatureState.from_history(partial).dumps())
+
+    revised = state.update(raw.iloc[99:])
+    expected = transformation.build_features(raw)
+    # The row before the revised bar comes back with the corrected Target, then every new row
+    assert revised.index[0] == raw.index[98]
+    expected = expected.loc[revised.index]
+    np.testing.assert_allclose(revised.to_numpy(dtype=float), expected.to_numpy(dtype=float),
+                               rtol=1e-12, atol=1e-9)
+
+    # Feeding the same last bar again changes nothing
+    assert len(state.update(raw.iloc[-1:])) == 0
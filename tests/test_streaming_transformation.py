@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.components.data_transformation import DataTransformation
+from src.feature_engine import streaming_lookback
+from src.raw_store import RawStore
+
+
+def write_intraday_csv(path, symbols, n_bars=400, missing=None):
+    rng = np.random.default_rng(11)
+    frames = []
+    for symbol in symbols:
+        close = 100 + rng.standard_normal(n_bars).cumsum()
+        frame = pd.DataFrame({
+            "Datetime": pd.date_range("2024-01-02 09:30", periods=n_bars, freq="min"),
+            "symbol": symbol, "Open": close, "High": close + 0.5, "Low": close - 0.5, "Close": close,
+            "Volume": rng.integers(100, 1000, n_bars),
+        })
+        # missing={"BBB": [bar numbers]}: minutes without a trade for that symbol
+        frames.append(frame.drop(index=(missing or {}).get(symbol, [])))
+    # Interleaved by time, like a multi-symbol minute-bar export
+    pd.concat(frames).sort_values(["Datetime", "symbol"]).to_csv(path, index=False)
+
+
+def test_streaming_chunks_match_the_full_run(tmp_path):
+    csv_path = tmp_path / "bars.csv"
+    write_intraday_csv(csv_path, ["AAA", "BBB"])
+
+    transformation = DataTransformation()
+    transformation.transformation_config.chunk_rows = 97  # chunk edges fall mid-window
+
+    written = []
+    summary = transformation.initiate_streaming_transformation(str(csv_path), write_fn=written.append)
+    streamed = pd.concat(written).reset_index().sort_values(["symbol", "Datetime"]).reset_index(drop=True)
+
+    raw = pd.read_csv(csv_path, parse_dates=["Datetime"]).set_index("Datetime")
+    expected = transformation.build_features(raw).reset_index().sort_values(["symbol", "Datetime"]).reset_index(drop=True)
+
+    assert summary["chunks"] == 9 and summary["rows_written"] == len(expected)
+    assert streamed["Close"].dtype == np.float32
+    pd.testing.assert_series_equal(streamed["Datetime"], expected["Datetime"])
+    for col in ["SMA_10", "SMA_50", "Volatility", "Target"]:
+        np.testing.assert_allclose(streamed[col], expected[col], rtol=1e-5)
+
+
+def test_streaming_keeps_every_row_when_one_symbol_has_gaps(tmp_path):
+    """Minutes missing for BBB only (mid-history and mid-chunk) cost BBB no extra rows"""
+    csv_path = tmp_path / "bars.csv"
+    write_intraday_csv(csv_path, ["AAA", "BBB"], missing={"BBB": [75, 160, 161, 300]})
+
+    transformation = DataTransformation()
+    transformation.transformation_config.chunk_rows = 97
+
+    written = []
+    transformation.initiate_streaming_transformation(str(csv_path), write_fn=written.append)
+    streamed = pd.concat(written).reset_index()
+
+    # Each symbol on its own: 400 (or 396) bars - 49 warm-up rows - 1 row without a Target
+    counts = streamed.groupby("symbol").size().to_dict()
+    assert counts == {"AAA": 350, "BBB": 346}
+
+    raw = pd.read_csv(csv_path, parse_dates=["Datetime"])
+    bbb = raw[raw["symbol"] == "BBB"].set_index("Datetime")["Close"]
+    expected = bbb.rolling(50).mean().dropna().iloc[:-1]
+    got = streamed[streamed["symbol"] == "BBB"].set_index("Datetime")["SMA_50"].sort_index()
+    np.testing.assert_allclose(got, expected.loc[got.index], rtol=1e-5)
+    assert got.index.equals(expected.index)
+
+
+def test_history_dependent_features_cannot_be_streamed():
+    assert streaming_lookback(["SMA_10", "SMA_50", "Volatility", "Target"]) == 50
+    with pytest.raises(ValueError, match="full history"):
+        streaming_lookback(["EMA_12"])
+
+
+def test_streaming_reads_the_raw_store(tmp_path):
+    store = RawStore(str(tmp_path / "raw_store"))
+    rng = np.random.default_rng(3)
+    dates = pd.bdate_range("2020-06-01", periods=400)  # spans two year partitions
+    for symbol in ["AAA", "BBB"]:
+        close = 100 + rng.standard_normal(len(dates)).cumsum()
+        store.write(pd.DataFrame({"Date": dates, "Open": close, "High": close + 1, "Low": close - 1,
+                                  "Close": close, "Volume": 1_000}), symbol)
+
+    transformation = DataTransformation()
+    transformation.transformation_config.chunk_rows = 97
+    written = []
+    summary = transformation.initiate_streaming_transformation(str(tmp_path / "raw_store"), write_fn=written.append)
+    streamed = pd.concat(written).reset_index().sort_values(["symbol", "Date"]).reset_index(drop=True)
+
+    raw = transformation.read_raw_data(str(tmp_path / "raw_store"))
+    expected = transformation.build_features(raw).reset_index().sort_values(["symbol", "Date"]).reset_index(drop=True)
+
+    assert summary["rows_read"] == 800 and summary["rows_written"] == len(expected)
+    pd.testing.assert_series_equal(streamed["Date"], expected["Date"])
+    for col in ["SMA_10", "SMA_50", "Volatility", "Target"]:
+        np.testing.assert_allclose(streamed[col], expected[col], rtol=1e-5)
@@ -0,0 +1,118 @@
+import threading
+
+import pandas as pd
+
+from src.sweep_export import SweepExportConfig, SweepExporter, SweepResultsStore, flatten, typed_frame
+
+
+# In-memory stand-in for the W&B runs API (same interface as WandbRunsClient)
+class FakeRunsClient:
+    def __init__(self, runs):
+        self.runs = runs
+        self.pages_served = 0
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def list_runs(self, updated_after=None, updated_before=None, per_page=50):
+        with self._lock:
+            self.calls.append((updated_after, updated_before))
+        selected = sorted((run for run in self.runs
+                           if (updated_after is None or run["updated_at"] >= updated_after)
+                           and (updated_before is None or run["updated_at"] < updated_before)),
+                          key=lambda run: run["updated_at"])
+        for start in range(0, len(selected), per_page):
+            with self._lock:
+                self.pages_served += 1
+            yield [dict(run) for run in selected[start:start + per_page]]
+
+    def earliest_update(self):
+        return min((run["updated_at"] for run in self.runs), default=None)
+
+
+def make_run(i, mae, updated_at, depth=10):
+    return {"id": f"run{i}", "name": f"sweep-{i}", "state": "finished", "updated_at": updated_at,
+            "summary": {"mae": mae, "_runtime": 40 + i, "_wandb": {"runtime": 40 + i}},
+            "config": {"rf_n_estimators": 200, "rf_max_depth": depth, "xgb_learning_rate": 0.2}}
+
+
+def make_exporter(tmp_path, client):
+    config = SweepExportConfig(sweep_path="entity/project/sweeps/abc", store_dir=str(tmp_path / "store"),
+                               state_file_path=str(tmp_path / "store" / "sync_state.json"),
+                               csv_file_path=str(tmp_path / "sweep_results.csv"), max_workers=3, page_size=4)
+    return SweepExporter(config, client)
+
+
+def test_flatten_and_types():
+    assert flatten({"_wandb": {"runtime": 42}, "mae": 1.5}) == {"_wandb.runtime": 42, "mae": 1.5}
+
+    df = typed_frame([{"mae": 1.5, "depth": 10, "ok": True, "name": "a"},
+                      {"mae": 2.0, "depth": None, "ok": False, "name": "b"}])
+    assert str(df["mae"].dtype) == "float64"
+    assert str(df["depth"].dtype) == "Int64"
+    assert str(df["ok"].dtype) == "boolean"
+    assert str(df["name"].dtype) == "string"
+
+
+def test_incremental_export_fetches_only_new_or_updated_runs(tmp_path):
+    runs = [make_run(i, 22.0 - i * 0.1, f"2026-01-{i + 1:02d}T00:00:00") for i in range(10)]
+    client = FakeRunsClient(runs)
+    exporter = make_exporter(tmp_path, client)
+
+    stats = exporter.initiate_export()
+    assert stats["new_or_updated"] == 10 and stats["total_runs"] == 10
+    # Concurrent time slices, each paged
+    assert len(client.calls) == 3 and client.pages_served >= 3
+
+    # Nested summary fields became typed columns (no stringified dicts)
+    csv = pd.read_csv(tmp_path / "sweep_results.csv")
+    assert "_wandb.runtime" in csv.columns and "_wandb" not in csv.columns
+    assert csv["_wandb.runtime"].dtype.kind == "i"
+
+    # Nothing changed: only the newest run (at the watermark) comes back and it is skipped
+    stats = exporter.initiate_export()
+    assert stats["fetched"] == 1 and stats["new_or_updated"] == 0
+
+    # One run was updated and one is new
+    runs[2] = make_run(2, 5.0, "2026-02-01T00:00:00")
+    runs.append(make_run(10, 30.0, "2026-02-02T00:00:00", depth=20))
+    stats = exporter.initiate_export()
+    assert stats["new_or_updated"] == 2 and stats["total_runs"] == 11
+
+    best = exporter.store.top_k(3, by="mae", columns=["name"])
+    assert list(best["name"]) == ["sweep-2", "sweep-9", "sweep-8"]
+    assert best["mae"].iloc[0] == 5.0
+
+    deep = exporter.store.read(columns=["name", "rf_max_depth"], filters={"rf_max_depth": ("==", 20)})
+    assert list(deep["name"]) == ["sweep-10"]
+
+
+def test_compaction_keeps_latest_versions(tmp_path):
+    store = SweepResultsStore(str(tmp_path), compact_after=2)
+    for version, mae in enumerate([3.0, 2.0, 1.0]):
+        store.append(typed_frame([{"name": "a", "run_id": "a", "updated_at": f"2026-01-0{version + 1}",
+                                   "mae": mae}]))
+    assert len(store.parts()) == 1
+    assert store.read()["mae"].tolist() == [1.0]
+
+
+def test_column_type_change_between_syncs(tmp_path):
+    runs = [make_run(i, 20.0 + i, f"2026-01-{i + 1:02d}T00:00:00") for i in range(3)]
+    runs[0]["summary"]["note"] = 7
+    client = FakeRunsClient(runs)
+    exporter = make_exporter(tmp_path, client)
+    exporter.initiate_export()
+
+    # Same key, now logged as text (int64 part + string part)
+    runs.append(make_run(3, 1.0, "2026-02-01T00:00:00"))
+    runs[3]["summary"]["note"] = "fast"
+    stats = exporter.initiate_export()
+    assert stats["total_runs"] == 4
+
+    notes = exporter.store.read(columns=["name", "note"]).set_index("name")["note"]
+    assert notes["sweep-0"] == "7" and notes["sweep-3"] == "fast"
+    assert str(notes.dtype) == "string"
+
+    # Compaction writes the unified type, and later syncs still work
+    exporter.store.compact()
+    assert len(exporter.store.parts()) == 1
+    assert exporter.initiate_export()["new_or_updated"] == 0
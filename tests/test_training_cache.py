@@ -0,0 +1,74 @@
+import os
+import time
+import numpy as np
+import pandas as pd
+
+from src.training_cache import TrainingCache, TrainingCacheConfig, fit_members_cached, frame_fingerprint
+
+SMALL_PARAMS = {
+    "lr": {},
+    "rf": {"n_estimators": 5, "max_depth": 3, "random_state": 42},
+    "xgb": {"n_estimators": 5, "learning_rate": 0.2, "random_state": 42},
+}
+
+
+def make_cache(tmp_path, max_bytes=50 * 1024 * 1024):
+    return TrainingCache(TrainingCacheConfig(cache_dir=str(tmp_path / "cache"), max_bytes=max_bytes, enabled=True))
+
+
+def test_fingerprint_changes_with_values_and_columns():
+    df = pd.DataFrame({"Close": [1.0, 2.0], "SMA_10": [3.0, 4.0]})
+    assert frame_fingerprint(df) == frame_fingerprint(df.copy())
+    assert frame_fingerprint(df) != frame_fingerprint(df.assign(Close=[1.0, 2.5]))
+    assert frame_fingerprint(df) != frame_fingerprint(df.rename(columns={"SMA_10": "SMA_50"}))
+
+
+def test_only_members_with_changed_params_are_refitted(tmp_path):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(80, 4))
+    y = X.sum(axis=1)
+    cache = make_cache(tmp_path)
+
+    first, stats, _, cached = fit_members_cached(cache, "data-1", X, y, SMALL_PARAMS, parallel=False)
+    assert cached == [] and set(stats) == {"lr", "rf", "xgb", "total"}
+
+    # Same data and params: nothing is fitted, the stored members come back
+    again, stats, _, cached = fit_members_cached(cache, "data-1", X, y, SMALL_PARAMS, parallel=False)
+    assert cached == ["lr", "rf", "xgb"] and stats == {}
+    np.testing.assert_allclose(again["rf"].predict(X), first["rf"].predict(X))
+
+    # New XGB params: LR and RF are still reused
+    params = dict(SMALL_PARAMS, xgb={"n_estimators": 6, "learning_rate": 0.2, "random_state": 42})
+    _, stats, _, cached = fit_members_cached(cache, "data-1", X, y, params, parallel=False)
+    assert cached == ["lr", "rf"] and "xgb" in stats
+
+    # New data: everything is refitted
+    _, _, _, cached = fit_members_cached(cache, "data-2", X, y, SMALL_PARAMS, parallel=False)
+    assert cached == []
+
+
+def test_eviction_drops_least_recently_used(tmp_path):
+    blob = np.zeros(20_000)  # ~160 KB per entry
+    cache = make_cache(tmp_path, max_bytes=400_000)
+
+    cache.put("a", blob)
+    cache.put("b", blob)
+    # Make "a" the most recently used entry
+    old = time.time() - 100
+    os.utime(cache.path("b"), (old, old))
+    assert cache.get("a") is not None
+
+    cache.put("c", blob)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["bytes"] <= 400_000
+
+
+def test_corrupt_entry_is_a_miss(tmp_path):
+    cache = make_cache(tmp_path)
+    os.makedirs(cache.config.cache_dir)
+    with open(cache.path("broken"), "w") as file_obj:
+        file_obj.write("not a pickle")
+
+    assert cache.get("broken") is None
+    assert not os.path.exists(cache.path("broken"))